@@ -18,16 +18,21 @@ def main():
     db.ensure_schema(Path(__file__).parent / "schema.sql")
 
     doc_id = data["doc_id"]
+    doc = db.get_document(doc_id)
+    if doc is None:
+        sys.exit(f"ERROR: unknown doc_id {doc_id}")
+    # Recorded in report_layer_state, so structurize skips these layers until the text changes.
+    content_hash = doc["content_hash"]
     wrote = []
 
     if data.get("metadata"):
-        upsert_metadata(db, doc_id, data["metadata"], MODEL)
+        upsert_metadata(db, doc_id, data["metadata"], MODEL, content_hash)
         wrote.append("L1")
     if data.get("theses") is not None:
-        upsert_theses(db, doc_id, data["theses"], MODEL)
+        upsert_theses(db, doc_id, data["theses"], MODEL, content_hash)
         wrote.append(f"L2({len(data['theses'])})")
     if data.get("metrics") is not None:
-        upsert_metrics(db, doc_id, data["metrics"], MODEL)
+        upsert_metrics(db, doc_id, data["metrics"], MODEL, content_hash)
         wrote.append(f"L3({len(data['metrics'])})")
 
     print(f"OK: {doc_id} — {', '.join(wrote)}")
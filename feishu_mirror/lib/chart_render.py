@@ -1,24 +1,34 @@
 from __future__ import annotations
 
-import atexit
 import io
 import logging
 import platform
-import threading
 
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import matplotlib.ticker as mticker
+from matplotlib.axes import Axes
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
 from datetime import datetime
 
+import numpy as np
+
+from .indicators import sma
+from .tradingview_pool import get_tradingview_pool
+
 
 _CN_FONT_NAME: str | None = None
+_FONT_READY = False
 
 
 def _setup_chinese_font() -> None:
-    """Auto-detect Chinese font on macOS / Linux."""
-    global _CN_FONT_NAME
+    """Auto-detect Chinese font on macOS / Linux (once per process)."""
+    global _CN_FONT_NAME, _FONT_READY
+    if _FONT_READY:
+        return
+    _FONT_READY = True
     system = platform.system()
     candidates = []
     if system == "Darwin":
@@ -29,17 +39,14 @@ def _setup_chinese_font() -> None:
     for font in candidates:
         try:
             matplotlib.font_manager.findfont(font, fallback_to_default=False)
-            plt.rcParams["font.sans-serif"] = [font] + plt.rcParams.get("font.sans-serif", [])
-            plt.rcParams["axes.unicode_minus"] = False
+            matplotlib.rcParams["font.sans-serif"] = [font] + matplotlib.rcParams.get("font.sans-serif", [])
+            matplotlib.rcParams["axes.unicode_minus"] = False
             _CN_FONT_NAME = font
             return
         except Exception:
             continue
 
 
-_setup_chinese_font()
-
-
 def _parse_dates(series: list[dict]) -> tuple[list[datetime], list[float]]:
     dates = []
     values = []
@@ -62,17 +69,22 @@ def _parse_dates(series: list[dict]) -> tuple[list[datetime], list[float]]:
     return dates, values
 
 
-def _setup_date_axis(ax: plt.Axes, num_points: int) -> None:
+def _new_figure(size: tuple, **kwargs) -> Figure:
+    """Plain OO Figure on the Agg canvas — no pyplot registry, nothing to close."""
+    _setup_chinese_font()
+    return Figure(figsize=size, **kwargs)
+
+
+def _setup_date_axis(ax: Axes, num_points: int) -> None:
     """Smart date axis: use AutoDateLocator to avoid duplicate labels."""
     locator = mdates.AutoDateLocator(minticks=3, maxticks=min(num_points, 12))
     ax.xaxis.set_major_locator(locator)
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d"))
 
 
-def _finalize(fig: plt.Figure) -> bytes:
+def _finalize(fig: Figure) -> bytes:
     buf = io.BytesIO()
     fig.savefig(buf, format="png", dpi=150, bbox_inches="tight", facecolor=fig.get_facecolor())
-    plt.close(fig)
     buf.seek(0)
     return buf.read()
 
@@ -86,7 +98,8 @@ def render_line_chart(
     """Render a single line chart, return PNG bytes."""
     dates, values = _parse_dates(series)
 
-    fig, ax = plt.subplots(figsize=size)
+    fig = _new_figure(size)
+    ax = fig.subplots()
     ax.plot(dates, values, linewidth=1.8, color="#4C8BF5")
     ax.set_title(title, fontsize=14, fontweight="bold", pad=12)
     if y_label:
@@ -107,7 +120,8 @@ def render_multi_line_chart(
 ) -> bytes:
     """Render multiple lines. series_list: [{"label": "AAPL", "data": [{"date":..., "value":...}]}]"""
     colors = ["#4C8BF5", "#EA4335", "#FBBC04", "#34A853", "#FF6D01", "#46BDC6"]
-    fig, ax = plt.subplots(figsize=size)
+    fig = _new_figure(size)
+    ax = fig.subplots()
 
     for i, s in enumerate(series_list):
         dates, values = _parse_dates(s["data"])
@@ -136,7 +150,8 @@ def render_bar_chart(
     labels = [item.get("label") or item.get("date") or item.get("period", "") for item in series]
     values = [float(item.get("value", 0)) for item in series]
 
-    fig, ax = plt.subplots(figsize=size)
+    fig = _new_figure(size)
+    ax = fig.subplots()
     bars = ax.bar(range(len(labels)), values, color="#4C8BF5", width=0.6)
     ax.set_xticks(range(len(labels)))
     ax.set_xticklabels(labels, rotation=30, ha="right")
@@ -178,56 +193,6 @@ def _tv_symbol(symbol: str, asset_class: str) -> str:
 
 _log = logging.getLogger(__name__)
 
-_pw_lock = threading.Lock()
-_playwright_instance = None
-_browser_instance = None
-
-
-def _get_browser():
-    """Lazy-init persistent Playwright browser (thread-safe, auto-recover)."""
-    global _playwright_instance, _browser_instance
-    with _pw_lock:
-        if _browser_instance is not None:
-            try:
-                if _browser_instance.is_connected():
-                    return _browser_instance
-            except Exception:
-                pass
-            # Browser died — clean up and recreate
-            _browser_instance = None
-
-        if _playwright_instance is not None:
-            try:
-                _playwright_instance.stop()
-            except Exception:
-                pass
-            _playwright_instance = None
-
-        from playwright.sync_api import sync_playwright
-        _playwright_instance = sync_playwright().start()
-        _browser_instance = _playwright_instance.chromium.launch(headless=True)
-        return _browser_instance
-
-
-def _cleanup_playwright():
-    """Shutdown browser on process exit to avoid zombie Chromium."""
-    global _playwright_instance, _browser_instance
-    try:
-        if _browser_instance:
-            _browser_instance.close()
-    except Exception as exc:
-        _log.warning("cleanup: browser close failed: %s", exc)
-    try:
-        if _playwright_instance:
-            _playwright_instance.stop()
-    except Exception as exc:
-        _log.warning("cleanup: playwright stop failed: %s", exc)
-    _browser_instance = None
-    _playwright_instance = None
-
-
-atexit.register(_cleanup_playwright)
-
 
 def render_tradingview_screenshot(
     symbol: str,
@@ -235,28 +200,52 @@ def render_tradingview_screenshot(
     interval: str = "D",
     size: tuple = (1280, 800),
 ) -> bytes:
-    """Screenshot TradingView chart for the given symbol via headless Playwright."""
+    """Screenshot TradingView chart for the given symbol via the pre-warmed page pool."""
     tv_sym = _tv_symbol(symbol, asset_class)
-    url = f"https://www.tradingview.com/chart/?symbol={tv_sym}&interval={interval}&theme=dark"
-
-    browser = _get_browser()
-    page = browser.new_page(viewport={"width": size[0], "height": size[1]})
     try:
-        # Use "domcontentloaded" instead of "networkidle" — TradingView loads tons
-        # of JS/analytics that "networkidle" waits for unnecessarily (~20s).
-        # The canvas selector below catches when the chart is actually rendered.
-        page.goto(url, wait_until="domcontentloaded", timeout=15000)
-        page.wait_for_selector("canvas", timeout=10000)
-        page.wait_for_timeout(1500)  # let final chart paint finish
-        return page.screenshot(type="png")
+        return get_tradingview_pool().screenshot(tv_sym, interval, size)
     except Exception as exc:
         _log.warning("TradingView screenshot failed for %s: %s", symbol, exc)
         raise
-    finally:
-        try:
-            page.close()
-        except Exception:
-            pass
+
+
+def _ohlcv_arrays(series: list[dict]) -> dict[str, np.ndarray]:
+    """OHLCV dict rows → sorted NumPy columns (date as datetime64[D], prices as float64)."""
+    rows = sorted(series, key=lambda item: str(item.get("date") or item.get("trade_date") or item.get("period", "")))
+    out: dict[str, np.ndarray] = {
+        "date": np.array(
+            [str(item.get("date") or item.get("trade_date") or item.get("period", ""))[:10] for item in rows],
+            dtype="datetime64[D]",
+        ),
+    }
+    for key in ("open", "high", "low", "close", "volume"):
+        out[key] = np.array([np.nan if item.get(key) is None else float(item[key]) for item in rows], dtype="float64")
+    # Bars without an open (some upstream rows) are drawn as dojis at the close.
+    out["open"] = np.where(np.isnan(out["open"]), out["close"], out["open"])
+    out["high"] = np.fmax(out["high"], np.fmax(out["open"], out["close"]))
+    out["low"] = np.fmin(out["low"], np.fmin(out["open"], out["close"]))
+    return out
+
+
+def _box_vertices(x: np.ndarray, bottom: np.ndarray, top: np.ndarray, width: float) -> np.ndarray:
+    """(n, 4, 2) rectangle corners for a PolyCollection."""
+    left, right = x - width / 2, x + width / 2
+    return np.stack([
+        np.column_stack([left, bottom]), np.column_stack([left, top]),
+        np.column_stack([right, top]), np.column_stack([right, bottom]),
+    ], axis=1)
+
+
+def _compact_number(value: float, _pos=None) -> str:
+    for div, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= div:
+            return f"{value / div:.1f}{suffix}"
+    return f"{value:.0f}"
+
+
+_UP, _DOWN = "#CF3040", "#00B386"       # 涨红跌绿
+_BG, _GRID, _TEXT = "#1A1A2E", "#333333", "#AAAAAA"
+_MA_COLORS = {5: "#F5C242", 10: "#4C8BF5", 20: "#C77DFF", 60: "#46BDC6"}
 
 
 def render_candlestick_chart(
@@ -268,78 +257,72 @@ def render_candlestick_chart(
     """Render a candlestick (K-line) chart from OHLCV data, return PNG bytes.
 
     series: [{"date": "2025-02-10", "open": 150, "high": 155, "low": 148, "close": 152, "volume": 1000000}, ...]
-    """
-    import mplfinance as mpf
-    import pandas as pd
 
-    rows = []
-    for item in series:
-        d = item.get("date") or item.get("trade_date") or item.get("period", "")
-        rows.append({
-            "Date": pd.Timestamp(d),
-            "Open": float(item.get("open", 0)),
-            "High": float(item.get("high", 0)),
-            "Low": float(item.get("low", 0)),
-            "Close": float(item.get("close", 0)),
-            "Volume": float(item.get("volume", 0)),
-        })
-
-    df = pd.DataFrame(rows)
-    df.set_index("Date", inplace=True)
-    df.sort_index(inplace=True)
-
-    has_volume = bool(df["Volume"].sum() > 0)
-
-    mc = mpf.make_marketcolors(
-        up="#CF3040", down="#00B386",       # 涨红跌绿
-        edge="inherit", wick="inherit",
-        volume={"up": "#CF304088", "down": "#00B38688"},
-    )
-    style = mpf.make_mpf_style(
-        base_mpf_style="nightclouds",
-        marketcolors=mc,
-        gridstyle="--", gridcolor="#333333",
-        facecolor="#1A1A2E", edgecolor="#333333",
-        figcolor="#1A1A2E",
-        y_on_right=True,
-        rc={
-            "font.size": 10,
-            "font.sans-serif": [_CN_FONT_NAME, "DejaVu Sans"] if _CN_FONT_NAME else ["DejaVu Sans"],
-            "axes.unicode_minus": False,
-            "axes.labelcolor": "#CCCCCC",
-            "xtick.color": "#AAAAAA",
-            "ytick.color": "#AAAAAA",
-        },
-    )
-
-    # Add moving averages if enough data
-    mav = ()
-    if len(df) >= 20:
-        mav = (5, 10, 20)
-    elif len(df) >= 10:
-        mav = (5, 10)
-    elif len(df) >= 5:
-        mav = (5,)
-
-    fig, axes = mpf.plot(
-        df,
-        type="candle",
-        style=style,
-        title=title,
-        ylabel=y_label or "Price",
-        volume=has_volume,
-        mav=mav,
-        figsize=size,
-        returnfig=True,
-        tight_layout=True,
+    Bars are drawn on integer x positions (no weekend gaps); wicks, bodies and volume are
+    one collection each (no per-bar patches) and moving averages are precomputed with NumPy.
+    """
+    cols = _ohlcv_arrays(series)
+    n = len(cols["close"])
+    x = np.arange(n)
+    o, h, l, c, v = cols["open"], cols["high"], cols["low"], cols["close"], cols["volume"]
+    up = c >= o
+    colors = np.where(up, _UP, _DOWN)
+    has_volume = bool(np.nansum(v) > 0)
+
+    fig = _new_figure(size, facecolor=_BG)
+    if has_volume:
+        grid = fig.add_gridspec(2, 1, height_ratios=(3, 1), hspace=0.05)
+        ax = fig.add_subplot(grid[0])
+        ax_vol = fig.add_subplot(grid[1], sharex=ax)
+    else:
+        ax, ax_vol = fig.add_subplot(111), None
+
+    body_width = 0.6 if n < 250 else 0.8
+    ax.vlines(x, l, h, colors=colors, linewidth=0.8)
+    body_low = np.minimum(o, c)
+    body_height = np.maximum(np.abs(c - o), (np.nanmax(h) - np.nanmin(l)) * 1e-3)
+    ax.add_collection(PolyCollection(
+        _box_vertices(x, body_low, body_low + body_height, body_width),
+        facecolors=colors, edgecolors=colors, linewidths=0.5,
+    ))
+
+    for window in (5, 10, 20, 60):
+        if n >= window * 2 or (window <= 20 and n >= window):
+            ax.plot(x, sma(c, window), linewidth=1.0, color=_MA_COLORS[window], label=f"MA{window}")
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend(loc="upper left", fontsize=8, frameon=False, labelcolor=_TEXT, ncol=4)
+
+    if ax_vol is not None:
+        vol = np.nan_to_num(v)
+        ax_vol.add_collection(PolyCollection(
+            _box_vertices(x, np.zeros(n), vol, body_width), facecolors=colors, alpha=0.55, linewidths=0,
+        ))
+        ax_vol.set_ylim(0, vol.max() * 1.05)
+        ax_vol.yaxis.set_major_formatter(mticker.FuncFormatter(_compact_number))
+        ax_vol.set_ylabel("Volume", color=_TEXT)
+
+    for axis in (ax, ax_vol):
+        if axis is None:
+            continue
+        axis.set_facecolor(_BG)
+        axis.grid(True, linestyle="--", color=_GRID, alpha=0.8)
+        axis.yaxis.tick_right()
+        axis.yaxis.set_label_position("right")
+        axis.tick_params(colors=_TEXT, labelsize=9)
+        for spine in axis.spines.values():
+            spine.set_color(_GRID)
+
+    ticks = np.unique(np.linspace(0, n - 1, min(n, 8)).astype(int)) if n else np.array([], dtype=int)
+    bottom = ax_vol if ax_vol is not None else ax
+    bottom.set_xticks(ticks)
+    bottom.set_xticklabels([str(cols["date"][i])[5 if n <= 250 else 0:] for i in ticks])
+    if ax_vol is not None:
+        ax.tick_params(labelbottom=False)
+    ax.set_xlim(-1, n)
+    ax.set_ylabel(y_label or "Price", color=_TEXT)
+    ax.set_title(
+        title, fontsize=15, fontweight="bold", color="white", pad=12,
+        fontfamily=_CN_FONT_NAME or "sans-serif",
     )
 
-    # Style the title
-    if axes:
-        axes[0].set_title(
-            title, fontsize=15, fontweight="bold", color="white",
-            pad=12,
-            fontfamily=_CN_FONT_NAME or "sans-serif",
-        )
-
     return _finalize(fig)
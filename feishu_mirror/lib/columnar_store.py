@@ -0,0 +1,169 @@
+"""Optional columnar (Parquet/Arrow) mirror of the daily price and on-chain tables.
+
+Layout under the store root, one file per series:
+
+    price/{asset_class}/{SYMBOL}.parquet
+    protocol/{protocol}.parquet
+    chain/{chain}.parquet
+
+Files are kept sorted by date, so a range read is a memory-mapped open plus a
+zero-copy slice. Requires pyarrow + numpy; when either is missing the store is
+simply not opened and everything keeps reading from SQLite.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+_log = logging.getLogger(__name__)
+
+# Column layout per series kind: date column + numeric columns (all float64).
+SCHEMAS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "price": ("trade_date", ("open", "high", "low", "close", "volume", "market_cap")),
+    "protocol": ("metric_date", ("tvl", "revenue", "fees", "active_users", "transactions")),
+    "chain": ("metric_date", ("gas_used", "tps", "active_addresses", "transaction_count", "tvl")),
+}
+
+# Row field that names the series, per kind.
+_KEY_FIELDS = {"price": "symbol", "protocol": "protocol", "chain": "chain"}
+
+
+def _epoch_day(value: str) -> int:
+    return date.fromisoformat(str(value)[:10]).toordinal() - 719163  # 1970-01-01
+
+
+class ColumnarStore:
+    """Partitioned Parquet files with memory-mapped Arrow reads."""
+
+    def __init__(self, root: Path) -> None:
+        import pyarrow  # noqa: F401 — fail fast if the optional dependency is missing
+
+        self.root = Path(root)
+        self._locks: dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, kind: str, key: str, asset_class: str | None = None) -> Path:
+        if kind == "price":
+            return self.root / "price" / (asset_class or "stock") / f"{key.upper()}.parquet"
+        return self.root / kind / f"{key.lower()}.parquet"
+
+    def _lock(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _read_table(self, path: Path):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+
+    def has_series(self, kind: str, key: str, *, asset_class: str | None = None) -> bool:
+        return self._path(kind, key, asset_class).exists()
+
+    # ── Writes ──
+
+    def write_rows(self, kind: str, rows: list[dict[str, Any]]) -> int:
+        """Merge rows into their series files (newer rows win on the same date)."""
+        if not rows:
+            return 0
+        groups: dict[Path, list[dict[str, Any]]] = {}
+        key_field = _KEY_FIELDS[kind]
+        for r in rows:
+            path = self._path(kind, str(r[key_field]), r.get("asset_class"))
+            groups.setdefault(path, []).append(r)
+        for path, group in groups.items():
+            with self._lock(path):
+                self._merge_into(kind, path, group)
+        return len(rows)
+
+    def _merge_into(self, kind: str, path: Path, rows: list[dict[str, Any]]) -> None:
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        date_field, value_fields = SCHEMAS[kind]
+        new_days = np.array([_epoch_day(r[date_field]) for r in rows], dtype="int32")
+        new_cols = {
+            f: np.array([np.nan if r.get(f) is None else float(r[f]) for r in rows], dtype="float64")
+            for f in value_fields
+        }
+
+        if path.exists():
+            old = self._read_table(path)
+            old_days = old.column("date").cast(pa.int32()).to_numpy()
+            keep = ~np.isin(old_days, new_days)
+            days = np.concatenate([old_days[keep], new_days])
+            cols = {
+                f: np.concatenate([old.column(f).to_numpy(zero_copy_only=False)[keep], new_cols[f]])
+                for f in value_fields
+            }
+        else:
+            days, cols = new_days, new_cols
+
+        # Last occurrence wins for duplicate dates inside one batch.
+        _, last_idx = np.unique(days[::-1], return_index=True)
+        order = (len(days) - 1 - last_idx)
+        order = order[np.argsort(days[order], kind="stable")]
+
+        table = pa.table({
+            "date": pa.array(days[order], type=pa.int32()).cast(pa.date32()),
+            **{f: pa.array(cols[f][order], type=pa.float64()) for f in value_fields},
+        })
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    def drop_series(self, kind: str, key: str, *, asset_class: str | None = None) -> None:
+        """Delete a series file, so reads fall back to SQLite and the next write re-seeds it."""
+        path = self._path(kind, key, asset_class)
+        with self._lock(path):
+            path.unlink(missing_ok=True)
+            path.with_suffix(".parquet.tmp").unlink(missing_ok=True)
+
+    # ── Reads ──
+
+    def query_columns(
+        self,
+        kind: str,
+        key: str,
+        *,
+        asset_class: str | None = None,
+        columns: list[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> dict[str, Any] | None:
+        """Return {"date": datetime64[D] array, <column>: float64 array, ...} for a date range.
+
+        None when the series has no file yet. Missing values are NaN.
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        path = self._path(kind, key, asset_class)
+        if not path.exists():
+            return None
+        table = self._read_table(path)
+        days = table.column("date").cast(pa.int32()).to_numpy()
+        lo = int(np.searchsorted(days, _epoch_day(start), "left")) if start else 0
+        hi = int(np.searchsorted(days, _epoch_day(end), "right")) if end else len(days)
+        sliced = table.slice(lo, hi - lo)
+
+        out: dict[str, Any] = {"date": days[lo:hi].astype("datetime64[D]")}
+        for f in columns or SCHEMAS[kind][1]:
+            out[f] = sliced.column(f).to_numpy(zero_copy_only=False)
+        return out
+
+
+def open_columnar_store(settings) -> ColumnarStore | None:
+    """Open the store when enabled in settings and pyarrow is installed."""
+    if not settings.columnar_store_enabled:
+        return None
+    try:
+        return ColumnarStore(settings.columnar_store_root)
+    except ImportError:
+        _log.warning("COLUMNAR_STORE_ENABLED=1 but pyarrow is not installed; columnar store disabled")
+        return None
@@ -25,12 +25,27 @@ class Settings:
     query_api_port: int
     artemis_api_key: str
     sec_edgar_user_agent: str
+    local_incremental_minutes: int
+    feishu_incremental_minutes: int
     market_incremental_minutes: int
+    market_open_incremental_minutes: int
     financials_incremental_minutes: int
+    full_sync_at: str
+    daily_push_at: str
     market_history_days: int
     brave_search_api_key: str
     fred_api_key: str
     fmp_api_key: str
+    columnar_store_enabled: bool
+    columnar_store_root: Path
+    tradingview_pool_size: int
+    tradingview_prewarm: bool
+    chart_cache_root: Path
+    chart_cache_max_mb: int
+    chart_render_workers: int
+    chart_render_timeout_seconds: float
+    upstream_limits: str
+    structurize_concurrency: int
 
 
 def load_settings(env_file: str | None = None) -> Settings:
@@ -69,12 +84,31 @@ def load_settings(env_file: str | None = None) -> Settings:
         query_api_port=int(os.getenv("QUERY_API_PORT", "8788")),
         artemis_api_key=os.getenv("ARTEMIS_API_KEY", ""),
         sec_edgar_user_agent=os.getenv("SEC_EDGAR_USER_AGENT", ""),
+        local_incremental_minutes=int(os.getenv("LOCAL_INCREMENTAL_MINUTES", "10")),
+        feishu_incremental_minutes=int(os.getenv("FEISHU_INCREMENTAL_MINUTES", "15")),
         market_incremental_minutes=int(os.getenv("MARKET_INCREMENTAL_MINUTES", "60")),
+        market_open_incremental_minutes=int(os.getenv("MARKET_OPEN_INCREMENTAL_MINUTES", "15")),
         financials_incremental_minutes=int(os.getenv("FINANCIALS_INCREMENTAL_MINUTES", "720")),
+        full_sync_at=os.getenv("FULL_SYNC_AT", "02:30"),
+        daily_push_at=os.getenv("DAILY_PUSH_AT", "08:00"),
         market_history_days=int(os.getenv("MARKET_HISTORY_DAYS", "365")),
         brave_search_api_key=os.getenv("BRAVE_SEARCH_API_KEY", ""),
         fred_api_key=os.getenv("FRED_API_KEY", ""),
         fmp_api_key=os.getenv("FMP_API_KEY", ""),
+        columnar_store_enabled=os.getenv("COLUMNAR_STORE_ENABLED", "0") == "1",
+        columnar_store_root=Path(
+            os.getenv("COLUMNAR_STORE_ROOT", str(report_index_root / "columnar"))
+        ).expanduser(),
+        tradingview_pool_size=int(os.getenv("TRADINGVIEW_POOL_SIZE", "2")),
+        tradingview_prewarm=os.getenv("TRADINGVIEW_PREWARM", "1") == "1",
+        chart_cache_root=Path(
+            os.getenv("CHART_CACHE_ROOT", str(report_index_root / "chart_cache"))
+        ).expanduser(),
+        chart_cache_max_mb=int(os.getenv("CHART_CACHE_MAX_MB", "256")),
+        chart_render_workers=int(os.getenv("CHART_RENDER_WORKERS", "2")),
+        chart_render_timeout_seconds=float(os.getenv("CHART_RENDER_TIMEOUT_SECONDS", "20")),
+        upstream_limits=os.getenv("UPSTREAM_LIMITS", ""),
+        structurize_concurrency=int(os.getenv("STRUCTURIZE_CONCURRENCY", "8")),
     )
 
 
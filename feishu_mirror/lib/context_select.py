@@ -0,0 +1,155 @@
+"""Relevance-aware context selection for the structurize.py prompts.
+
+A report longer than a layer's character budget used to be cut to its first 70%
+and last 30%, which drops the middle of datapacks and long PDFs — where most
+metric tables live. Here the report's chunks (report_chunk, the same split the
+search index uses) are scored with cheap local signals — numbers, table-like
+lines, periods, tickers and layer keywords — plus the FTS5 bm25 rank of the
+layer's keyword query, and the best chunks are packed into the budget. The
+opening chunk is always kept (title, authors, rating), and the picked spans are
+emitted in document order with a gap marker between them.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any
+
+from .chunking import split_text_to_chunks
+from .db import DB
+
+_log = logging.getLogger(__name__)
+
+GAP = "\n\n[...]\n\n"
+
+_NUMBER = re.compile(r"(?<![A-Za-z])[-+]?\d[\d,]*(?:\.\d+)?\s*(?:%|亿|万|bn|mn|[BMKx]|倍)?")
+_PERIOD = re.compile(r"\b(?:FY)?20\d\d(?:Q[1-4]|H[12]|[EA])?\b|\b[1-4]Q\d\d\b|\bFY\d\d\b")
+_TICKER = re.compile(r"\b[A-Z]{2,5}\b|\b\d{6}\.(?:SH|SZ)\b|\b\d{4,5}\.HK\b")
+
+# Keywords per layer (1 metadata, 2 theses, 3 metrics); 0 = combined extraction.
+LAYER_TERMS: dict[int, tuple[str, ...]] = {
+    1: ("研究报告", "分析师", "证券", "评级", "摘要", "投资要点", "analyst", "rating", "summary", "research"),
+    2: ("投资建议", "目标价", "看好", "买入", "增持", "催化剂", "风险提示", "核心逻辑", "估值",
+        "target price", "upside", "catalyst", "risk", "overweight", "outperform", "thesis", "valuation"),
+    3: ("营业收入", "营收", "净利润", "毛利率", "同比", "环比", "每股收益", "市盈率", "现金流",
+        "revenue", "ebitda", "margin", "eps", "guidance", "yoy", "gross profit", "net income", "free cash flow"),
+}
+LAYER_TERMS[0] = LAYER_TERMS[1] + LAYER_TERMS[2] + LAYER_TERMS[3]
+
+# Signal weights per layer: numbers, table lines, periods, tickers, keywords, FTS rank.
+_WEIGHTS: dict[int, tuple[float, ...]] = {
+    1: (0.1, 0.1, 0.2, 0.5, 1.5, 1.0),
+    2: (0.2, 0.2, 0.3, 0.8, 2.0, 1.5),
+    3: (1.0, 2.0, 0.8, 0.3, 0.8, 1.0),
+    0: (0.6, 1.2, 0.6, 0.5, 1.2, 1.0),
+}
+
+
+def cleaned_text(text: str) -> str:
+    """The text report_chunk offsets index into (see lib.chunking)."""
+    return "\n".join(line.rstrip() for line in text.splitlines())
+
+
+def _table_line(line: str) -> bool:
+    return "|" in line or "\t" in line or len(_NUMBER.findall(line)) >= 3
+
+
+def signals(text: str, layer: int) -> tuple[float, ...]:
+    """Per-1k-char densities of numbers, table lines, periods and tickers, plus keyword hits."""
+    per_k = 1000 / max(1, len(text))
+    lines = [l for l in text.splitlines() if l.strip()]
+    lower = text.lower()
+    return (
+        len(_NUMBER.findall(text)) * per_k / 20,
+        sum(_table_line(l) for l in lines) / max(1, len(lines)),
+        len(_PERIOD.findall(text)) * per_k / 5,
+        len(_TICKER.findall(text)) * per_k / 5,
+        min(1.0, sum(lower.count(t) for t in LAYER_TERMS[layer]) * per_k / 5),
+    )
+
+
+def _fts_query(layer: int) -> str:
+    # The trigram tokenizer cannot match terms shorter than 3 characters.
+    return " OR ".join(f'"{t}"' for t in LAYER_TERMS[layer] if len(t) >= 3)
+
+
+def load_chunks(db: DB, doc_id: str, layers: list[int]) -> list[dict[str, Any]]:
+    """report_chunk rows of a document, each with an "fts" {layer: 0..1} relevance from bm25."""
+    with db.conn() as conn:
+        chunks = conn.execute(
+            "SELECT chunk_id, chunk_index, content, start_offset, end_offset FROM report_chunk "
+            "WHERE doc_id = ? ORDER BY chunk_index",
+            (doc_id,),
+        ).fetchall()
+        by_id = {c["chunk_id"]: c for c in chunks}
+        for c in chunks:
+            c["fts"] = {}
+        for layer in layers:
+            try:
+                hits = conn.execute(
+                    "SELECT chunk_id, bm25(report_chunk_fts) AS rank FROM report_chunk_fts "
+                    "WHERE report_chunk_fts MATCH ? AND doc_id = ?",
+                    (_fts_query(layer), doc_id),
+                ).fetchall()
+            except Exception as exc:  # malformed index: heuristics alone still rank the chunks
+                _log.warning("chunk FTS for %s failed: %s", doc_id, exc)
+                continue
+            best = min((h["rank"] for h in hits), default=0.0)  # bm25 is negative; lower is better
+            for h in hits:
+                if h["chunk_id"] in by_id and best < 0:
+                    by_id[h["chunk_id"]]["fts"][layer] = h["rank"] / best
+    return chunks
+
+
+def score_chunk(chunk: dict[str, Any], layer: int) -> float:
+    w = _WEIGHTS[layer]
+    s = signals(chunk["content"], layer)
+    return sum(wi * si for wi, si in zip(w, s)) + w[5] * chunk.get("fts", {}).get(layer, 0.0)
+
+
+def select_context(
+    full_text: str, max_chars: int, layer: int, chunks: list[dict[str, Any]] | None = None,
+) -> str:
+    """Up to max_chars of full_text: the opening chunk plus the best-scoring chunks, in order.
+
+    chunks are the document's report_chunk rows (load_chunks); when they are
+    missing or were cut from another version of the text, the text is re-split.
+    """
+    if len(full_text) <= max_chars:
+        return full_text
+    text = cleaned_text(full_text)
+    if not chunks or max(c["end_offset"] for c in chunks) > len(text):
+        chunks = split_text_to_chunks(full_text)
+    if not chunks:
+        return full_text[:max_chars]
+
+    ranked = sorted(chunks[1:], key=lambda c: score_chunk(c, layer), reverse=True)
+    spans: list[tuple[int, int]] = []
+
+    def packed(candidate: list[tuple[int, int]]) -> tuple[list[tuple[int, int]], int]:
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(candidate):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged, sum(e - s for s, e in merged) + len(GAP) * (len(merged) - 1)
+
+    for chunk in [chunks[0], *ranked]:
+        merged, size = packed(spans + [(chunk["start_offset"], chunk["end_offset"])])
+        if size <= max_chars:
+            spans = merged
+    if not spans:  # opening chunk alone is over budget
+        return text[:max_chars]
+    return GAP.join(text[s:e].strip() for s, e in spans)
+
+
+def context_coverage(context: str) -> dict[str, int]:
+    """What a context keeps of the signals metrics extraction feeds on (for comparisons)."""
+    lines = [l for l in context.splitlines() if l.strip()]
+    return {
+        "chars": len(context),
+        "numbers": len(_NUMBER.findall(context)),
+        "table_lines": sum(_table_line(l) for l in lines),
+        "periods": len(_PERIOD.findall(context)),
+    }
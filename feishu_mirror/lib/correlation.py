@@ -0,0 +1,140 @@
+"""Cross-asset alignment plus return / correlation / beta matrices (NumPy only).
+
+Stocks trade on exchange days, crypto every day. Closes are aligned on the union of
+dates with each series forward-filled; when the basket holds any stock the calendar
+is then cut down to days on which at least one stock traded, so a weekend crypto move
+lands in Monday's return instead of pairing with a flat stock "return".
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+from .indicators import PERIODS_PER_YEAR
+
+# Fewer aligned returns than this and the matrices are noise.
+MIN_OBSERVATIONS = 5
+
+
+def align_closes(
+    series: list[tuple[np.ndarray, np.ndarray]],
+    *,
+    trading_calendar: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Align (dates, close) pairs into a (T, N) close matrix on a shared calendar.
+
+    trading_calendar: dates to keep (e.g. stock trading days); None keeps the union.
+    Rows before the last series starts are dropped, so the matrix has no NaNs.
+    """
+    clean = []
+    for dates, close in series:
+        ok = np.isfinite(close)
+        clean.append((dates[ok], close[ok]))
+    calendar = np.unique(np.concatenate([d for d, _ in clean])) if clean else np.array([], dtype="datetime64[D]")
+    if trading_calendar is not None:
+        calendar = calendar[np.isin(calendar, trading_calendar)]
+
+    matrix = np.full((len(calendar), len(clean)), np.nan)
+    for j, (dates, close) in enumerate(clean):
+        idx = np.searchsorted(dates, calendar, side="right") - 1
+        has = idx >= 0
+        matrix[has, j] = close[idx[has]]
+
+    complete = np.flatnonzero(np.isfinite(matrix).all(axis=1))
+    if not len(complete):
+        return calendar[:0], matrix[:0]
+    return calendar[complete[0]:], matrix[complete[0]:]
+
+
+def cross_asset_stats(dates: np.ndarray, closes: np.ndarray, *, periods_per_year: int) -> dict[str, Any]:
+    """Simple returns, covariance, correlation and beta from one aligned close matrix.
+
+    beta[i][j] is the beta of symbol i against symbol j (cov(i, j) / var(j)).
+    """
+    returns = closes[1:] / closes[:-1] - 1.0
+    n_obs = len(returns)
+    demeaned = returns - returns.mean(axis=0)
+    cov = demeaned.T @ demeaned / max(n_obs - 1, 1)
+    var = np.diag(cov)
+    std = np.sqrt(var)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+        beta = cov / var[np.newaxis, :]
+    np.fill_diagonal(corr, 1.0)
+    return {
+        "dates": dates,
+        "returns": returns,
+        "corr": corr,
+        "beta": beta,
+        "total_return": closes[-1] / closes[0] - 1.0,
+        "ann_vol": std * math.sqrt(periods_per_year),
+        "observations": n_obs,
+    }
+
+
+def _round(value: float, digits: int = 4) -> float | None:
+    v = float(value)
+    return None if math.isnan(v) or math.isinf(v) else round(v, digits)
+
+
+def _matrix(m: np.ndarray) -> list[list[float | None]]:
+    return [[_round(v) for v in row] for row in m]
+
+
+def correlation_report(
+    labels: list[str],
+    series: list[tuple[np.ndarray, np.ndarray]],
+    asset_classes: list[str],
+) -> dict[str, Any]:
+    """Align, compute and render the JSON body for a basket of symbols."""
+    stock_dates = [d for (d, _), ac in zip(series, asset_classes) if ac == "stock"]
+    calendar = np.unique(np.concatenate(stock_dates)) if stock_dates else None
+    dates, closes = align_closes(series, trading_calendar=calendar)
+    if len(dates) <= MIN_OBSERVATIONS:
+        return {"symbols": labels, "observations": max(len(dates) - 1, 0), "error": "not enough overlapping history"}
+
+    periods = PERIODS_PER_YEAR["stock" if stock_dates else "crypto"]
+    stats = cross_asset_stats(dates, closes, periods_per_year=periods)
+    return {
+        "symbols": labels,
+        "calendar": "stock" if stock_dates else "crypto",
+        "start_date": str(dates[0]),
+        "end_date": str(dates[-1]),
+        "observations": stats["observations"],
+        "stats": {
+            label: {
+                "total_return_pct": _round(stats["total_return"][j] * 100, 2),
+                "ann_vol_pct": _round(stats["ann_vol"][j] * 100, 2),
+            }
+            for j, label in enumerate(labels)
+        },
+        "correlation": _matrix(stats["corr"]),
+        "beta": _matrix(stats["beta"]),
+        "return_dates": [str(d) for d in dates[1:]],
+        "returns": _matrix(stats["returns"]),
+    }
+
+
+# ── Cache keyed by the basket's per-series watermarks ──
+
+_CACHE_MAX = 64
+_cache: OrderedDict[tuple, dict[str, Any]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_report(key: tuple, compute: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+    """LRU lookup; a new bar or moved close in any member series changes the key."""
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = compute()
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return value
@@ -25,6 +25,14 @@ class SearchRow:
     updated_at: str | None
 
 
+# Columns added to schema.sql tables after their first release: (table, column, type).
+ADDED_COLUMNS: list[tuple[str, str, str]] = [
+    ("report_meta_enriched", "content_hash", "TEXT"),
+    ("report_thesis", "content_hash", "TEXT"),
+    ("report_metric", "content_hash", "TEXT"),
+]
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -61,6 +69,11 @@ class DB:
         sql = schema_file.read_text(encoding="utf-8")
         with self.conn() as conn:
             conn.executescript(sql)
+            # CREATE TABLE IF NOT EXISTS leaves older databases without later columns.
+            for table, column, ddl in ADDED_COLUMNS:
+                existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+                if existing and column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
 
     def start_sync_run(self, scope: str, mode: str, reason: str) -> str:
         run_id = _uuid4()
@@ -121,6 +134,95 @@ class DB:
                 (checkpoint_key, cursor, ts, payload, _now_iso()),
             )
 
+    def sync_run_status(self, run_id: str) -> str | None:
+        with self.conn() as conn:
+            row = conn.execute("SELECT status FROM report_sync_run WHERE run_id = ?", (run_id,)).fetchone()
+            return row["status"] if row else None
+
+    def set_sync_progress(self, run_id: str, progress: dict[str, Any]) -> None:
+        """Live progress of a running run, kept in its stats until finish_sync_run replaces them."""
+        with self.conn() as conn:
+            conn.execute(
+                "UPDATE report_sync_run SET stats = json_set(stats, '$.progress', json(?)) WHERE run_id = ?",
+                (json.dumps(progress, ensure_ascii=False), run_id),
+            )
+
+    def sync_items_done(self, walk_id: str, checkpoint_key: str) -> set[str]:
+        with self.conn() as conn:
+            cur = conn.execute(
+                "SELECT item_token FROM report_sync_item WHERE walk_id = ? AND checkpoint_key = ?",
+                (walk_id, checkpoint_key),
+            )
+            return {r["item_token"] for r in cur.fetchall()}
+
+    def mark_sync_item(self, walk_id: str, checkpoint_key: str, item_token: str) -> None:
+        with self.conn() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO report_sync_item(walk_id, checkpoint_key, item_token) VALUES (?, ?, ?)",
+                (walk_id, checkpoint_key, item_token),
+            )
+
+    def clear_sync_items(self, checkpoint_key: str) -> None:
+        with self.conn() as conn:
+            conn.execute("DELETE FROM report_sync_item WHERE checkpoint_key = ?", (checkpoint_key,))
+
+    def get_source_file(self, source_type: str, source_id: str) -> dict[str, Any] | None:
+        with self.conn() as conn:
+            return conn.execute(
+                "SELECT id, file_mtime, content_hash, meta FROM report_source_file WHERE source_type = ? AND source_id = ?",
+                (source_type, source_id),
+            ).fetchone()
+
+    def upsert_bitable_records(self, app_token: str, table_id: str, records: list[dict[str, Any]]) -> None:
+        with self.conn() as conn:
+            conn.executemany(
+                """
+                INSERT INTO feishu_bitable_record(app_token, table_id, record_id, fields, record_text,
+                                                  created_ms, modified_ms, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (app_token, table_id, record_id)
+                DO UPDATE SET fields = excluded.fields,
+                              record_text = excluded.record_text,
+                              created_ms = excluded.created_ms,
+                              modified_ms = excluded.modified_ms,
+                              synced_at = excluded.synced_at
+                """,
+                [
+                    (
+                        app_token, table_id, r["record_id"], json.dumps(r["fields"], ensure_ascii=False),
+                        r["record_text"], r.get("created_ms"), r.get("modified_ms"), _now_iso(),
+                    )
+                    for r in records
+                ],
+            )
+
+    def prune_bitable_records(self, app_token: str, table_id: str, keep: set[str]) -> int:
+        """Delete records no longer in the table; returns how many went."""
+        with self.conn() as conn:
+            ids = [
+                r["record_id"] for r in conn.execute(
+                    "SELECT record_id FROM feishu_bitable_record WHERE app_token = ? AND table_id = ?",
+                    (app_token, table_id),
+                )
+            ]
+            gone = [(app_token, table_id, rid) for rid in ids if rid not in keep]
+            conn.executemany(
+                "DELETE FROM feishu_bitable_record WHERE app_token = ? AND table_id = ? AND record_id = ?", gone,
+            )
+            return len(gone)
+
+    def bitable_record_texts(self, app_token: str, table_id: str) -> list[str]:
+        with self.conn() as conn:
+            cur = conn.execute(
+                """
+                SELECT record_text FROM feishu_bitable_record
+                WHERE app_token = ? AND table_id = ?
+                ORDER BY created_ms, record_id
+                """,
+                (app_token, table_id),
+            )
+            return [r["record_text"] for r in cur.fetchall()]
+
     def upsert_source_file(
         self,
         *,
@@ -2,11 +2,58 @@
 from __future__ import annotations
 
 import json
+import logging
 from datetime import datetime, timezone
 from typing import Any, Callable
 
 from .db import DB
 
+_log = logging.getLogger(__name__)
+
+# Optional columnar mirror (lib.columnar_store.ColumnarStore) for the daily series tables.
+_columnar_store = None
+
+
+def configure_columnar_store(store) -> None:
+    """Enable dual-write of daily price/on-chain rows into a columnar store (None disables)."""
+    global _columnar_store
+    _columnar_store = store
+
+
+_SERIES_SQL = {
+    "price": "SELECT * FROM market_price_daily WHERE symbol = ? AND asset_class = ?",
+    "protocol": "SELECT * FROM onchain_protocol_daily WHERE protocol = ?",
+    "chain": "SELECT * FROM onchain_chain_daily WHERE chain = ?",
+}
+
+
+def _columnar_write(db: DB, kind: str, rows: list[dict[str, Any]]) -> None:
+    """Mirror freshly upserted rows into the columnar store.
+
+    A series seen for the first time is seeded with everything SQLite holds for it,
+    so the columnar copy never serves a partial history. Non-fatal: SQLite stays the
+    source of truth if the columnar write fails, and the affected series files are
+    dropped so reads fall back to SQLite instead of serving a stale copy.
+    """
+    if _columnar_store is None or not rows:
+        return
+    key_field = {"price": "symbol", "protocol": "protocol", "chain": "chain"}[kind]
+    series = {(r[key_field], r.get("asset_class")) for r in rows}
+    try:
+        batch = list(rows)
+        for key, asset_class in series:
+            if not _columnar_store.has_series(kind, key, asset_class=asset_class):
+                params = (key, asset_class) if kind == "price" else (key,)
+                batch = _query_latest(db, _SERIES_SQL[kind], params) + batch
+        _columnar_store.write_rows(kind, batch)
+    except Exception as exc:
+        _log.warning("columnar write failed (%s), dropping %d series: %s", kind, len(series), exc)
+        for key, asset_class in series:
+            try:
+                _columnar_store.drop_series(kind, key, asset_class=asset_class)
+            except OSError as drop_exc:
+                _log.error("could not drop columnar series %s/%s: %s", kind, key, drop_exc)
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
@@ -34,6 +81,20 @@ def _query_latest(db: DB, sql: str, params: tuple) -> list[dict[str, Any]]:
         return conn.execute(sql, params).fetchall()
 
 
+def _as_api_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Strip storage-only columns and decode meta so DB rows match upstream client rows."""
+    out = []
+    for r in rows:
+        r = {k: v for k, v in r.items() if k not in ("id", "created_at")}
+        if isinstance(r.get("meta"), str):
+            try:
+                r["meta"] = json.loads(r["meta"])
+            except ValueError:
+                r["meta"] = {}
+        out.append(r)
+    return out
+
+
 # ── Watchlist ──
 
 
@@ -86,12 +147,14 @@ DO UPDATE SET open = excluded.open, high = excluded.high, low = excluded.low,
 
 
 def upsert_price_daily(db: DB, rows: list[dict[str, Any]]) -> int:
-    return _upsert_batch(db, rows, _PRICE_DAILY_SQL, lambda r, now: (
+    count = _upsert_batch(db, rows, _PRICE_DAILY_SQL, lambda r, now: (
         r["symbol"], r["asset_class"], r["trade_date"],
         r.get("open"), r.get("high"), r.get("low"), r.get("close"),
         r.get("volume"), r.get("market_cap"),
         json.dumps(r.get("meta", {}), ensure_ascii=False), now,
     ))
+    _columnar_write(db, "price", rows)
+    return count
 
 
 def query_price_daily(db: DB, symbol: str, asset_class: str, days: int = 30) -> list[dict[str, Any]]:
@@ -102,6 +165,81 @@ def query_price_daily(db: DB, symbol: str, asset_class: str, days: int = 30) ->
     """, (symbol.upper(), asset_class, days))
 
 
+def query_price_range(db: DB, symbol: str, asset_class: str, start: str) -> list[dict[str, Any]]:
+    """Stored bars with trade_date >= start (YYYY-MM-DD), oldest first, in API row shape."""
+    return _as_api_rows(_query_latest(db, """
+        SELECT * FROM market_price_daily
+        WHERE symbol = ? AND asset_class = ? AND trade_date >= ?
+        ORDER BY trade_date ASC
+    """, (symbol.upper(), asset_class, start)))
+
+
+_PRICE_COLUMNS = ("open", "high", "low", "close", "volume", "market_cap")
+
+
+def query_price_columns(
+    db: DB,
+    symbol: str,
+    asset_class: str,
+    start: str | None = None,
+    columns: tuple[str, ...] = _PRICE_COLUMNS,
+) -> dict[str, Any]:
+    """Price series as NumPy arrays: {"date": datetime64[D], <column>: float64, ...}, oldest first.
+
+    Reads the columnar store (memory-mapped, zero-copy slice) when it is configured and
+    has the series; otherwise falls back to a tuple cursor over market_price_daily.
+    """
+    import numpy as np
+
+    if _columnar_store is not None:
+        try:
+            cols = _columnar_store.query_columns(
+                "price", symbol, asset_class=asset_class, columns=list(columns), start=start,
+            )
+            if cols is not None:
+                return cols
+        except Exception as exc:
+            _log.warning("columnar read failed for %s, falling back to SQLite: %s", symbol, exc)
+
+    sql = f"SELECT trade_date, {', '.join(columns)} FROM market_price_daily WHERE symbol = ? AND asset_class = ?"
+    params: list[Any] = [symbol.upper(), asset_class]
+    if start:
+        sql += " AND trade_date >= ?"
+        params.append(start)
+    sql += " ORDER BY trade_date ASC"
+    with db.conn() as conn:
+        conn.row_factory = None
+        rows = conn.execute(sql, params).fetchall()
+
+    out: dict[str, Any] = {"date": np.array([r[0][:10] for r in rows], dtype="datetime64[D]")}
+    for i, col in enumerate(columns, start=1):
+        out[col] = np.array([np.nan if r[i] is None else r[i] for r in rows], dtype="float64")
+    return out
+
+
+def query_price_watermarks(
+    db: DB, pairs: list[tuple[str, str]], start: str,
+) -> dict[tuple[str, str], tuple[str, int, float]]:
+    """(symbol, asset_class) → (last trade_date, bar count, sum of closes) since start.
+
+    One indexed aggregate for a whole watchlist; any new bar or moved close changes the
+    tuple, so it works as a cache key without loading the series.
+    """
+    if not pairs:
+        return {}
+    placeholders = ", ".join("(?, ?)" for _ in pairs)
+    params: list[Any] = [v for sym, ac in pairs for v in (sym.upper(), ac)]
+    with db.conn() as conn:
+        conn.row_factory = None
+        rows = conn.execute(f"""
+            SELECT symbol, asset_class, MAX(trade_date), COUNT(close), TOTAL(close)
+            FROM market_price_daily
+            WHERE (symbol, asset_class) IN (VALUES {placeholders}) AND trade_date >= ?
+            GROUP BY symbol, asset_class
+        """, params + [start]).fetchall()
+    return {(r[0], r[1]): (r[2], r[3], r[4]) for r in rows}
+
+
 # ── Market Quote Latest ──
 
 
@@ -174,12 +312,14 @@ DO UPDATE SET tvl = excluded.tvl, revenue = excluded.revenue, fees = excluded.fe
 
 
 def upsert_protocol_daily(db: DB, rows: list[dict[str, Any]]) -> int:
-    return _upsert_batch(db, rows, _PROTOCOL_DAILY_SQL, lambda r, now: (
+    count = _upsert_batch(db, rows, _PROTOCOL_DAILY_SQL, lambda r, now: (
         r["protocol"], r["metric_date"],
         r.get("tvl"), r.get("revenue"), r.get("fees"),
         r.get("active_users"), r.get("transactions"),
         json.dumps(r.get("meta", {}), ensure_ascii=False), now,
     ))
+    _columnar_write(db, "protocol", rows)
+    return count
 
 
 def query_protocol_daily(db: DB, protocol: str, days: int = 30) -> list[dict[str, Any]]:
@@ -189,6 +329,13 @@ def query_protocol_daily(db: DB, protocol: str, days: int = 30) -> list[dict[str
     """, (protocol.lower(), days))
 
 
+def query_protocol_range(db: DB, protocol: str, start: str) -> list[dict[str, Any]]:
+    return _as_api_rows(_query_latest(db, """
+        SELECT * FROM onchain_protocol_daily
+        WHERE protocol = ? AND metric_date >= ? ORDER BY metric_date ASC
+    """, (protocol.lower(), start)))
+
+
 # ── On-chain Chain Daily ──
 
 _CHAIN_DAILY_SQL = """
@@ -203,13 +350,15 @@ DO UPDATE SET gas_used = excluded.gas_used, tps = excluded.tps,
 
 
 def upsert_chain_daily(db: DB, rows: list[dict[str, Any]]) -> int:
-    return _upsert_batch(db, rows, _CHAIN_DAILY_SQL, lambda r, now: (
+    count = _upsert_batch(db, rows, _CHAIN_DAILY_SQL, lambda r, now: (
         r["chain"], r["metric_date"],
         r.get("gas_used"), r.get("tps"),
         r.get("active_addresses"), r.get("transaction_count"),
         r.get("tvl"),
         json.dumps(r.get("meta", {}), ensure_ascii=False), now,
     ))
+    _columnar_write(db, "chain", rows)
+    return count
 
 
 def query_chain_daily(db: DB, chain: str, days: int = 30) -> list[dict[str, Any]]:
@@ -219,6 +368,13 @@ def query_chain_daily(db: DB, chain: str, days: int = 30) -> list[dict[str, Any]
     """, (chain.lower(), days))
 
 
+def query_chain_range(db: DB, chain: str, start: str) -> list[dict[str, Any]]:
+    return _as_api_rows(_query_latest(db, """
+        SELECT * FROM onchain_chain_daily
+        WHERE chain = ? AND metric_date >= ? ORDER BY metric_date ASC
+    """, (chain.lower(), start)))
+
+
 # ── On-chain Token Liquidity ──
 
 _TOKEN_LIQUIDITY_SQL = """
@@ -6,123 +6,370 @@ from datetime import datetime, timezone
 from typing import Any
 
 from .db import DB
+from .entities import index_entities, resolve, seed_aliases
+from .metric_series import _pairs, rebuild_series, refresh_pairs
+from .thesis_consensus import _entities, rebuild_consensus, refresh_entities
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
 
-# ── Layer 1: Metadata ──
+# ── Layer state (which document version each layer was built from) ──
 
 
-def upsert_metadata(db: DB, doc_id: str, data: dict[str, Any], model: str) -> None:
-    now = _now_iso()
+def _write_state(
+    conn, doc_id: str, layer: int, content_hash: str | None, status: str, items: int, model: str, now: str,
+) -> None:
+    if content_hash is None:
+        return
+    conn.execute(
+        """
+        INSERT INTO report_layer_state(doc_id, layer, content_hash, status, items, model_used, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(doc_id, layer) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            status = excluded.status,
+            items = excluded.items,
+            model_used = excluded.model_used,
+            updated_at = excluded.updated_at
+        """,
+        (doc_id, layer, content_hash, status, items, model or None, now),
+    )
+
+
+def backfill_layer_state(db: DB) -> int:
+    """Adopt layer rows written before report_layer_state existed as built from the current text."""
+    with db.conn() as conn:
+        before = conn.execute("SELECT count(*) AS n FROM report_layer_state").fetchone()["n"]
+        for layer, table in ((1, "report_meta_enriched"), (2, "report_thesis"), (3, "report_metric")):
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO report_layer_state(doc_id, layer, content_hash, status, items, model_used)
+                SELECT t.doc_id, ?, d.content_hash, 'done', count(*), max(t.model_used)
+                FROM {table} t JOIN report_document d ON d.doc_id = t.doc_id
+                GROUP BY t.doc_id
+                """,
+                (layer,),
+            )
+            conn.execute(f"UPDATE {table} SET content_hash = "
+                         f"(SELECT content_hash FROM report_layer_state s WHERE s.doc_id = {table}.doc_id AND s.layer = ?) "
+                         f"WHERE content_hash IS NULL", (layer,))
+        return conn.execute("SELECT count(*) AS n FROM report_layer_state").fetchone()["n"] - before
+
+
+# ── Entity index (report_entity) ──
+
+
+def rebuild_entities(db: DB) -> int:
+    """Re-derive report_entity from the layer tables (after alias edits); returns rows written."""
+    with db.conn() as conn:
+        seed_aliases(conn)
+        conn.execute("DELETE FROM report_entity")
+        for m in conn.execute("SELECT doc_id, companies, tickers, sectors FROM report_meta_enriched").fetchall():
+            index_entities(conn, m["doc_id"], 1, 0, "company", [*json.loads(m["companies"]), *json.loads(m["tickers"])])
+            index_entities(conn, m["doc_id"], 1, 0, "sector", json.loads(m["sectors"]))
+        for t in conn.execute("SELECT id, doc_id, company, ticker FROM report_thesis").fetchall():
+            index_entities(conn, t["doc_id"], 2, t["id"], "company", [t["company"], t["ticker"]])
+        for r in conn.execute("SELECT id, doc_id, company, ticker, metric FROM report_metric").fetchall():
+            index_entities(conn, r["doc_id"], 3, r["id"], "company", [r["company"], r["ticker"]])
+            index_entities(conn, r["doc_id"], 3, r["id"], "metric", [r["metric"]])
+        n = conn.execute("SELECT count(*) AS n FROM report_entity").fetchone()["n"]
+    # Both aggregates are keyed by the canonical entities just re-derived.
+    rebuild_series(db)
+    rebuild_consensus(db)
+    return n
+
+
+def ensure_entity_index(db: DB) -> None:
+    """Seed the alias dictionary; build report_entity, the aggregates over it
+    (report_metric_series, report_thesis_consensus) and the structured FTS tables
+    once for rows written before they existed."""
+    with db.conn() as conn:
+        seed_aliases(conn)
+        missing = (
+            conn.execute("SELECT 1 FROM report_entity LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM report_meta_enriched LIMIT 1").fetchone() is not None
+        )
+        no_series = (
+            conn.execute("SELECT 1 FROM report_metric_series LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM report_metric WHERE value IS NOT NULL LIMIT 1").fetchone() is not None
+        )
+        no_consensus = (
+            conn.execute("SELECT 1 FROM report_thesis_consensus LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM report_thesis LIMIT 1").fetchone() is not None
+        )
+        no_fts = (
+            conn.execute("SELECT 1 FROM report_thesis_fts LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM report_thesis LIMIT 1").fetchone() is not None
+        ) or (
+            conn.execute("SELECT 1 FROM report_metric_fts LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM report_metric LIMIT 1").fetchone() is not None
+        )
+    if no_fts:
+        rebuild_structured_fts(db)
+    if missing:
+        rebuild_entities(db)
+        return
+    if no_series:
+        rebuild_series(db)
+    if no_consensus:
+        rebuild_consensus(db)
+
+
+def _index_thesis_text(conn, thesis_id: int, text: str, catalysts: Any, risks: Any) -> None:
+    conn.execute(
+        "INSERT INTO report_thesis_fts(rowid, thesis_text, key_catalysts, key_risks) VALUES (?, ?, ?, ?)",
+        (thesis_id, text, "\n".join(map(str, catalysts or [])), "\n".join(map(str, risks or []))),
+    )
+
+
+def rebuild_structured_fts(db: DB) -> int:
+    """Re-derive report_thesis_fts / report_metric_fts from the layer tables; returns rows indexed."""
     with db.conn() as conn:
+        conn.execute("DELETE FROM report_thesis_fts")
+        conn.execute("DELETE FROM report_metric_fts")
+        theses = conn.execute("SELECT id, thesis_text, key_catalysts, key_risks FROM report_thesis").fetchall()
+        for t in theses:
+            _index_thesis_text(conn, t["id"], t["thesis_text"], json.loads(t["key_catalysts"]), json.loads(t["key_risks"]))
         conn.execute(
+            "INSERT INTO report_metric_fts(rowid, metric, context) SELECT id, metric, COALESCE(context, '') FROM report_metric"
+        )
+        metrics = conn.execute("SELECT count(*) AS n FROM report_metric").fetchone()["n"]
+    return len(theses) + metrics
+
+
+def _entity_filter(conn, column: str, kind: str, value: str, layer: int) -> tuple[str, list[Any]]:
+    """`column IN (indexed report_entity lookup)`; column is a doc_id (layer 1) or row id."""
+    target = "doc_id" if layer == 1 else "row_id"
+    return (
+        f"{column} IN (SELECT {target} FROM report_entity WHERE kind = ? AND value_norm = ? AND layer = ?)",
+        [kind, resolve(conn, kind, value), layer],
+    )
+
+
+# ── Layer 1: Metadata ──
+
+
+def _write_metadata(
+    conn, doc_id: str, data: dict[str, Any], model: str, now: str, content_hash: str | None = None,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO report_meta_enriched(
+            doc_id, display_title, companies, tickers, sectors,
+            report_type, language, publish_date, author, source_org,
+            quality_score, summary, model_used, extracted_at, meta, content_hash
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(doc_id) DO UPDATE SET
+            display_title = excluded.display_title,
+            companies = excluded.companies,
+            tickers = excluded.tickers,
+            sectors = excluded.sectors,
+            report_type = excluded.report_type,
+            language = excluded.language,
+            publish_date = excluded.publish_date,
+            author = excluded.author,
+            source_org = excluded.source_org,
+            quality_score = excluded.quality_score,
+            summary = excluded.summary,
+            model_used = excluded.model_used,
+            extracted_at = excluded.extracted_at,
+            meta = excluded.meta,
+            content_hash = excluded.content_hash
+        """,
+        (
+            doc_id,
+            data.get("display_title"),
+            json.dumps(data.get("companies", []), ensure_ascii=False),
+            json.dumps(data.get("tickers", []), ensure_ascii=False),
+            json.dumps(data.get("sectors", []), ensure_ascii=False),
+            data.get("report_type"),
+            data.get("language"),
+            data.get("publish_date"),
+            data.get("author"),
+            data.get("source_org"),
+            data.get("quality_score"),
+            data.get("summary"),
+            model,
+            now,
+            json.dumps({**data.get("meta", {}), "has_theses": data.get("has_theses")}, ensure_ascii=False),
+            content_hash,
+        ),
+    )
+    conn.execute("DELETE FROM report_entity WHERE doc_id = ? AND layer = 1", (doc_id,))
+    index_entities(conn, doc_id, 1, 0, "company", [*data.get("companies", []), *data.get("tickers", [])])
+    index_entities(conn, doc_id, 1, 0, "sector", data.get("sectors", []))
+    # publish_date decides which report is the latest and which month a thesis falls in.
+    refresh_pairs(conn, _pairs(conn, doc_id))
+    refresh_entities(conn, _entities(conn, doc_id))
+    _write_state(conn, doc_id, 1, content_hash, "done", 1, model, now)
+
+
+def upsert_metadata(
+    db: DB, doc_id: str, data: dict[str, Any], model: str, content_hash: str | None = None,
+) -> None:
+    with db.conn() as conn:
+        _write_metadata(conn, doc_id, data, model, _now_iso(), content_hash)
+
+
+# ── Layer 2: Theses ──
+
+
+def _write_theses(
+    conn, doc_id: str, theses: list[dict[str, Any]], model: str, now: str, content_hash: str | None = None,
+    status: str = "done",
+) -> None:
+    stale = _entities(conn, doc_id)
+    conn.execute(
+        "DELETE FROM report_thesis_fts WHERE rowid IN (SELECT id FROM report_thesis WHERE doc_id = ?)", (doc_id,),
+    )
+    conn.execute("DELETE FROM report_thesis WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM report_entity WHERE doc_id = ? AND layer = 2", (doc_id,))
+    for t in theses:
+        cur = conn.execute(
             """
-            INSERT INTO report_meta_enriched(
-                doc_id, display_title, companies, tickers, sectors,
-                report_type, language, publish_date, author, source_org,
-                quality_score, summary, model_used, extracted_at, meta
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(doc_id) DO UPDATE SET
-                display_title = excluded.display_title,
-                companies = excluded.companies,
-                tickers = excluded.tickers,
-                sectors = excluded.sectors,
-                report_type = excluded.report_type,
-                language = excluded.language,
-                publish_date = excluded.publish_date,
-                author = excluded.author,
-                source_org = excluded.source_org,
-                quality_score = excluded.quality_score,
-                summary = excluded.summary,
-                model_used = excluded.model_used,
-                extracted_at = excluded.extracted_at,
-                meta = excluded.meta
+            INSERT INTO report_thesis(
+                doc_id, company, ticker, direction, confidence, time_horizon,
+                thesis_text, key_catalysts, key_risks, model_used, extracted_at, meta, content_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 doc_id,
-                data.get("display_title"),
-                json.dumps(data.get("companies", []), ensure_ascii=False),
-                json.dumps(data.get("tickers", []), ensure_ascii=False),
-                json.dumps(data.get("sectors", []), ensure_ascii=False),
-                data.get("report_type"),
-                data.get("language"),
-                data.get("publish_date"),
-                data.get("author"),
-                data.get("source_org"),
-                data.get("quality_score"),
-                data.get("summary"),
+                t["company"],
+                t.get("ticker"),
+                t["direction"],
+                t["confidence"],
+                t.get("time_horizon"),
+                t["thesis_text"],
+                json.dumps(t.get("key_catalysts", []), ensure_ascii=False),
+                json.dumps(t.get("key_risks", []), ensure_ascii=False),
                 model,
                 now,
-                json.dumps(data.get("meta", {}), ensure_ascii=False),
+                json.dumps(t.get("meta", {}), ensure_ascii=False),
+                content_hash,
             ),
         )
+        _index_thesis_text(conn, cur.lastrowid, t["thesis_text"], t.get("key_catalysts"), t.get("key_risks"))
+        index_entities(conn, doc_id, 2, cur.lastrowid, "company", [t["company"], t.get("ticker")])
+    refresh_entities(conn, stale | _entities(conn, doc_id))
+    _write_state(conn, doc_id, 2, content_hash, status, len(theses), model, now)
 
 
-# ── Layer 2: Theses ──
+def upsert_theses(
+    db: DB, doc_id: str, theses: list[dict[str, Any]], model: str, content_hash: str | None = None,
+) -> None:
+    with db.conn() as conn:
+        _write_theses(conn, doc_id, theses, model, _now_iso(), content_hash)
 
 
-def upsert_theses(db: DB, doc_id: str, theses: list[dict[str, Any]], model: str) -> None:
-    now = _now_iso()
+def skip_theses(db: DB, doc_id: str, content_hash: str) -> None:
+    """Layer 2 for a report whose metadata says it holds no thesis: clear old rows, record the skip."""
     with db.conn() as conn:
-        conn.execute("DELETE FROM report_thesis WHERE doc_id = ?", (doc_id,))
-        for t in theses:
-            conn.execute(
-                """
-                INSERT INTO report_thesis(
-                    doc_id, company, ticker, direction, confidence, time_horizon,
-                    thesis_text, key_catalysts, key_risks, model_used, extracted_at, meta
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    doc_id,
-                    t["company"],
-                    t.get("ticker"),
-                    t["direction"],
-                    t["confidence"],
-                    t.get("time_horizon"),
-                    t["thesis_text"],
-                    json.dumps(t.get("key_catalysts", []), ensure_ascii=False),
-                    json.dumps(t.get("key_risks", []), ensure_ascii=False),
-                    model,
-                    now,
-                    json.dumps(t.get("meta", {}), ensure_ascii=False),
-                ),
-            )
+        _write_theses(conn, doc_id, [], "", _now_iso(), content_hash, status="skipped")
 
 
 # ── Layer 3: Metrics ──
 
 
-def upsert_metrics(db: DB, doc_id: str, metrics: list[dict[str, Any]], model: str) -> None:
+def _write_metrics(
+    conn, doc_id: str, metrics: list[dict[str, Any]], model: str, now: str, content_hash: str | None = None,
+) -> None:
+    stale = _pairs(conn, doc_id)
+    conn.execute(
+        "DELETE FROM report_metric_fts WHERE rowid IN (SELECT id FROM report_metric WHERE doc_id = ?)", (doc_id,),
+    )
+    conn.execute("DELETE FROM report_metric WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM report_entity WHERE doc_id = ? AND layer = 3", (doc_id,))
+    for m in metrics:
+        cur = conn.execute(
+            """
+            INSERT INTO report_metric(
+                doc_id, company, ticker, period, metric, value, unit,
+                yoy_change, context, model_used, extracted_at, meta, content_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                doc_id,
+                m["company"],
+                m.get("ticker"),
+                m["period"],
+                m["metric"],
+                m.get("value"),
+                m.get("unit"),
+                m.get("yoy_change"),
+                m.get("context"),
+                model,
+                now,
+                json.dumps(m.get("meta", {}), ensure_ascii=False),
+                content_hash,
+            ),
+        )
+        conn.execute(
+            "INSERT INTO report_metric_fts(rowid, metric, context) VALUES (?, ?, ?)",
+            (cur.lastrowid, m["metric"], m.get("context") or ""),
+        )
+        index_entities(conn, doc_id, 3, cur.lastrowid, "company", [m["company"], m.get("ticker")])
+        index_entities(conn, doc_id, 3, cur.lastrowid, "metric", [m["metric"]])
+    refresh_pairs(conn, stale | _pairs(conn, doc_id))
+    _write_state(conn, doc_id, 3, content_hash, "done", len(metrics), model, now)
+
+
+def upsert_metrics(
+    db: DB, doc_id: str, metrics: list[dict[str, Any]], model: str, content_hash: str | None = None,
+) -> None:
+    with db.conn() as conn:
+        _write_metrics(conn, doc_id, metrics, model, _now_iso(), content_hash)
+
+
+def upsert_all_layers(
+    db: DB,
+    doc_id: str,
+    metadata: dict[str, Any],
+    theses: list[dict[str, Any]],
+    metrics: list[dict[str, Any]],
+    model: str,
+    content_hash: str | None = None,
+) -> None:
+    """Write layers 1–3 of one document in a single transaction (combined extraction)."""
     now = _now_iso()
     with db.conn() as conn:
-        conn.execute("DELETE FROM report_metric WHERE doc_id = ?", (doc_id,))
-        for m in metrics:
-            conn.execute(
-                """
-                INSERT INTO report_metric(
-                    doc_id, company, ticker, period, metric, value, unit,
-                    yoy_change, context, model_used, extracted_at, meta
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    doc_id,
-                    m["company"],
-                    m.get("ticker"),
-                    m["period"],
-                    m["metric"],
-                    m.get("value"),
-                    m.get("unit"),
-                    m.get("yoy_change"),
-                    m.get("context"),
-                    model,
-                    now,
-                    json.dumps(m.get("meta", {}), ensure_ascii=False),
-                ),
-            )
+        _write_metadata(conn, doc_id, metadata, model, now, content_hash)
+        _write_theses(conn, doc_id, theses, model, now, content_hash)
+        _write_metrics(conn, doc_id, metrics, model, now, content_hash)
+
+
+def upsert_layer_batch(
+    db: DB, layer: int, rows: list[tuple[str, Any, str | None]], model: str,
+) -> dict[str, str]:
+    """Write one layer's results for many documents in one transaction (--batch mode).
+
+    rows are (doc_id, data, content_hash); layer 0 means combined results, whose data
+    holds "metadata", "theses" and "metrics". Each document is written under its own
+    savepoint, so a result that violates a constraint is rolled back alone; returns
+    {doc_id: error} for those.
+    """
+    now = _now_iso()
+    failed: dict[str, str] = {}
+    with db.conn() as conn:
+        # An explicit outer transaction: a bare SAVEPOINT would open (and RELEASE commit) its own.
+        conn.execute("BEGIN")
+        for doc_id, data, content_hash in rows:
+            conn.execute("SAVEPOINT batch_doc")
+            try:
+                if layer == 0:
+                    _write_metadata(conn, doc_id, data["metadata"], model, now, content_hash)
+                    _write_theses(conn, doc_id, data["theses"], model, now, content_hash)
+                    _write_metrics(conn, doc_id, data["metrics"], model, now, content_hash)
+                else:
+                    {1: _write_metadata, 2: _write_theses, 3: _write_metrics}[layer](
+                        conn, doc_id, data, model, now, content_hash,
+                    )
+            except Exception as exc:
+                conn.execute("ROLLBACK TO batch_doc")
+                failed[doc_id] = f"{type(exc).__name__}: {exc}"
+            conn.execute("RELEASE batch_doc")
+    return failed
 
 
 # ── Query functions ──
@@ -137,18 +384,17 @@ def query_enriched_reports(
 ) -> list[dict[str, Any]]:
     where = []
     params: list[Any] = []
-    if company:
-        where.append("m.companies LIKE ?")
-        params.append(f"%{company}%")
-    if sector:
-        where.append("m.sectors LIKE ?")
-        params.append(f"%{sector}%")
-    if report_type:
-        where.append("m.report_type = ?")
-        params.append(report_type)
-    where_clause = (" AND " + " AND ".join(where)) if where else ""
-    params.append(limit)
     with db.conn() as conn:
+        for kind, value in (("company", company), ("sector", sector)):
+            if value:
+                clause, args = _entity_filter(conn, "m.doc_id", kind, value, 1)
+                where.append(clause)
+                params.extend(args)
+        if report_type:
+            where.append("m.report_type = ?")
+            params.append(report_type)
+        where_clause = (" AND " + " AND ".join(where)) if where else ""
+        params.append(limit)
         rows = conn.execute(
             f"""
             SELECT m.*, d.title AS original_title, d.category
@@ -187,15 +433,16 @@ def query_theses(
 ) -> list[dict[str, Any]]:
     where = []
     params: list[Any] = []
-    if company:
-        where.append("t.company LIKE ?")
-        params.append(f"%{company}%")
-    if direction:
-        where.append("t.direction = ?")
-        params.append(direction)
-    where_clause = (" AND " + " AND ".join(where)) if where else ""
-    params.append(limit)
     with db.conn() as conn:
+        if company:
+            clause, args = _entity_filter(conn, "t.id", "company", company, 2)
+            where.append(clause)
+            params.extend(args)
+        if direction:
+            where.append("t.direction = ?")
+            params.append(direction)
+        where_clause = (" AND " + " AND ".join(where)) if where else ""
+        params.append(limit)
         rows = conn.execute(
             f"""
             SELECT t.*, d.title AS report_title, d.category
@@ -219,18 +466,15 @@ def query_metrics(
 ) -> list[dict[str, Any]]:
     where = []
     params: list[Any] = []
-    if company:
-        where.append("r.company LIKE ?")
-        params.append(f"%{company}%")
-    if ticker:
-        where.append("r.ticker = ?")
-        params.append(ticker.upper())
-    if metric:
-        where.append("r.metric LIKE ?")
-        params.append(f"%{metric}%")
-    where_clause = (" AND " + " AND ".join(where)) if where else ""
-    params.append(limit)
     with db.conn() as conn:
+        # A ticker is a company alias too (GOOGL and 谷歌 resolve to one key).
+        for kind, value in (("company", company), ("company", ticker), ("metric", metric)):
+            if value:
+                clause, args = _entity_filter(conn, "r.id", kind, value, 3)
+                where.append(clause)
+                params.extend(args)
+        where_clause = (" AND " + " AND ".join(where)) if where else ""
+        params.append(limit)
         rows = conn.execute(
             f"""
             SELECT r.*, d.title AS report_title, d.category
@@ -245,6 +489,128 @@ def query_metrics(
     return rows
 
 
+# ── Structured search (report_chunk_fts + report_thesis_fts + report_metric_fts) ──
+
+SEARCH_KINDS = ("chunk", "thesis", "metric")
+# field -> (kind, FTS column) for column-restricted queries.
+SEARCH_FIELDS = {
+    "thesis": ("thesis", "thesis_text"),
+    "catalysts": ("thesis", "key_catalysts"),
+    "risks": ("thesis", "key_risks"),
+    "metric": ("metric", "metric"),
+    "context": ("metric", "context"),
+}
+# bm25 is only comparable within one FTS table: each kind's hits are scaled to its best
+# hit (1.0) and weighted, so a strong thesis outranks a marginal chunk and vice versa.
+_KIND_WEIGHT = {"thesis": 1.0, "chunk": 0.9, "metric": 0.8}
+_SNIPPET_TOKENS = 48
+
+
+def fts_terms(query: str) -> str:
+    """The query as quoted FTS5 terms (implicit AND); trigram matching needs 3+ characters."""
+    terms = [t.replace('"', "") for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms if len(t) >= 3)
+
+
+def _scaled(rows: list[dict[str, Any]], kind: str) -> list[dict[str, Any]]:
+    best = min((r["rank"] for r in rows), default=0.0)  # bm25 is negative; lower is better
+    for r in rows:
+        r["score"] = round(_KIND_WEIGHT[kind] * (r.pop("rank") / best if best < 0 else 1.0), 4)
+        r["kind"] = kind
+    return rows
+
+
+def search_structured(
+    db: DB,
+    query: str,
+    *,
+    kinds: tuple[str, ...] = SEARCH_KINDS,
+    field: str | None = None,
+    company: str | None = None,
+    top_k: int = 10,
+) -> list[dict[str, Any]]:
+    """Report chunks, theses and metrics matching query, ranked together.
+
+    field restricts the match to one column of the thesis or metric index (e.g.
+    risks); company restricts theses and metrics to rows about that company and
+    chunks to reports whose metadata names it.
+    """
+    match = fts_terms(query)
+    if not match:
+        return []
+    if field:
+        kind, column = SEARCH_FIELDS[field]
+        kinds, match = (kind,), f"{{{column}}}: ({match})"
+    hits: list[dict[str, Any]] = []
+    with db.conn() as conn:
+        if "chunk" in kinds:
+            where, params = "", []
+            if company:
+                clause, params = _entity_filter(conn, "c.doc_id", "company", company, 1)
+                where = f"AND {clause}"
+            rows = conn.execute(
+                f"""
+                SELECT d.doc_id, d.title, c.chunk_id, c.start_offset, c.end_offset,
+                       snippet(report_chunk_fts, 2, '[', ']', '…', {_SNIPPET_TOKENS}) AS quote,
+                       bm25(report_chunk_fts) AS rank
+                FROM report_chunk_fts fts
+                JOIN report_chunk c ON c.chunk_id = fts.chunk_id
+                JOIN report_document d ON d.doc_id = c.doc_id
+                WHERE report_chunk_fts MATCH ? {where}
+                ORDER BY rank
+                LIMIT ?
+                """,
+                [match, *params, top_k],
+            ).fetchall()
+            hits += _scaled(rows, "chunk")
+        if "thesis" in kinds:
+            where, params = "", []
+            if company:
+                clause, params = _entity_filter(conn, "t.id", "company", company, 2)
+                where = f"AND {clause}"
+            rows = conn.execute(
+                f"""
+                SELECT t.doc_id, d.title, t.id AS thesis_id, t.company, t.ticker, t.direction, t.confidence,
+                       t.thesis_text, t.key_catalysts, t.key_risks,
+                       snippet(report_thesis_fts, -1, '[', ']', '…', {_SNIPPET_TOKENS}) AS quote,
+                       bm25(report_thesis_fts) AS rank
+                FROM report_thesis_fts fts
+                JOIN report_thesis t ON t.id = fts.rowid
+                JOIN report_document d ON d.doc_id = t.doc_id
+                WHERE report_thesis_fts MATCH ? {where}
+                ORDER BY rank
+                LIMIT ?
+                """,
+                [match, *params, top_k],
+            ).fetchall()
+            for r in rows:
+                r["key_catalysts"], r["key_risks"] = json.loads(r["key_catalysts"]), json.loads(r["key_risks"])
+            hits += _scaled(rows, "thesis")
+        if "metric" in kinds:
+            where, params = "", []
+            if company:
+                clause, params = _entity_filter(conn, "r.id", "company", company, 3)
+                where = f"AND {clause}"
+            rows = conn.execute(
+                f"""
+                SELECT r.doc_id, d.title, r.id AS metric_id, r.company, r.ticker, r.period, r.metric,
+                       r.value, r.unit, r.yoy_change,
+                       snippet(report_metric_fts, -1, '[', ']', '…', {_SNIPPET_TOKENS}) AS quote,
+                       bm25(report_metric_fts) AS rank
+                FROM report_metric_fts fts
+                JOIN report_metric r ON r.id = fts.rowid
+                JOIN report_document d ON d.doc_id = r.doc_id
+                WHERE report_metric_fts MATCH ? {where}
+                ORDER BY rank
+                LIMIT ?
+                """,
+                [match, *params, top_k],
+            ).fetchall()
+            hits += _scaled(rows, "metric")
+    hits.sort(key=lambda h: -h["score"])
+    return hits[:top_k]
+
+
 def structurize_stats(db: DB) -> dict[str, Any]:
     with db.conn() as conn:
         total = conn.execute(
@@ -253,6 +619,20 @@ def structurize_stats(db: DB) -> dict[str, Any]:
         l1 = conn.execute("SELECT count(*) AS n FROM report_meta_enriched").fetchone()["n"]
         l2 = conn.execute("SELECT count(DISTINCT doc_id) AS n FROM report_thesis").fetchone()["n"]
         l3 = conn.execute("SELECT count(DISTINCT doc_id) AS n FROM report_metric").fetchone()["n"]
+        stale = {
+            r["layer"]: r["n"]
+            for r in conn.execute(
+                """
+                SELECT s.layer, count(*) AS n
+                FROM report_layer_state s JOIN report_document d ON d.doc_id = s.doc_id
+                WHERE s.content_hash != d.content_hash
+                GROUP BY s.layer
+                """
+            )
+        }
+        skipped = conn.execute(
+            "SELECT count(*) AS n FROM report_layer_state WHERE layer = 2 AND status = 'skipped'"
+        ).fetchone()["n"]
     return {
         "total_eligible": total,
         "layer1_metadata": l1,
@@ -261,4 +641,8 @@ def structurize_stats(db: DB) -> dict[str, Any]:
         "layer1_pct": round(l1 / total * 100, 1) if total else 0,
         "layer2_pct": round(l2 / total * 100, 1) if total else 0,
         "layer3_pct": round(l3 / total * 100, 1) if total else 0,
+        "layer1_stale": stale.get(1, 0),
+        "layer2_stale": stale.get(2, 0),
+        "layer3_stale": stale.get(3, 0),
+        "layer2_skipped_no_thesis": skipped,
     }
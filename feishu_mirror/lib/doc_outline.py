@@ -0,0 +1,197 @@
+"""Per-document outline for /v1/docs/{doc_id} (report_doc_outline).
+
+An outline lists where a report's headings (markdown "#", "一、", "（二）",
+"第三章", "2.1 ..."), slides ("[Slide 3]"), sheets ("[Sheet Q3]") and PDF pages
+start and end, so a caller can read a document's shape and then fetch only the
+spans it needs. Offsets index into the same line-cleaned text as report_chunk
+and search hits (see lib.chunking), so any of them can be passed to the text
+range endpoint as-is.
+
+Outlines are cached on first read, keyed by the document's content_hash.
+"""
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any
+
+from .context_select import cleaned_text
+from .db import DB
+
+MAX_ENTRIES = 300
+MAX_HEADING_CHARS = 60
+PREVIEW_CHARS = 120
+MAX_TEXT_RANGE = 20000  # characters per /v1/docs/{doc_id}/text call
+
+_CN = "一二三四五六七八九十"
+_HEADINGS: list[tuple[re.Pattern[str], int | None]] = [
+    (re.compile(r"^(#{1,6})\s+(.+)$"), None),  # level = number of #
+    (re.compile(rf"^第[{_CN}\d]+[章节部分篇]\s*.*$"), 1),
+    (re.compile(rf"^[{_CN}]+[、.．]\s*\S.*$"), 1),
+    (re.compile(rf"^[（(][{_CN}]+[)）]\s*\S.*$"), 2),
+    (re.compile(r"^\d+(?:\.\d+){0,2}[、.．]?\s+[^\d\s].*$"), None),  # level = depth of the number
+]
+_CONTAINER = re.compile(r"^\[(Slide|Sheet) ([^\]]+)\]$")
+_SENTENCE_END = ("。", "；", ";", "，", ",", "：")
+
+
+def _heading(line: str) -> tuple[int, str] | None:
+    if len(line) > MAX_HEADING_CHARS or line.endswith(_SENTENCE_END):
+        return None
+    for pattern, level in _HEADINGS:
+        m = pattern.match(line)
+        if not m:
+            continue
+        if pattern is _HEADINGS[0][0]:
+            return len(m.group(1)), m.group(2).strip()
+        if level is None:  # "2.1 Revenue" -> 2; a lone number with mostly digits is a table row
+            if sum(ch.isdigit() for ch in line) > len(line) / 2:
+                return None
+            return line.split()[0].rstrip("、.．").count(".") + 1, line
+        return level, line
+    return None
+
+
+def cleaned_offsets(text: str, offsets: list[int]) -> list[int]:
+    """Map offsets into text to offsets into cleaned_text(text) (line-trailing spaces dropped)."""
+    lines = []  # (raw start, raw length incl. terminator, cleaned start, cleaned length)
+    raw = clean = 0
+    for line in text.splitlines(keepends=True):
+        kept = len(line.splitlines()[0].rstrip()) if line.splitlines() else 0
+        lines.append((raw, len(line), clean, kept))
+        raw += len(line)
+        clean += kept + 1
+    out = []
+    for off in offsets:
+        hit = next((l for l in lines if l[0] <= off < l[0] + l[1]), None)
+        out.append(hit[2] + min(off - hit[0], hit[3]) if hit else max(0, clean - 1))
+    return out
+
+
+def build_outline(text: str, meta: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+    """Outline entries (kind, level, title, start_offset, end_offset) in document order."""
+    clean = cleaned_text(text)
+    entries: list[dict[str, Any]] = []
+    pos = 0
+    for line in clean.split("\n"):
+        stripped = line.strip()
+        if stripped:
+            start = pos + line.index(stripped[0])
+            container = _CONTAINER.match(stripped)
+            if container:
+                entries.append({"kind": container.group(1).lower(), "level": 0,
+                                "title": stripped.strip("[]"), "start_offset": start})
+            else:
+                heading = _heading(stripped)
+                if heading:
+                    entries.append({"kind": "heading", "level": heading[0], "title": heading[1],
+                                    "start_offset": start})
+        pos += len(line) + 1
+    page_starts = cleaned_offsets(text, (meta or {}).get("page_offsets") or [])
+    for n, start in enumerate(page_starts, start=1):
+        if n < len(page_starts) and page_starts[n] == start:
+            continue  # empty page
+        entries.append({"kind": "page", "level": 0, "title": f"Page {n}", "start_offset": start})
+    entries.sort(key=lambda e: (e["start_offset"], e["level"]))
+    entries = entries[:MAX_ENTRIES]
+    # An entry runs to the next one of the same kind family at the same or a higher level.
+    for i, e in enumerate(entries):
+        e["end_offset"] = len(clean)
+        for nxt in entries[i + 1:]:
+            same_family = (nxt["kind"] == "heading") == (e["kind"] == "heading")
+            if same_family and nxt["level"] <= e["level"] and nxt["start_offset"] > e["start_offset"]:
+                e["end_offset"] = nxt["start_offset"]
+                break
+    return entries
+
+
+def get_outline(db: DB, doc_id: str) -> dict[str, Any] | None:
+    """{"chars", "outline"} for a document, built and cached when missing or stale."""
+    with db.conn() as conn:
+        row = conn.execute(
+            """
+            SELECT d.content_hash, o.content_hash AS outline_hash, o.chars, o.outline
+            FROM report_document d LEFT JOIN report_doc_outline o ON o.doc_id = d.doc_id
+            WHERE d.doc_id = ?
+            """,
+            (doc_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        if row["outline_hash"] == row["content_hash"]:
+            return {"chars": row["chars"], "outline": json.loads(row["outline"])}
+        doc = conn.execute("SELECT full_text, meta FROM report_document WHERE doc_id = ?", (doc_id,)).fetchone()
+        text = doc["full_text"] or ""
+        outline = build_outline(text, json.loads(doc["meta"] or "{}"))
+        chars = len(cleaned_text(text))
+        conn.execute(
+            """
+            INSERT INTO report_doc_outline(doc_id, content_hash, chars, outline, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(doc_id) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                chars = excluded.chars,
+                outline = excluded.outline,
+                updated_at = excluded.updated_at
+            """,
+            (doc_id, row["content_hash"], chars, json.dumps(outline, ensure_ascii=False),
+             datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")),
+        )
+    return {"chars": chars, "outline": outline}
+
+
+_SUMMARY_FIELDS = ("display_title", "summary", "companies", "tickers", "sectors", "report_type",
+                   "publish_date", "author", "source_org", "quality_score")
+
+
+def doc_overview(db: DB, doc_id: str, *, previews: bool = False) -> dict[str, Any] | None:
+    """Everything about a document but its text: meta, layer-1 summary, outline, chunk count.
+
+    With previews, adds "sections": each chunk's offsets and first PREVIEW_CHARS characters.
+    """
+    outline = get_outline(db, doc_id)
+    if outline is None:
+        return None
+    with db.conn() as conn:
+        meta = conn.execute(
+            """
+            SELECT d.doc_id, d.source_type, d.source_id, d.title, d.category, d.content_hash,
+                   d.updated_time, d.synced_at, d.meta, sf.file_path, sf.file_name, sf.file_ext
+            FROM report_document d
+            LEFT JOIN report_source_file sf ON sf.id = d.source_file_id
+            WHERE d.doc_id = ?
+            """,
+            (doc_id,),
+        ).fetchone()
+        enriched = conn.execute(
+            f"SELECT {', '.join(_SUMMARY_FIELDS)} FROM report_meta_enriched WHERE doc_id = ?", (doc_id,),
+        ).fetchone()
+        sections = conn.execute(
+            f"""
+            SELECT chunk_id, chunk_index, section, start_offset, end_offset
+                   {", substr(content, 1, ?) AS preview" if previews else ""}
+            FROM report_chunk WHERE doc_id = ? ORDER BY chunk_index
+            """,
+            (PREVIEW_CHARS, doc_id) if previews else (doc_id,),
+        ).fetchall()
+    meta["meta"] = json.loads(meta["meta"] or "{}")
+    meta["meta"].pop("page_offsets", None)  # in the outline
+    if enriched:
+        for key in ("companies", "tickers", "sectors"):
+            enriched[key] = json.loads(enriched[key] or "[]")
+    out = {"meta": meta, "summary": enriched, **outline, "n_chunks": len(sections)}
+    if previews:
+        out["sections"] = sections
+    return out
+
+
+def text_range(db: DB, doc_id: str, start: int, end: int) -> dict[str, Any] | None:
+    """cleaned_text(full_text)[start:end] — chunk, search-hit and outline offsets all apply."""
+    with db.conn() as conn:
+        doc = conn.execute("SELECT full_text FROM report_document WHERE doc_id = ?", (doc_id,)).fetchone()
+    if doc is None:
+        return None
+    clean = cleaned_text(doc["full_text"] or "")
+    start, end = min(start, len(clean)), min(end, len(clean))
+    return {"doc_id": doc_id, "start_offset": start, "end_offset": end, "chars": len(clean), "text": clean[start:end]}
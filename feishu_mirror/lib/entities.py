@@ -0,0 +1,115 @@
+"""Entity normalization for the structured report layers (report_entity).
+
+Companies, tickers, sectors and metric names come out of the LLM in free form
+("Google", "谷歌", "Alphabet Inc.", "GOOGL"). normalize() folds width, case and
+corporate suffixes; the alias dictionary (report_entity_alias, seeded from
+SEED_ALIASES and open to manual rows) maps the folded forms to one canonical key.
+Tickers resolve into the company namespace, so a company filter matches reports
+that only name the ticker and vice versa.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Any, Iterable
+
+ENTITY_KINDS = ("company", "sector", "metric")
+
+_LATIN_SUFFIX = re.compile(
+    r"[\s,]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|sa|ag|nv|holdings?|group)\.?$"
+)
+_CJK_SUFFIX = re.compile(r"(股份有限公司|有限责任公司|有限公司|控股|集团|公司)$")
+
+# canonical key -> surface forms (normalized on seeding); the key itself is an alias too.
+SEED_ALIASES: dict[str, dict[str, tuple[str, ...]]] = {
+    "company": {
+        "googl": ("谷歌", "Google", "Alphabet", "GOOG", "谷歌母公司"),
+        "aapl": ("苹果", "Apple", "苹果公司"),
+        "msft": ("微软", "Microsoft"),
+        "amzn": ("亚马逊", "Amazon", "Amazon.com"),
+        "meta": ("Meta Platforms", "Facebook", "脸书", "FB"),
+        "nvda": ("英伟达", "Nvidia", "辉达"),
+        "tsla": ("特斯拉", "Tesla"),
+        "amd": ("超威", "超威半导体", "Advanced Micro Devices"),
+        "intc": ("英特尔", "Intel"),
+        "avgo": ("博通", "Broadcom"),
+        "tsm": ("台积电", "TSMC", "Taiwan Semiconductor Manufacturing", "2330.TW"),
+        "baba": ("阿里巴巴", "阿里", "Alibaba", "9988.HK"),
+        "0700.hk": ("腾讯", "腾讯控股", "Tencent", "TCEHY", "00700.HK"),
+        "pdd": ("拼多多", "PDD Holdings", "Temu"),
+        "3690.hk": ("美团", "Meituan"),
+        "bidu": ("百度", "Baidu", "9888.HK"),
+        "jd": ("京东", "JD.com", "9618.HK"),
+        "1810.hk": ("小米", "小米集团", "Xiaomi"),
+        "1211.hk": ("比亚迪", "BYD", "002594.SZ"),
+        "300750.sz": ("宁德时代", "CATL", "Contemporary Amperex Technology"),
+        "600519.sh": ("贵州茅台", "茅台", "Kweichow Moutai", "Moutai"),
+        "coin": ("Coinbase", "Coinbase Global"),
+        "mstr": ("MicroStrategy", "Strategy"),
+        "btc": ("比特币", "Bitcoin"),
+        "eth": ("以太坊", "Ethereum", "Ether"),
+        "sol": ("Solana",),
+    },
+    "sector": {
+        "semiconductors": ("半导体", "芯片", "semiconductor", "chips"),
+        "ai": ("人工智能", "artificial intelligence", "AI应用", "大模型"),
+        "cloud": ("云计算", "cloud computing", "云"),
+        "ev": ("新能源车", "新能源汽车", "电动车", "electric vehicles"),
+        "crypto": ("加密货币", "加密", "cryptocurrency", "web3", "数字资产"),
+        "internet": ("互联网", "中国互联网"),
+        "consumer": ("消费", "消费品", "consumer goods"),
+        "healthcare": ("医药", "医疗", "生物医药", "biotech", "pharma"),
+        "energy": ("能源", "oil & gas", "石油"),
+    },
+    "metric": {
+        "revenue": ("营收", "营业收入", "收入", "销售额", "sales", "total revenue"),
+        "net_income": ("净利润", "归母净利润", "净利", "net income", "net profit"),
+        "gross_margin": ("毛利率", "gross margin"),
+        "operating_margin": ("营业利润率", "经营利润率", "operating margin"),
+        "eps": ("每股收益", "earnings per share"),
+        "free_cash_flow": ("自由现金流", "fcf", "free cash flow"),
+        "ebitda": ("息税折旧摊销前利润",),
+        "capex": ("资本开支", "资本支出", "capital expenditure"),
+    },
+}
+
+
+def normalize(text: Any) -> str:
+    """Fold width/case/whitespace and strip corporate suffixes ("Alibaba Group Holding Ltd." -> "alibaba")."""
+    t = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", str(text or "")).strip().casefold())
+    prev = None
+    while t and t != prev:
+        prev = t
+        stripped = _CJK_SUFFIX.sub("", _LATIN_SUFFIX.sub("", t)).strip(" ,.")
+        t = stripped or t  # never strip a name down to nothing ("Group", "集团")
+    return t
+
+
+def seed_aliases(conn) -> None:
+    rows = [
+        (kind, normalize(alias), canonical)
+        for kind, entries in SEED_ALIASES.items()
+        for canonical, aliases in entries.items()
+        for alias in (canonical, *aliases)
+    ]
+    conn.executemany(
+        "INSERT OR IGNORE INTO report_entity_alias(kind, alias_norm, canonical, source) VALUES (?, ?, ?, 'seed')",
+        rows,
+    )
+
+
+def resolve(conn, kind: str, text: Any) -> str:
+    """Canonical key of a surface form: its alias target, else the normalized form itself."""
+    norm = normalize(text)
+    row = conn.execute(
+        "SELECT canonical FROM report_entity_alias WHERE kind = ? AND alias_norm = ?", (kind, norm),
+    ).fetchone()
+    return row["canonical"] if row else norm
+
+
+def index_entities(conn, doc_id: str, layer: int, row_id: int, kind: str, values: Iterable[Any]) -> None:
+    keys = {resolve(conn, kind, v) for v in values if v and str(v).strip()}
+    conn.executemany(
+        "INSERT OR IGNORE INTO report_entity(doc_id, layer, row_id, kind, value_norm) VALUES (?, ?, ?, ?, ?)",
+        [(doc_id, layer, row_id, kind, key) for key in keys if key],
+    )
@@ -55,11 +55,19 @@ def read_pdf(path: Path) -> ExtractedDocument:
     for page in reader.pages:
         pages.append((page.extract_text() or "").strip())
     text = "\n\n".join(p for p in pages if p)
+    # Where each page starts in text (an empty page starts where the next one does).
+    page_offsets, pos = [], 0
+    for p in pages:
+        page_offsets.append(min(pos, len(text)))
+        if p:
+            pos += len(p) + 2
     title = path.stem
     metadata = reader.metadata or {}
     if getattr(metadata, "title", None):
         title = str(metadata.title)
-    return ExtractedDocument(text=text, title=title, meta={"parser": "pdf", "pages": len(reader.pages)})
+    return ExtractedDocument(
+        text=text, title=title, meta={"parser": "pdf", "pages": len(reader.pages), "page_offsets": page_offsets},
+    )
 
 
 def read_pptx(path: Path) -> ExtractedDocument:
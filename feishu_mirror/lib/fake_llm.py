@@ -0,0 +1,279 @@
+"""Offline stand-in for anthropic.Anthropic used by structurize.py --fake-llm and tests.
+
+Answers the structurize prompts (and the forced tool call of --combined) with small,
+well-formed JSON after a fixed latency, and can be told to answer a share of calls
+with 529 Overloaded (with an optional Retry-After) to exercise the adaptive limiter.
+Tracks peak concurrency and reports prompt-cache writes/reads for cache_control
+system prefixes. FakeAnthropicServer serves the same answers over HTTP, Message
+Batches included, for the real SDK.
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any
+
+_TICKER = re.compile(r"\b[A-Z]{2,5}\b")
+# A report containing this text gets has_theses=false from the metadata answer.
+NO_THESIS_MARKER = "[no-thesis]"
+
+
+class FakeOverloaded(Exception):
+    """Shaped like anthropic.APIStatusError: status_code and response.headers."""
+
+    def __init__(self, status_code: int = 529, retry_after: float | None = None) -> None:
+        super().__init__(f"Error code: {status_code} - overloaded_error")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@dataclass
+class FakeCall:
+    model: str
+    prompt: str
+    kwargs: dict[str, Any]
+
+
+def _kind(prompt: str) -> str:
+    head = prompt.split("REPORT:", 1)[0]
+    for kind, marker in (("metadata", "extract metadata"), ("theses", "investment theses"),
+                         ("metrics", "financial numbers/metrics")):
+        if marker in head:
+            return kind
+    return ""
+
+
+def _answer(kind: str, prompt: str) -> Any:
+    report = prompt.split("REPORT:", 1)[-1]
+    tickers = [t for t in dict.fromkeys(_TICKER.findall(report)) if t not in ("JSON", "USD", "CNY")][:2] or ["TEST"]
+    if kind == "metadata":
+        return {
+            "display_title": report.strip().splitlines()[0][:60] if report.strip() else "fake report",
+            "companies": tickers, "tickers": tickers, "sectors": ["test"],
+            "report_type": "company_deep_dive", "language": "mixed", "publish_date": None,
+            "author": None, "source_org": None, "quality_score": 3, "summary": "fake summary",
+            "has_theses": NO_THESIS_MARKER not in report,
+        }
+    if kind == "theses":
+        if NO_THESIS_MARKER in report:
+            return []
+        return [{
+            "company": t, "ticker": t, "direction": "bullish", "confidence": "medium",
+            "time_horizon": "medium", "thesis_text": f"{t} fake thesis",
+            "key_catalysts": ["catalyst"], "key_risks": ["risk"],
+        } for t in tickers]
+    if kind == "metrics":
+        return [{
+            "company": t, "ticker": t, "period": "2025", "metric": "revenue", "value": 100.0,
+            "unit": "USD_M", "yoy_change": 0.1, "context": "fake",
+        } for t in tickers]
+    return []
+
+
+class _Messages:
+    def __init__(self, owner: "FakeAnthropic") -> None:
+        self._owner = owner
+
+    def create(self, *, model: str, max_tokens: int, messages: list[dict[str, Any]], **kwargs: Any) -> Any:
+        return self._owner._create(model, messages, kwargs)
+
+
+def _text(content: Any) -> str:
+    return content if isinstance(content, str) else "".join(b.get("text", "") for b in content or [])
+
+
+class FakeAnthropic:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.05,
+        overload_rate: float = 0.0,
+        retry_after: float | None = None,
+        seed: int = 0,
+        cache_min_tokens: int = 1024,
+    ) -> None:
+        self.latency = latency
+        self.overload_rate = overload_rate
+        self.retry_after = retry_after
+        self.cache_min_tokens = cache_min_tokens  # shorter cache_control prefixes are not cached
+        self.calls: list[FakeCall] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._cached: set[str] = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.messages = _Messages(self)
+
+    def _prefix_usage(self, kwargs: dict[str, Any]) -> dict[str, int]:
+        """Prompt-cache accounting for the tools + system prefix, like the API reports it."""
+        system = kwargs.get("system")
+        prefix = json.dumps(kwargs.get("tools") or [], ensure_ascii=False) + _text(system)
+        tokens = len(prefix) // 4
+        marked = isinstance(system, list) and any(b.get("cache_control") for b in system)
+        if not marked or tokens < self.cache_min_tokens:
+            return {"input_tokens": tokens, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        with self._lock:
+            hit = prefix in self._cached
+            self._cached.add(prefix)
+        return {"input_tokens": 0, "cache_creation_input_tokens": 0 if hit else tokens,
+                "cache_read_input_tokens": tokens if hit else 0}
+
+    def _create(self, model: str, messages: list[dict[str, Any]], kwargs: dict[str, Any]) -> Any:
+        prompt = _text(messages[-1]["content"])
+        instructions = _text(kwargs.get("system"))
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.calls.append(FakeCall(model, prompt, kwargs))
+            overloaded = self._rng.random() < self.overload_rate
+        try:
+            time.sleep(self.latency)
+            if overloaded:
+                raise FakeOverloaded(529, self.retry_after)
+            tools = kwargs.get("tools")
+            if tools:  # forced tool call: the combined extraction
+                data = {kind: _answer(kind, prompt) for kind in ("metadata", "theses", "metrics")}
+                text = json.dumps(data, ensure_ascii=False)
+                block = SimpleNamespace(type="tool_use", id="toolu_fake", name=tools[0]["name"], input=data)
+            else:
+                full = f"{instructions}\n\n{prompt}" if instructions else prompt
+                text = json.dumps(_answer(_kind(full), full), ensure_ascii=False)
+                block = SimpleNamespace(type="text", text=text)
+            usage = self._prefix_usage(kwargs)
+            usage["input_tokens"] += len(prompt) // 4
+            return SimpleNamespace(
+                model=model,
+                content=[block],
+                stop_reason="tool_use" if tools else "end_turn",
+                usage=SimpleNamespace(output_tokens=len(text) // 4, **usage),
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _message_json(resp: Any, msg_id: str) -> dict[str, Any]:
+    return {
+        "id": msg_id, "type": "message", "role": "assistant", "model": resp.model,
+        "content": [vars(b) for b in resp.content], "stop_reason": resp.stop_reason,
+        "stop_sequence": None, "usage": vars(resp.usage),
+    }
+
+
+def _iso(ts: float | None) -> str | None:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts is not None else None
+
+
+class FakeAnthropicServer:
+    """Local HTTP stand-in for POST /v1/messages and the Message Batches endpoints.
+
+    Lets the real anthropic SDK (base_url=server.url) run the --batch path
+    offline. Answers come from a FakeAnthropic; a batch ends batch_seconds after
+    it was created, and its requests are answered on the first poll after that.
+    """
+
+    def __init__(self, *, batch_seconds: float = 0.5, **fake_kwargs: Any) -> None:
+        fake_kwargs.setdefault("latency", 0.0)
+        self.fake = FakeAnthropic(**fake_kwargs)
+        self.batch_seconds = batch_seconds
+        self.batches: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self.url = ""
+
+    def _answer(self, params: dict[str, Any], msg_id: str) -> dict[str, Any]:
+        params = dict(params)
+        model, messages = params.pop("model"), params.pop("messages")
+        params.pop("max_tokens", None)
+        return _message_json(self.fake._create(model, messages, params), msg_id)
+
+    def _batch_json(self, batch_id: str) -> dict[str, Any]:
+        with self._lock:
+            batch = self.batches[batch_id]
+            if batch["results"] is None and time.time() - batch["created"] >= self.batch_seconds:
+                results = []
+                for n, req in enumerate(batch["requests"]):
+                    try:
+                        result = {"type": "succeeded", "message": self._answer(req["params"], f"msg_{batch_id}_{n}")}
+                    except FakeOverloaded as exc:
+                        result = {"type": "errored", "error": {"type": "error", "error": {
+                            "type": "overloaded_error", "message": str(exc)}}}
+                    results.append({"custom_id": req["custom_id"], "result": result})
+                batch["results"], batch["ended"] = results, time.time()
+            done = batch["results"] is not None
+            counts = {"processing": 0 if done else len(batch["requests"]), "succeeded": 0, "errored": 0,
+                      "canceled": 0, "expired": 0}
+            for r in batch["results"] or []:
+                counts[r["result"]["type"]] += 1
+            return {
+                "id": batch_id, "type": "message_batch", "processing_status": "ended" if done else "in_progress",
+                "request_counts": counts, "created_at": _iso(batch["created"]),
+                "expires_at": _iso(batch["created"] + 86400), "ended_at": _iso(batch.get("ended")),
+                "archived_at": None, "cancel_initiated_at": None,
+                "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if done else None,
+            }
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                path = self.path.split("?", 1)[0]
+                if path == "/v1/messages":
+                    try:
+                        self._send(200, json.dumps(server._answer(body, "msg_fake"), ensure_ascii=False))
+                    except FakeOverloaded as exc:
+                        self._send(529, json.dumps({"type": "error", "error": {
+                            "type": "overloaded_error", "message": str(exc)}}))
+                elif path == "/v1/messages/batches":
+                    batch_id = f"msgbatch_fake{len(server.batches):04d}"
+                    with server._lock:
+                        server.batches[batch_id] = {"requests": body["requests"], "created": time.time(),
+                                                    "results": None}
+                    self._send(200, json.dumps(server._batch_json(batch_id)))
+                else:
+                    self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error"}}))
+
+            def do_GET(self) -> None:
+                parts = self.path.split("?", 1)[0].strip("/").split("/")
+                if len(parts) >= 4 and parts[:3] == ["v1", "messages", "batches"] and parts[3] in server.batches:
+                    batch = server._batch_json(parts[3])
+                    if parts[4:] == ["results"]:
+                        lines = [json.dumps(r, ensure_ascii=False) for r in server.batches[parts[3]]["results"] or []]
+                        self._send(200, "\n".join(lines) + "\n", "application/binary")
+                    else:
+                        self._send(200, json.dumps(batch))
+                else:
+                    self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error"}}))
+
+        return Handler
+
+    def __enter__(self) -> "FakeAnthropicServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, name="fake-anthropic", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import time
 from dataclasses import dataclass
@@ -23,6 +25,31 @@ class FeishuApiError(RuntimeError):
     pass
 
 
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+BITABLE_PAGE_SIZE = 500  # records/list maximum
+
+
+def image_card(image_key: str, title: str = "") -> dict:
+    """Interactive card (schema 2.0) holding one image, with an optional header."""
+    card: dict[str, Any] = {
+        "schema": "2.0",
+        "body": {
+            "elements": [
+                {
+                    "tag": "img",
+                    "img_key": image_key,
+                    "alt": {"tag": "plain_text", "content": title or "chart"},
+                }
+            ]
+        },
+    }
+    if title:
+        card["header"] = {
+            "title": {"tag": "plain_text", "content": title},
+        }
+    return card
+
+
 class FeishuClient:
     def __init__(
         self,
@@ -63,7 +90,7 @@ class FeishuClient:
         for attempt in range(self.retry_max):
             resp = requests.request(method, f"{BASE_URL}{path}", headers=headers, timeout=timeout, **kwargs)
 
-            if resp.status_code in (429, 500, 502, 503, 504):
+            if resp.status_code in _RETRY_STATUS:
                 if attempt + 1 >= self.retry_max:
                     break
                 time.sleep((self.retry_backoff_ms * (2**attempt)) / 1000.0)
@@ -131,23 +158,7 @@ class FeishuClient:
         receive_id_type: str = "open_id",
     ) -> dict:
         """Send image embedded in an interactive card (works around msg_type=image display issues)."""
-        card = {
-            "schema": "2.0",
-            "body": {
-                "elements": [
-                    {
-                        "tag": "img",
-                        "img_key": image_key,
-                        "alt": {"tag": "plain_text", "content": title or "chart"},
-                    }
-                ]
-            },
-        }
-        if title:
-            card["header"] = {
-                "title": {"tag": "plain_text", "content": title},
-            }
-        return self.send_card_message(receive_id, card, receive_id_type=receive_id_type)
+        return self.send_card_message(receive_id, image_card(image_key, title), receive_id_type=receive_id_type)
 
     def send_card_message(
         self,
@@ -212,3 +223,118 @@ class FeishuClient:
         if page_token:
             params["page_token"] = page_token
         return self.request("GET", "/open-apis/drive/v1/files", params=params)
+
+    def batch_query_metas(self, docs: list[tuple[str, str]]) -> list[dict[str, Any]]:
+        """Title / modify time for up to 200 (token, doc_type) pairs, e.g. ("boxcn…", "file")."""
+        data = self.request(
+            "POST",
+            "/open-apis/drive/v1/metas/batch_query",
+            data={"request_docs": [{"doc_token": t, "doc_type": k} for t, k in docs]},
+        )
+        return data.get("metas") or []
+
+    def download_file(self, file_token: str) -> bytes:
+        """Raw bytes of a drive file (pdf / docx / xlsx …)."""
+        for attempt in range(self.retry_max):
+            resp = requests.get(
+                f"{BASE_URL}/open-apis/drive/v1/files/{file_token}/download",
+                headers={"Authorization": f"Bearer {self._get_token()}"},
+                timeout=120,
+            )
+            if resp.status_code in _RETRY_STATUS and attempt + 1 < self.retry_max:
+                time.sleep((self.retry_backoff_ms * (2**attempt)) / 1000.0)
+                continue
+            resp.raise_for_status()
+            return resp.content
+        raise FeishuApiError(f"download failed after retries: {file_token}")
+
+    def list_bitable_tables(self, app_token: str, page_token: str | None = None) -> dict[str, Any]:
+        params: dict[str, Any] = {"page_size": 100}
+        if page_token:
+            params["page_token"] = page_token
+        return self.request("GET", f"/open-apis/bitable/v1/apps/{app_token}/tables", params=params)
+
+    def list_bitable_records(self, app_token: str, table_id: str, page_token: str | None = None) -> dict[str, Any]:
+        """One page of records at the API maximum of 500, with created/last-modified times."""
+        params: dict[str, Any] = {"page_size": BITABLE_PAGE_SIZE, "automatic_fields": "true"}
+        if page_token:
+            params["page_token"] = page_token
+        return self.request("GET", f"/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records", params=params)
+
+
+class AsyncFeishuClient:
+    """The image-message subset of FeishuClient over the async upstream layer (lib.upstream).
+
+    Used by the query API's chart endpoints; sync jobs keep using FeishuClient.
+    """
+
+    def __init__(self, auth: FeishuAuth, upstreams, *, retry_max: int = 5, retry_backoff_ms: int = 800) -> None:
+        self.auth = auth
+        self.upstreams = upstreams
+        self.retry_max = retry_max
+        self.retry_backoff_ms = retry_backoff_ms
+        self._tenant_token: str | None = None
+        self._tenant_token_expiry: float = 0.0
+
+    async def _get_token(self) -> str:
+        now = time.time()
+        if self._tenant_token and now < self._tenant_token_expiry - 300:
+            return self._tenant_token
+
+        resp = await self.upstreams.request(
+            "feishu", "POST", f"{BASE_URL}/open-apis/auth/v3/tenant_access_token/internal",
+            json={"app_id": self.auth.app_id, "app_secret": self.auth.app_secret},
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+        if payload.get("code") != 0:
+            raise FeishuApiError(f"token error: {payload.get('msg')}")
+
+        self._tenant_token = payload["tenant_access_token"]
+        self._tenant_token_expiry = now + int(payload.get("expire", 7200))
+        return self._tenant_token
+
+    async def _do_request(self, method: str, path: str, **kwargs) -> dict:
+        headers = {"Authorization": f"Bearer {await self._get_token()}"}
+        for attempt in range(self.retry_max):
+            resp = await self.upstreams.request("feishu", method, f"{BASE_URL}{path}", headers=headers, **kwargs)
+
+            if resp.status_code in _RETRY_STATUS:
+                if attempt + 1 >= self.retry_max:
+                    break
+                await asyncio.sleep((self.retry_backoff_ms * (2**attempt)) / 1000.0)
+                continue
+
+            resp.raise_for_status()
+            try:
+                payload = resp.json()
+            except ValueError:
+                raise FeishuApiError(f"{path}: response is not JSON (status={resp.status_code}, body={resp.text[:200]})")
+            if payload.get("code") != 0:
+                raise FeishuApiError(f"{path}: {payload.get('msg')} ({payload.get('code')})")
+            return payload.get("data", {})
+
+        raise FeishuApiError(f"request failed after retries: {path}")
+
+    async def upload_image(self, image_bytes: bytes, image_type: str = "message") -> str:
+        """Upload image to Feishu, return image_key."""
+        data = await self._do_request(
+            "POST",
+            "/open-apis/im/v1/images",
+            files={"image": ("chart.png", image_bytes, "image/png")},
+            data={"image_type": image_type},
+        )
+        return data["image_key"]
+
+    async def send_card_message(self, receive_id: str, card: dict, receive_id_type: str = "open_id") -> dict:
+        return await self._do_request(
+            "POST",
+            "/open-apis/im/v1/messages",
+            params={"receive_id_type": receive_id_type},
+            json={"receive_id": receive_id, "msg_type": "interactive", "content": json.dumps(card)},
+        )
+
+    async def send_image_as_card(
+        self, receive_id: str, image_key: str, title: str = "", receive_id_type: str = "open_id",
+    ) -> dict:
+        return await self.send_card_message(receive_id, image_card(image_key, title), receive_id_type=receive_id_type)
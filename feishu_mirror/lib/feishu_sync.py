@@ -5,11 +5,13 @@ import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from .chunking import split_text_to_chunks
 from .db import DB
+from .extractors import SUPPORTED_EXTENSIONS, extractor_for, sha256_text
 from .feishu_api import FeishuAuth, FeishuClient
+from .sync_queue import check_lease
 
 
 @dataclass
@@ -20,6 +22,14 @@ class FeishuSyncStats:
     docs_skipped_unchanged: int = 0
     chunks_written: int = 0
     failures: int = 0
+    pages_fetched: int = 0
+    docs_resumed: int = 0
+    walks_resumed: int = 0
+    files_ingested: int = 0
+    files_unsupported: int = 0
+    bitable_tables: int = 0
+    bitable_records_upserted: int = 0
+    bitable_records_deleted: int = 0
 
     def asdict(self) -> dict[str, Any]:
         return {
@@ -29,6 +39,14 @@ class FeishuSyncStats:
             "docs_skipped_unchanged": self.docs_skipped_unchanged,
             "chunks_written": self.chunks_written,
             "failures": self.failures,
+            "pages_fetched": self.pages_fetched,
+            "docs_resumed": self.docs_resumed,
+            "walks_resumed": self.walks_resumed,
+            "files_ingested": self.files_ingested,
+            "files_unsupported": self.files_unsupported,
+            "bitable_tables": self.bitable_tables,
+            "bitable_records_upserted": self.bitable_records_upserted,
+            "bitable_records_deleted": self.bitable_records_deleted,
         }
 
 
@@ -45,6 +63,15 @@ def _from_ms(ms: int | str | None) -> datetime | None:
         return None
 
 
+def _from_epoch(value: int | str | None) -> datetime | None:
+    """Drive APIs report seconds, Bitable milliseconds; tell them apart by magnitude."""
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return None
+    return _from_ms(n if n > 10**11 else n * 1000)
+
+
 def _text_hash(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
 
@@ -141,103 +168,504 @@ def _ingest_doc_token(
     stats.chunks_written += len(chunks)
 
 
-def _sync_space(
+def _ingest_drive_file(
     *,
     db: DB,
     client: FeishuClient,
     raw_root: Path,
-    space_id: str,
+    file_token: str,
+    name: str | None,
+    modified: int | str | None,
+    category: str,
+    entry_type: str,
+    entry_token: str,
+    incremental: bool,
+    run_id: str,
+    stats: FeishuSyncStats,
+) -> None:
+    """Download a drive file and run it through the same extractors as local files."""
+    stats.docs_seen += 1
+    if name is None or modified is None:
+        meta = next(iter(client.batch_query_metas([(file_token, "file")])), {})
+        name = name or meta.get("title") or file_token
+        modified = modified or meta.get("latest_modify_time")
+    suffix = Path(name).suffix.lower()
+    source_id = f"feishu:file:{file_token}"
+    file_mtime = _from_epoch(modified)
+    source_meta = {"run_id": run_id, "entry_type": entry_type, "entry_token": entry_token}
+
+    if suffix not in SUPPORTED_EXTENSIONS or extractor_for(Path(name)) is None:
+        stats.files_unsupported += 1
+        db.upsert_source_file(
+            source_type="unsupported",
+            source_id=source_id,
+            file_path=f"feishu://file/{file_token}",
+            file_name=name,
+            file_ext=suffix,
+            category=category,
+            file_size=None,
+            file_mtime=file_mtime,
+            content_hash=None,
+            is_supported=False,
+            unsupported_reason="extension_not_supported",
+            meta=source_meta,
+        )
+        return
+
+    # The download is the expensive part: skip it when the drive modify time is unchanged.
+    existing = db.get_source_file("feishu", source_id)
+    if incremental and existing and file_mtime and existing["file_mtime"] == file_mtime.isoformat():
+        stats.docs_skipped_unchanged += 1
+        return
+
+    path = raw_root / "feishu_file" / f"{file_token}{suffix}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(client.download_file(file_token))
+    extracted = extractor_for(path)(path)
+    content_hash = sha256_text(extracted.text)
+    source_file_id = db.upsert_source_file(
+        source_type="feishu",
+        source_id=source_id,
+        file_path=str(path),
+        file_name=name,
+        file_ext=suffix,
+        category=category,
+        file_size=path.stat().st_size,
+        file_mtime=file_mtime,
+        content_hash=content_hash,
+        is_supported=True,
+        unsupported_reason=None,
+        meta={**source_meta, **extracted.meta},
+    )
+    if incremental and db.get_document_hash("feishu", source_id) == content_hash:
+        stats.docs_skipped_unchanged += 1
+        return
+
+    doc_id = db.upsert_document(
+        source_type="feishu",
+        source_id=source_id,
+        title=extracted.title if extracted.title != path.stem else Path(name).stem,
+        category=category,
+        source_file_id=source_file_id,
+        full_text=extracted.text,
+        content_hash=content_hash,
+        updated_time=file_mtime,
+        meta={**source_meta, "file_token": file_token, **extracted.meta},
+    )
+    chunks = split_text_to_chunks(extracted.text)
+    db.replace_chunks(doc_id=doc_id, chunks=chunks, updated_time=file_mtime)
+    stats.files_ingested += 1
+    stats.chunks_written += len(chunks)
+
+
+def _cell_text(value: Any) -> str:
+    """A Bitable cell as plain text: rich-text segments, options, users, links, lookups."""
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return str(value)
+    if isinstance(value, dict):
+        if "value" in value:  # formula / lookup wrapper
+            return _cell_text(value["value"])
+        for key in ("text", "name", "full_name", "link", "title"):
+            if value.get(key):
+                return str(value[key])
+        return ""
+    if isinstance(value, list):
+        if all(isinstance(v, dict) and v.get("type") in ("text", "mention", "url") for v in value):
+            return "".join(str(v.get("text", "")) for v in value)  # one rich-text cell
+        return ", ".join(filter(None, (_cell_text(v) for v in value)))
+    return str(value)
+
+
+def _bitable_row(record: dict[str, Any]) -> dict[str, Any]:
+    fields = record.get("fields") or {}
+    cells = [(k, _cell_text(v)) for k, v in fields.items()]
+    return {
+        "record_id": record["record_id"],
+        "fields": fields,
+        "record_text": "; ".join(f"{k}: {v}" for k, v in cells if v),
+        "created_ms": record.get("created_time"),
+        "modified_ms": record.get("last_modified_time") or record.get("created_time"),
+    }
+
+
+def _sync_bitable_table(
+    *,
+    db: DB,
+    client: FeishuClient,
+    raw_root: Path,
+    app_token: str,
+    app_title: str,
+    table_id: str,
+    table_name: str,
     category: str,
+    entry_type: str,
+    entry_token: str,
     incremental: bool,
     run_id: str,
     stats: FeishuSyncStats,
 ) -> None:
+    """Page every record (500 per call) and upsert those modified after the table's watermark.
+
+    records/list has no server-side filter on modify time for arbitrary tables, so the
+    walk still pages the whole table; the watermark saves the writes and the re-index
+    of unchanged tables. The full id set also prunes deleted records.
+    """
+    key = f"feishu:bitable:{app_token}:{table_id}"
+    cp = db.get_checkpoint(key)
+    watermark_ms = json.loads(cp.get("meta") or "{}").get("watermark_ms", 0) if cp and incremental else 0
+    newest_ms = watermark_ms
+    seen: set[str] = set()
+    upserted = 0
     page_token: str | None = None
     while True:
-        data = client.list_space_nodes(space_id, page_token=page_token)
+        data = client.list_bitable_records(app_token, table_id, page_token=page_token)
         items = data.get("items") or []
-        for node in items:
-            if node.get("obj_type") != "docx":
+        _append_jsonl(raw_root, "feishu_bitable", {
+            "run_id": run_id,
+            "fetched_at": _now_utc().isoformat(),
+            "app_token": app_token,
+            "table_id": table_id,
+            "page_token": page_token,
+            "items": items,
+        })
+        changed = []
+        for record in items:
+            if not record.get("record_id"):
                 continue
-            doc_token = node.get("obj_token")
-            if not doc_token:
+            seen.add(record["record_id"])
+            row = _bitable_row(record)
+            modified = int(row["modified_ms"] or 0)
+            newest_ms = max(newest_ms, modified)
+            if incremental and modified and modified <= watermark_ms:
                 continue
-            try:
-                _ingest_doc_token(
-                    db=db,
-                    client=client,
-                    raw_root=raw_root,
-                    doc_token=doc_token,
-                    category=category,
-                    entry_type="space",
-                    entry_token=space_id,
-                    incremental=incremental,
-                    run_id=run_id,
-                    stats=stats,
-                )
-            except Exception:
-                stats.failures += 1
-
-        page_token = data.get("page_token")
-        has_more = bool(data.get("has_more"))
-        if not has_more:
+            changed.append(row)
+        if changed:
+            db.upsert_bitable_records(app_token, table_id, changed)
+            upserted += len(changed)
+        if not data.get("has_more"):
             break
+        page_token = data.get("page_token")
+
+    deleted = db.prune_bitable_records(app_token, table_id, seen)
+    stats.bitable_tables += 1
+    stats.bitable_records_upserted += upserted
+    stats.bitable_records_deleted += deleted
+
+    source_id = f"feishu:bitable:{app_token}:{table_id}"
+    if upserted or deleted or db.get_document_hash("feishu", source_id) is None:
+        title = f"{app_title} / {table_name}"
+        text = f"# {title}\n\n" + "\n".join(db.bitable_record_texts(app_token, table_id))
+        updated_time = _from_ms(newest_ms) or _now_utc()
+        doc_id = db.upsert_document(
+            source_type="feishu",
+            source_id=source_id,
+            title=title,
+            category=category,
+            source_file_id=None,
+            full_text=text,
+            content_hash=_text_hash(text),
+            updated_time=updated_time,
+            meta={
+                "run_id": run_id,
+                "entry_type": entry_type,
+                "entry_token": entry_token,
+                "app_token": app_token,
+                "table_id": table_id,
+                "records": len(seen),
+            },
+        )
+        chunks = split_text_to_chunks(text)
+        db.replace_chunks(doc_id=doc_id, chunks=chunks, updated_time=updated_time)
+        stats.chunks_written += len(chunks)
 
     db.set_checkpoint(
-        checkpoint_key=f"feishu:space:{space_id}",
-        cursor=page_token,
-        watermark_ts=_now_utc(),
-        meta={"run_id": run_id},
+        checkpoint_key=key,
+        cursor=None,
+        watermark_ts=_from_ms(newest_ms),
+        meta={"run_id": run_id, "table_name": table_name, "watermark_ms": newest_ms, "records": len(seen)},
     )
 
 
-def _sync_folder(
+def _sync_bitable(
     *,
     db: DB,
     client: FeishuClient,
     raw_root: Path,
-    folder_token: str,
+    app_token: str,
+    title: str | None,
     category: str,
+    entry_type: str,
+    entry_token: str,
     incremental: bool,
     run_id: str,
     stats: FeishuSyncStats,
 ) -> None:
+    tables: list[dict[str, Any]] = []
     page_token: str | None = None
     while True:
-        data = client.list_drive_files(folder_token, page_token=page_token)
-        files = data.get("files") or []
-        for file_obj in files:
-            if file_obj.get("type") != "docx":
+        data = client.list_bitable_tables(app_token, page_token=page_token)
+        tables.extend(data.get("items") or [])
+        if not data.get("has_more"):
+            break
+        page_token = data.get("page_token")
+    for table in tables:
+        _sync_bitable_table(
+            db=db,
+            client=client,
+            raw_root=raw_root,
+            app_token=app_token,
+            app_title=title or app_token,
+            table_id=table["table_id"],
+            table_name=table.get("name") or table["table_id"],
+            category=category,
+            entry_type=entry_type,
+            entry_token=entry_token,
+            incremental=incremental,
+            run_id=run_id,
+            stats=stats,
+        )
+
+
+def _ingest_item(kind: str, token: str, name: str | None, modified: Any, **common: Any) -> None:
+    """Dispatch one listed node / file by type: docx, bitable or an uploaded file."""
+    if kind == "docx":
+        _ingest_doc_token(doc_token=token, **common)
+    elif kind == "bitable":
+        _sync_bitable(app_token=token, title=name, **common)
+    elif kind == "file":
+        _ingest_drive_file(file_token=token, name=name, modified=modified, **common)
+
+
+class _Progress:
+    """Run progress across whitelist entries, written to the run's stats after every page.
+
+    Feishu list APIs return no totals, so a walk's share is estimated from the doc
+    count of the entry's last completed walk (held below 100% until the walk ends).
+    """
+
+    def __init__(self, db: DB, run_id: str, entries_total: int) -> None:
+        self.db = db
+        self.run_id = run_id
+        self.entries_total = entries_total
+        self.entries_done = 0
+        self.entry: str | None = None
+        self.docs_done = 0
+        self.docs_expected: int | None = None
+
+    def start_entry(self, entry: str, docs_expected: int | None = None, docs_done: int = 0) -> None:
+        self.entry, self.docs_expected, self.docs_done = entry, docs_expected, docs_done
+
+    def finish_entry(self) -> None:
+        self.entries_done += 1
+        self.entry, self.docs_expected, self.docs_done = None, None, 0
+        self.save()
+
+    def percent(self) -> float:
+        if not self.entries_total:
+            return 100.0
+        share = min(self.docs_done / self.docs_expected, 0.99) if self.docs_expected else 0.0
+        return round(100.0 * (self.entries_done + share) / self.entries_total, 1)
+
+    def save(self) -> None:
+        try:
+            self.db.set_sync_progress(self.run_id, {
+                "percent": self.percent(),
+                "entries_done": self.entries_done,
+                "entries_total": self.entries_total,
+                "entry": self.entry,
+                "docs_done": self.docs_done,
+                "docs_expected": self.docs_expected,
+            })
+        except Exception:
+            pass
+
+
+# Listing item types mirrored by space / folder walks.
+_WALKED_KINDS = ("docx", "bitable", "file")
+
+
+def _resume_state(db: DB, checkpoint_key: str, run_id: str, incremental: bool) -> dict[str, Any] | None:
+    """The unfinished walk of this entry to continue, if any.
+
+    A walk is resumed by the same run (re-queued after its worker died) or by the next
+    run of the same mode once the run that started it has failed.
+    """
+    cp = db.get_checkpoint(checkpoint_key)
+    if not cp:
+        return None
+    meta = json.loads(cp.get("meta") or "{}")
+    walk = meta.get("walk")
+    if not walk or walk.get("incremental") != incremental:
+        return None
+    if meta.get("run_id") != run_id and db.sync_run_status(meta.get("run_id") or "") != "failed":
+        return None
+    return {**walk, "page_token": cp.get("cursor")}
+
+
+def _walk_pages(
+    *,
+    db: DB,
+    client: FeishuClient,
+    raw_root: Path,
+    checkpoint_key: str,
+    list_page: Callable[[str | None], dict[str, Any]],
+    items_key: str,
+    next_token_key: str,
+    item_of: Callable[[dict[str, Any]], tuple[str, str, str | None, Any] | None],
+    category: str,
+    entry_type: str,
+    entry_token: str,
+    incremental: bool,
+    run_id: str,
+    stats: FeishuSyncStats,
+    progress: _Progress,
+) -> None:
+    """Walk a paginated listing with a checkpoint per page.
+
+    While the walk is open, the checkpoint cursor is the token of the first page not
+    yet finished and each handled doc is recorded under the walk's id, so a restarted
+    run re-fetches that page but skips the docs it already did.
+    """
+    previous = db.get_checkpoint(checkpoint_key) or {}
+    docs_expected = json.loads(previous.get("meta") or "{}").get("docs")
+    # The watermark only advances when a walk completes.
+    watermark = datetime.fromisoformat(previous["watermark_ts"]) if previous.get("watermark_ts") else None
+    resume = _resume_state(db, checkpoint_key, run_id, incremental)
+    if resume:
+        walk_id, page_token, pages = resume["walk_id"], resume.get("page_token"), resume.get("pages", 0)
+        done = db.sync_items_done(walk_id, checkpoint_key)
+        docs_expected = resume.get("docs_expected", docs_expected)
+        stats.walks_resumed += 1
+    else:
+        db.clear_sync_items(checkpoint_key)
+        walk_id, page_token, pages, done = run_id, None, 0, set()
+    progress.start_entry(checkpoint_key, docs_expected, len(done))
+
+    def save(cursor: str | None) -> None:
+        db.set_checkpoint(
+            checkpoint_key=checkpoint_key,
+            cursor=cursor,
+            watermark_ts=watermark,
+            meta={
+                "run_id": run_id,
+                "docs": docs_expected,
+                "walk": {"walk_id": walk_id, "incremental": incremental, "pages": pages, "docs_expected": docs_expected},
+            },
+        )
+
+    save(page_token)
+    while True:
+        check_lease(run_id)
+        data = list_page(page_token)
+        for item in data.get(items_key) or []:
+            listed = item_of(item)
+            if not listed or not listed[1] or listed[0] not in _WALKED_KINDS:
                 continue
-            doc_token = file_obj.get("token")
-            if not doc_token:
+            kind, doc_token, name, modified = listed
+            if doc_token in done:
+                stats.docs_resumed += 1
                 continue
             try:
-                _ingest_doc_token(
+                _ingest_item(
+                    kind,
+                    doc_token,
+                    name,
+                    modified,
                     db=db,
                     client=client,
                     raw_root=raw_root,
-                    doc_token=doc_token,
                     category=category,
-                    entry_type="folder",
-                    entry_token=folder_token,
+                    entry_type=entry_type,
+                    entry_token=entry_token,
                     incremental=incremental,
                     run_id=run_id,
                     stats=stats,
                 )
             except Exception:
                 stats.failures += 1
-
-        page_token = data.get("next_page_token")
-        has_more = bool(data.get("has_more"))
-        if not has_more:
+                continue
+            db.mark_sync_item(walk_id, checkpoint_key, doc_token)
+            done.add(doc_token)
+            progress.docs_done = len(done)
+
+        pages += 1
+        stats.pages_fetched += 1
+        page_token = data.get(next_token_key)
+        if not data.get("has_more"):
             break
+        save(page_token)
+        progress.save()
 
     db.set_checkpoint(
-        checkpoint_key=f"feishu:folder:{folder_token}",
-        cursor=page_token,
+        checkpoint_key=checkpoint_key,
+        cursor=None,
         watermark_ts=_now_utc(),
-        meta={"run_id": run_id},
+        meta={"run_id": run_id, "walk_id": walk_id, "pages": pages, "docs": len(done)},
+    )
+    db.clear_sync_items(checkpoint_key)
+
+
+def _sync_space(
+    *,
+    db: DB,
+    client: FeishuClient,
+    raw_root: Path,
+    space_id: str,
+    category: str,
+    incremental: bool,
+    run_id: str,
+    stats: FeishuSyncStats,
+    progress: _Progress,
+) -> None:
+    _walk_pages(
+        db=db,
+        client=client,
+        raw_root=raw_root,
+        checkpoint_key=f"feishu:space:{space_id}",
+        list_page=lambda token: client.list_space_nodes(space_id, page_token=token),
+        items_key="items",
+        next_token_key="page_token",
+        item_of=lambda node: (node.get("obj_type"), node.get("obj_token"), node.get("title"), node.get("obj_edit_time")),
+        category=category,
+        entry_type="space",
+        entry_token=space_id,
+        incremental=incremental,
+        run_id=run_id,
+        stats=stats,
+        progress=progress,
+    )
+
+
+def _sync_folder(
+    *,
+    db: DB,
+    client: FeishuClient,
+    raw_root: Path,
+    folder_token: str,
+    category: str,
+    incremental: bool,
+    run_id: str,
+    stats: FeishuSyncStats,
+    progress: _Progress,
+) -> None:
+    _walk_pages(
+        db=db,
+        client=client,
+        raw_root=raw_root,
+        checkpoint_key=f"feishu:folder:{folder_token}",
+        list_page=lambda token: client.list_drive_files(folder_token, page_token=token),
+        items_key="files",
+        next_token_key="next_page_token",
+        item_of=lambda f: (f.get("type"), f.get("token"), f.get("name"), f.get("modified_time")),
+        category=category,
+        entry_type="folder",
+        entry_token=folder_token,
+        incremental=incremental,
+        run_id=run_id,
+        stats=stats,
+        progress=progress,
     )
 
 
@@ -266,8 +694,10 @@ def sync_feishu(
 
     entries = db.whitelist_entries()
     stats.whitelist_entries = len(entries)
+    progress = _Progress(db, run_id, len(entries))
 
     for entry in entries:
+        check_lease(run_id)
         entry_type = entry["entry_type"]
         token = entry["entry_token"]
         category = entry.get("label") or f"feishu-{entry_type}"
@@ -281,6 +711,7 @@ def sync_feishu(
                 incremental=incremental,
                 run_id=run_id,
                 stats=stats,
+                progress=progress,
             )
         elif entry_type == "folder":
             _sync_folder(
@@ -292,6 +723,7 @@ def sync_feishu(
                 incremental=incremental,
                 run_id=run_id,
                 stats=stats,
+                progress=progress,
             )
         elif entry_type == "doc":
             try:
@@ -309,9 +741,28 @@ def sync_feishu(
                 )
             except Exception:
                 stats.failures += 1
-        else:
-            # drive_file and unknown types are ignored in v1 sync implementation.
-            continue
+        elif entry_type == "drive_file":
+            # A whitelisted Bitable is a drive_file entry with meta {"type": "bitable"}.
+            kind = json.loads(entry.get("meta") or "{}").get("type") or "file"
+            try:
+                _ingest_item(
+                    "bitable" if kind == "bitable" else "file",
+                    token,
+                    entry.get("label") if kind == "bitable" else None,
+                    None,
+                    db=db,
+                    client=client,
+                    raw_root=raw_root,
+                    category=category,
+                    entry_type="drive_file",
+                    entry_token=token,
+                    incremental=incremental,
+                    run_id=run_id,
+                    stats=stats,
+                )
+            except Exception:
+                stats.failures += 1
+        progress.finish_entry()
 
     db.set_checkpoint(
         checkpoint_key="feishu:global",
@@ -10,6 +10,7 @@ from .db import DB
 from .db_market import get_watchlist, upsert_fin_statement
 from .market_api import ArtemisClient
 from .sec_api import SECEdgarClient
+from .sync_queue import check_lease
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,7 @@ def sync_financials(
     if settings.sec_edgar_user_agent:
         sec = SECEdgarClient(settings.sec_edgar_user_agent)
         for item in get_watchlist(db, asset_class="stock"):
+            check_lease(run_id)
             ticker = item["symbol"]
             try:
                 rows = sec.get_financials(ticker)
@@ -52,6 +54,7 @@ def sync_financials(
     if settings.artemis_api_key:
         artemis = ArtemisClient(settings.artemis_api_key)
         for item in get_watchlist(db, asset_class="protocol"):
+            check_lease(run_id)
             protocol = item["symbol"]
             try:
                 rows = artemis.get_protocol_financials(protocol)
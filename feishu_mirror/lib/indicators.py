@@ -0,0 +1,157 @@
+"""Vectorized technical indicators over daily close series (NumPy only).
+
+compute_indicators() returns the latest value of each indicator, which is what the bot
+needs to answer "is NVDA above its 200-day MA" without pulling the raw history. Results
+are cached per (symbol, asset_class, last trade_date, last close).
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_WINDOWS = (12, 26)
+RSI_WINDOW = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_K = 2.0
+VOL_WINDOWS = (30, 90)
+
+# Bars per year for annualizing volatility: stocks trade ~252 days, crypto every day.
+PERIODS_PER_YEAR = {"stock": 252, "crypto": 365}
+
+# Calendar days of history needed to fill the longest window (200 trading days).
+LOOKBACK_DAYS = 400
+
+
+def _num(value: float) -> float | None:
+    v = float(value)
+    return None if math.isnan(v) or math.isinf(v) else round(v, 6)
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; NaN until the window is full."""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        c = np.cumsum(np.insert(x, 0, 0.0))
+        out[window - 1:] = (c[window:] - c[:-window]) / window
+    return out
+
+
+def ema(x: np.ndarray, window: int, *, alpha: float | None = None) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first window."""
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    a = alpha if alpha is not None else 2.0 / (window + 1)
+    out[window - 1] = x[:window].mean()
+    for i in range(window, len(x)):
+        out[i] = a * x[i] + (1 - a) * out[i - 1]
+    return out
+
+
+def rsi(close: np.ndarray, window: int = RSI_WINDOW) -> np.ndarray:
+    """Wilder RSI."""
+    out = np.full(len(close), np.nan)
+    if len(close) <= window:
+        return out
+    delta = np.diff(close)
+    gain = ema(np.clip(delta, 0, None), window, alpha=1.0 / window)
+    loss = ema(np.clip(-delta, 0, None), window, alpha=1.0 / window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain / loss
+        out[1:] = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        view = np.lib.stride_tricks.sliding_window_view(x, window)
+        out[window - 1:] = view.std(axis=1, ddof=1)
+    return out
+
+
+def compute_indicators(dates: np.ndarray, close: np.ndarray, *, asset_class: str = "stock") -> dict[str, Any]:
+    """Latest indicator values for one daily close series (oldest first, NaNs dropped)."""
+    ok = np.isfinite(close)
+    dates, close = dates[ok], close[ok]
+    n = len(close)
+    if n == 0:
+        return {"bars": 0}
+
+    last = close[-1]
+    result: dict[str, Any] = {
+        "bars": n,
+        "last_date": str(dates[-1]),
+        "close": _num(last),
+        "sma": {str(w): _num(sma(close, w)[-1]) for w in SMA_WINDOWS},
+        "ema": {str(w): _num(ema(close, w)[-1]) for w in EMA_WINDOWS},
+        "rsi": _num(rsi(close)[-1]),
+    }
+    result["above_sma"] = {
+        w: bool(last > v) if v is not None else None for w, v in result["sma"].items()
+    }
+
+    macd_line = ema(close, 12) - ema(close, 26)
+    valid = np.flatnonzero(np.isfinite(macd_line))
+    signal = np.full(n, np.nan)
+    if len(valid) >= 9:
+        signal[valid] = ema(macd_line[valid], 9)
+    result["macd"] = {
+        "macd": _num(macd_line[-1]),
+        "signal": _num(signal[-1]),
+        "hist": _num(macd_line[-1] - signal[-1]),
+    }
+
+    mid = sma(close, BOLLINGER_WINDOW)[-1]
+    sd = rolling_std(close, BOLLINGER_WINDOW)[-1]
+    upper, lower = mid + BOLLINGER_K * sd, mid - BOLLINGER_K * sd
+    result["bollinger"] = {
+        "upper": _num(upper),
+        "middle": _num(mid),
+        "lower": _num(lower),
+        "pct_b": _num((last - lower) / (upper - lower)) if upper != lower else None,
+    }
+
+    log_ret = np.diff(np.log(close))
+    ann = math.sqrt(PERIODS_PER_YEAR.get(asset_class, 252))
+    result["realized_vol"] = {
+        f"{w}d": _num(log_ret[-w:].std(ddof=1) * ann) if len(log_ret) >= w else None for w in VOL_WINDOWS
+    }
+
+    peak = np.maximum.accumulate(close)
+    dd = close / peak - 1.0
+    trough = int(np.argmin(dd))
+    result["drawdown"] = {
+        "current_pct": _num(dd[-1] * 100),
+        "max_pct": _num(dd[trough] * 100),
+        "max_trough_date": str(dates[trough]),
+        "peak": _num(peak[-1]),
+        "peak_date": str(dates[int(np.flatnonzero(close == peak[-1])[-1])]),
+    }
+    return result
+
+
+# ── Cache keyed by (symbol, asset_class, last trade_date, last close) ──
+
+_CACHE_MAX = 512
+_cache: OrderedDict[tuple, dict[str, Any]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_indicators(key: tuple, compute: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+    """LRU lookup; a new bar (or a moved close on today's bar) changes the key."""
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = compute()
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return value
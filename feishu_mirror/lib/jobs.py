@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import socket
 from pathlib import Path
 from typing import Any, Callable
 
@@ -9,6 +11,7 @@ from .feishu_sync import sync_feishu
 from .fin_sync import sync_financials
 from .local_ingest import ingest_local
 from .market_sync import sync_market
+from .sync_queue import Heartbeat, lease_run, release
 
 
 def _run_tracked(
@@ -19,21 +22,28 @@ def _run_tracked(
     run_id: str | None,
     sync_fn: Callable[[str], dict[str, Any]],
 ) -> dict[str, Any]:
-    """Generic wrapper: managed flag → start_sync_run → try/except → finish_sync_run.
+    """Generic wrapper: managed flag → lease_run → try/except → finish_sync_run.
 
-    sync_fn receives the resolved run_id and returns a stats dict.
+    sync_fn receives the resolved run_id and returns a stats dict. A managed run (CLI /
+    cron) takes a sync_job lease and heartbeats it, so the queue worker's reaper can tell
+    it apart from a run whose process died; queued runs are leased by sync_worker.py.
+    lease_run raises ScopeBusy when a conflicting run is queued or running.
     """
-    managed = run_id is None
-    run_id = run_id or db.start_sync_run(scope, mode, reason)
+    if run_id is not None:
+        return {"run_id": run_id, "status": "success", "stats": sync_fn(run_id)}
+
+    worker_id = f"cli:{socket.gethostname()}:{os.getpid()}"
+    run_id = lease_run(db, scope, mode, reason, worker_id)
     try:
-        stats = sync_fn(run_id)
-        if managed:
-            db.finish_sync_run(run_id, "success", stats, None)
+        with Heartbeat(db, run_id, worker_id):
+            stats = sync_fn(run_id)
+        db.finish_sync_run(run_id, "success", stats, None)
         return {"run_id": run_id, "status": "success", "stats": stats}
     except Exception as exc:
-        if managed:
-            db.finish_sync_run(run_id, "failed", {}, str(exc))
+        db.finish_sync_run(run_id, "failed", {}, str(exc))
         raise
+    finally:
+        release(db, run_id)
 
 
 def run_local_sync(
@@ -118,5 +128,14 @@ def run_financials_sync(
     ).asdict())
 
 
+SYNC_RUNNERS: dict[str, Callable[..., dict[str, Any]]] = {
+    "local": run_local_sync,
+    "feishu": run_feishu_sync,
+    "all": run_all_sync,
+    "market": run_market_sync,
+    "financials": run_financials_sync,
+}
+
+
 def ensure_schema(db: DB, schema_file: Path) -> None:
     db.ensure_schema(schema_file)
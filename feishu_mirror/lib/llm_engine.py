@@ -0,0 +1,210 @@
+"""Concurrency control for the Claude extraction pipeline (structurize.py).
+
+AdaptiveLimiter caps the requests in flight and adapts the cap to the API's
+answers: every 429 (rate limited) or 529 (overloaded) halves it and pauses all
+callers for the Retry-After time (or an exponential backoff), and a run of
+successes raises it again by one, up to the configured maximum. LimitedClient
+puts any Anthropic-shaped client (the real SDK or lib.fake_llm) behind a limiter
+and meters tokens (prompt-cache writes and reads included), call time and cost
+per model.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OVERLOAD_STATUS = (429, 529)
+
+# USD per million (input, output) tokens, matched on the model family name.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "haiku": (1.0, 5.0),
+    "sonnet": (3.0, 15.0),
+    "opus": (15.0, 75.0),
+}
+# Prompt-cache writes and reads, as multiples of the input price; Message Batches halve everything.
+CACHE_WRITE_FACTOR = 1.25
+CACHE_READ_FACTOR = 0.1
+BATCH_DISCOUNT = 0.5
+
+
+def cached_system(text: str) -> list[dict[str, Any]]:
+    """A system prompt marked as a cacheable prefix (tools + system are cached together)."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def token_cost(
+    model: str, input_tokens: float, output_tokens: float,
+    cache_write_tokens: float = 0, cache_read_tokens: float = 0, *, batch: bool = False,
+) -> float:
+    price_in, price_out = next((p for family, p in MODEL_PRICES.items() if family in model), (0.0, 0.0))
+    cost = (
+        input_tokens * price_in
+        + cache_write_tokens * price_in * CACHE_WRITE_FACTOR
+        + cache_read_tokens * price_in * CACHE_READ_FACTOR
+        + output_tokens * price_out
+    ) / 1e6
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+def overload_backoff(exc: BaseException) -> float | None:
+    """Seconds the server asked us to wait if exc is a 429/529 (0 = no hint), else None."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    text = str(exc).lower()
+    if status not in OVERLOAD_STATUS and "rate limit" not in text and "overloaded" not in text:
+        return None
+    try:
+        return float(response.headers.get("retry-after") or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        max_in_flight: int,
+        *,
+        recover_after: int = 10,
+        base_backoff: float = 2.0,
+        max_backoff: float = 60.0,
+        max_attempts: int = 6,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = self.max_in_flight
+        self.recover_after = recover_after
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.in_flight = 0
+        self.stats = {"calls": 0, "overloaded": 0, "peak_in_flight": 0, "min_limit": self.limit}
+        self._streak = 0
+        self._strikes = 0
+        self._resume_at = 0.0
+        self._cond = threading.Condition()
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self.in_flight < self.limit:
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            self.stats["calls"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+
+    def _release(self, backoff: float | None = None, *, ok: bool = True) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if backoff is None and ok:
+                self._strikes = 0
+                self._streak += 1
+                if self._streak >= self.recover_after and self.limit < self.max_in_flight:
+                    self.limit += 1
+                    self._streak = 0
+            elif backoff is not None:
+                self.stats["overloaded"] += 1
+                self._streak = 0
+                self.limit = max(1, self.limit // 2)
+                self.stats["min_limit"] = min(self.stats["min_limit"], self.limit)
+                pause = backoff or min(self.max_backoff, self.base_backoff * 2 ** self._strikes)
+                self._strikes += 1
+                self._resume_at = max(self._resume_at, time.monotonic() + pause)
+                _log.warning("API overloaded: in-flight cap %d, pausing %.1fs", self.limit, pause)
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn under the cap, retrying 429/529 answers up to max_attempts times."""
+        for _ in range(self.max_attempts):
+            self._acquire()
+            try:
+                result = fn()
+            except Exception as exc:
+                backoff = overload_backoff(exc)
+                if backoff is None:
+                    self._release(ok=False)
+                    raise
+                self._release(backoff)
+                continue
+            self._release()
+            return result
+        raise RuntimeError(f"Claude API still overloaded after {self.max_attempts} attempts")
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            return {**self.stats, "limit": self.limit, "in_flight": self.in_flight}
+
+
+_USAGE_FIELDS = {
+    "input_tokens": "input_tokens",
+    "output_tokens": "output_tokens",
+    "cache_write_tokens": "cache_creation_input_tokens",
+    "cache_read_tokens": "cache_read_input_tokens",
+}
+
+
+class UsageMeter:
+    """Requests, tokens, API seconds and cost per model, summed across threads.
+
+    input_tokens counts only the uncached part of the prompt, as the API reports it;
+    a batch meter prices everything at the Message Batches discount.
+    """
+
+    def __init__(self, *, batch: bool = False) -> None:
+        self.batch = batch
+        self.by_model: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, usage: Any, seconds: float) -> None:
+        with self._lock:
+            row = self.by_model.setdefault(model, {"requests": 0, **{k: 0 for k in _USAGE_FIELDS}, "seconds": 0.0})
+            row["requests"] += 1
+            for key, attr in _USAGE_FIELDS.items():
+                row[key] += getattr(usage, attr, 0) or 0
+            row["seconds"] += seconds
+
+    def totals(self) -> dict[str, float]:
+        with self._lock:
+            rows = list(self.by_model.items())
+        out = {"requests": 0, **{k: 0 for k in _USAGE_FIELDS}, "seconds": 0.0, "cost_usd": 0.0}
+        for model, row in rows:
+            for key in ("requests", *_USAGE_FIELDS, "seconds"):
+                out[key] += row[key]
+            out["cost_usd"] += token_cost(
+                model, row["input_tokens"], row["output_tokens"], row["cache_write_tokens"],
+                row["cache_read_tokens"], batch=self.batch,
+            )
+        out["seconds"] = round(out["seconds"], 2)
+        out["cost_usd"] = round(out["cost_usd"], 4)
+        return out
+
+
+class _LimitedMessages:
+    def __init__(self, messages: Any, limiter: AdaptiveLimiter, meter: UsageMeter) -> None:
+        self._messages = messages
+        self._limiter = limiter
+        self._meter = meter
+
+    def _timed(self, kwargs: dict[str, Any]) -> Any:
+        t0 = time.monotonic()
+        resp = self._messages.create(**kwargs)
+        self._meter.record(kwargs.get("model", ""), getattr(resp, "usage", None), time.monotonic() - t0)
+        return resp
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._limiter.call(lambda: self._timed(kwargs))
+
+
+class LimitedClient:
+    """client.messages.create routed through an AdaptiveLimiter, metered by a UsageMeter."""
+
+    def __init__(self, client: Any, limiter: AdaptiveLimiter) -> None:
+        self.meter = UsageMeter()
+        self.messages = _LimitedMessages(client.messages, limiter, self.meter)
+        self.limiter = limiter
@@ -10,6 +10,7 @@ from typing import Any
 from .chunking import split_text_to_chunks
 from .db import DB
 from .extractors import SUPPORTED_EXTENSIONS, extractor_for, sha256_text
+from .sync_queue import check_lease
 
 
 @dataclass
@@ -74,6 +75,7 @@ def ingest_local(
 ) -> IngestStats:
     stats = IngestStats()
     for path in discover_local_files(report_root):
+        check_lease(run_id)
         stats.scanned += 1
         rel = path.relative_to(report_root).as_posix()
         category = _category_of(path, report_root)
@@ -0,0 +1,120 @@
+"""Read-through cache over the daily market / on-chain tables.
+
+Bars for closed days never change, so they are served from SQLite. Only the days
+after the newest stored bar are fetched upstream, together with today's bar, which
+is still moving and gets refreshed at most once per TODAY_TTL_SECONDS. A stored
+range with a hole in it (consecutive bars further apart than any market closure)
+is fetched whole, so the hole is filled on write-back; a hole the upstream has no
+bars for either (suspension, delisting) is remembered and not refetched again.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time as _time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable
+
+_log = logging.getLogger(__name__)
+
+# Stocks skip weekends and exchange holidays, so the first stored bar can sit a few
+# days after the window start without the stored range being incomplete.
+GAP_TOLERANCE_DAYS = 4
+# Longest plausible run without bars inside a stored range (Lunar New Year / Golden Week
+# closures span 8-9 calendar days); a wider gap means missing rows, not a holiday.
+MAX_BAR_GAP_DAYS = 10
+
+# Minimum interval between upstream refreshes of the same series' recent tail.
+TODAY_TTL_SECONDS = 300
+
+_refreshed_at: dict[str, float] = {}
+# Per series, the gaps a whole-window fetch came back without filling.
+_unfillable: dict[str, set[tuple[str, str]]] = {}
+_lock = threading.Lock()
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _day(value: str) -> date:
+    return date.fromisoformat(str(value)[:10])
+
+
+def _recently_refreshed(key: str) -> bool:
+    with _lock:
+        ts = _refreshed_at.get(key)
+    return ts is not None and _time.time() - ts < TODAY_TTL_SECONDS
+
+
+def _mark_refreshed(key: str) -> None:
+    with _lock:
+        _refreshed_at[key] = _time.time()
+
+
+def _gaps(rows: list[dict[str, Any]], date_key: str, start: date) -> set[tuple[str, str]]:
+    """(before, after) date pairs of missing stretches: a late first bar, or a hole in the range."""
+    days = [_day(r[date_key]) for r in rows]
+    gaps = {(a.isoformat(), b.isoformat()) for a, b in zip(days, days[1:]) if (b - a).days > MAX_BAR_GAP_DAYS}
+    if days and days[0] > start + timedelta(days=GAP_TOLERANCE_DAYS):
+        gaps.add(("", days[0].isoformat()))  # nothing before the first bar; independent of start
+    return gaps
+
+
+def read_through(
+    key: str,
+    stored: list[dict[str, Any]],
+    fetch: Callable[[int], list[dict[str, Any]]],
+    *,
+    date_key: str,
+    days: int,
+    today: date | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, Any]]:
+    """Merge stored rows with an upstream fetch limited to the missing recent days.
+
+    stored: rows already in the DB for the window, oldest first.
+    fetch:  callable taking a day count, returns upstream rows for that many days.
+
+    Returns (rows, fetched, info). rows is the merged window oldest first, fetched is
+    what came from upstream (for write-back), info says where the rows came from.
+    """
+    today = today or _utc_today()
+    start = today - timedelta(days=days)
+    stored = [r for r in stored if r.get(date_key)]
+
+    with _lock:
+        known = _unfillable.get(key, set())
+    if not stored or _gaps(stored, date_key, start) - known:
+        mode, fetch_days = "upstream", days
+    elif _recently_refreshed(key):
+        mode, fetch_days = "db", 0
+    else:
+        gap = (today - _day(stored[-1][date_key])).days
+        mode, fetch_days = "merged", min(days, max(gap, 0) + 1)
+
+    fetched: list[dict[str, Any]] = []
+    if fetch_days:
+        try:
+            fetched = fetch(fetch_days)
+            _mark_refreshed(key)
+        except Exception as exc:
+            if not stored:
+                raise
+            _log.warning("read-through refresh failed for %s, serving stored rows: %s", key, exc)
+            mode = "db_stale"
+
+    merged = {str(r[date_key])[:10]: r for r in stored}
+    merged.update({str(r[date_key])[:10]: r for r in fetched if r.get(date_key)})
+    lower = start.isoformat()
+    rows = [merged[d] for d in sorted(merged) if d >= lower]
+    if mode == "upstream":
+        with _lock:
+            _unfillable[key] = _gaps(rows, date_key, start)
+
+    info = {
+        "mode": mode,
+        "db_rows": len(stored),
+        "upstream_rows": len(fetched),
+        "fetched_days": fetch_days,
+    }
+    return rows, fetched, info
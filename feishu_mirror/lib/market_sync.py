@@ -16,6 +16,7 @@ from .db_market import (
     upsert_token_liquidity,
 )
 from .market_api import ArtemisClient, YFinanceClient
+from .sync_queue import check_lease
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,7 @@ def sync_market(
 
     # ── Stocks ──
     for item in get_watchlist(db, asset_class="stock"):
+        check_lease(run_id)
         symbol = item["symbol"]
         try:
             rows = yf_client.get_history(symbol, days=days)
@@ -73,6 +75,7 @@ def sync_market(
     # ── Crypto ──
     if artemis:
         for item in get_watchlist(db, asset_class="crypto"):
+            check_lease(run_id)
             symbol = item["symbol"]
             try:
                 rows = artemis.get_crypto_history(symbol, days=days)
@@ -94,6 +97,7 @@ def sync_market(
 
         # ── Protocols ──
         for item in get_watchlist(db, asset_class="protocol"):
+            check_lease(run_id)
             protocol = item["symbol"]
             try:
                 rows = artemis.get_protocol_metrics(protocol, days=days)
@@ -106,6 +110,7 @@ def sync_market(
 
         # ── Chains ──
         for item in get_watchlist(db, asset_class="chain"):
+            check_lease(run_id)
             chain = item["symbol"]
             try:
                 rows = artemis.get_chain_metrics(chain, days=days)
@@ -118,6 +123,7 @@ def sync_market(
 
         # ── Token liquidity (for crypto watchlist items) ──
         for item in get_watchlist(db, asset_class="crypto"):
+            check_lease(run_id)
             symbol = item["symbol"]
             chain = (item.get("meta") or "{}") if isinstance(item.get("meta"), str) else "{}"
             import json
@@ -0,0 +1,221 @@
+"""Per-period metric series across reports (report_metric_series, /v1/metrics/series).
+
+report_metric holds one row per (report, company, period, metric) in the model's
+own notation. Here periods are normalized ("3Q24", "Q3 2024", "2024年第三季度" ->
+2024Q3; "1H24" -> 2024H1; "FY2024" -> 2024; a trailing E marks an estimate) and
+currency units scaled to millions (USD_B -> USD_M x1000, 亿元 -> CNY_M x100).
+Every (company key, metric key, period, unit) cell keeps the median across
+reports (consensus), the value of the most recent report (latest) and the spread.
+
+The table is materialized: _write_metrics refreshes the (company, metric) pairs a
+report touched in the same transaction, so a series read is a single indexed scan.
+"""
+from __future__ import annotations
+
+import json
+import re
+import statistics
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from .db import DB
+from .entities import resolve
+
+PERIOD_KINDS = ("quarter", "half", "year")
+_CN_NUM = {"一": 1, "二": 2, "三": 3, "四": 4}
+
+_ESTIMATE = re.compile(r"\s*(?:\(?[EF]\)?|预测|预期|estimate[sd]?)$", re.I)
+_QUARTER = [
+    re.compile(r"^(?:FY)?(\d{4})\s*[-/ ]?\s*Q([1-4])$", re.I),
+    re.compile(r"^Q([1-4])\s*[-/ ]?\s*(?:FY)?(\d{2}|\d{4})$", re.I),
+    re.compile(r"^([1-4])Q\s*[-/ ]?\s*(?:FY)?(\d{2}|\d{4})$", re.I),
+    re.compile(r"^(\d{4})年?第?([一二三四1-4])季度?$"),
+]
+_HALF = [
+    re.compile(r"^(?:FY)?(\d{4})\s*[-/ ]?\s*H([12])$", re.I),
+    re.compile(r"^H([12])\s*[-/ ]?\s*(?:FY)?(\d{2}|\d{4})$", re.I),
+    re.compile(r"^([12])H\s*[-/ ]?\s*(?:FY)?(\d{2}|\d{4})$", re.I),
+    re.compile(r"^(\d{4})年?(上|下)半年(?:度)?$"),
+]
+_YEAR = re.compile(r"^(?:FY\s*)?(\d{4}|\d{2})(?:年(?:度)?|A)?$", re.I)
+
+_CURRENCY_UNIT = re.compile(r"^(USD|US\$|\$|CNY|RMB|HKD|HK\$|EUR|JPY)[_ ]?(K|M|MN|MM|B|BN|100M|亿|万|亿元|万元)?$")
+_CURRENCY = {"US$": "USD", "$": "USD", "RMB": "CNY", "HK$": "HKD"}
+_TO_MILLIONS = {None: 1e-6, "K": 1e-3, "万": 1e-2, "万元": 1e-2, "M": 1.0, "MN": 1.0, "MM": 1.0,
+                "100M": 100.0, "亿": 100.0, "亿元": 100.0, "B": 1e3, "BN": 1e3}
+_CNY_UNITS = {"元": 1e-6, "万元": 1e-2, "百万元": 1.0, "亿元": 100.0, "亿": 100.0}  # bare amounts are RMB
+
+
+def _year(text: str) -> int:
+    y = int(text)
+    return y + 2000 if y < 100 else y
+
+
+def normalize_period(raw: Any) -> tuple[str, str, str, bool] | None:
+    """(period, kind, start date, is_estimate) for a period label, or None if unrecognized."""
+    text = str(raw or "").strip().replace("　", " ")
+    estimate = bool(_ESTIMATE.search(text)) and not re.fullmatch(r"\d{4}", text)
+    text = _ESTIMATE.sub("", text).strip()
+    for i, pattern in enumerate(_QUARTER):
+        m = pattern.match(text)
+        if m:
+            year, q = (m.group(1), m.group(2)) if i in (0, 3) else (m.group(2), m.group(1))
+            q = _CN_NUM.get(q) or int(q)
+            y = _year(year)
+            return f"{y}Q{q}", "quarter", f"{y}-{3 * q - 2:02d}-01", estimate
+    for i, pattern in enumerate(_HALF):
+        m = pattern.match(text)
+        if m:
+            year, h = (m.group(1), m.group(2)) if i in (0, 3) else (m.group(2), m.group(1))
+            h = {"上": 1, "下": 2}.get(h) or int(h)
+            y = _year(year)
+            return f"{y}H{h}", "half", f"{y}-{6 * h - 5:02d}-01", estimate
+    m = _YEAR.match(text)
+    if m:
+        y = _year(m.group(1))
+        if 1990 <= y <= 2100:
+            return str(y), "year", f"{y}-01-01", estimate
+    return None
+
+
+def normalize_unit(raw: Any, value: float | None) -> tuple[str, float | None]:
+    """(unit, value) with currency amounts in millions: ("USD_B", 1.2) -> ("USD_M", 1200.0)."""
+    text = str(raw or "").strip().upper().replace("MILLION", "M").replace("BILLION", "B")
+    m = _CURRENCY_UNIT.match(text)
+    if m:
+        currency = _CURRENCY.get(m.group(1), m.group(1))
+        scale = _TO_MILLIONS.get(m.group(2), 1.0)
+        return f"{currency}_M", (value * scale if value is not None else None)
+    if text in _CNY_UNITS:
+        return "CNY_M", (value * _CNY_UNITS[text] if value is not None else None)
+    if text in ("%", "PCT", "PERCENT", "PERCENTAGE"):
+        return "percent", value
+    return (text.lower() or "unknown"), value
+
+
+def _pairs(conn, doc_id: str) -> set[tuple[str, str]]:
+    """(company key, metric key) pairs of a report's metric rows, from report_entity."""
+    rows = conn.execute(
+        """
+        SELECT DISTINCT c.value_norm AS entity, m.value_norm AS metric
+        FROM report_entity c
+        JOIN report_entity m ON m.kind = 'metric' AND m.layer = 3 AND m.doc_id = c.doc_id AND m.row_id = c.row_id
+        WHERE c.kind = 'company' AND c.layer = 3 AND c.doc_id = ?
+        """,
+        (doc_id,),
+    ).fetchall()
+    return {(r["entity"], r["metric"]) for r in rows}
+
+
+def refresh_pairs(conn, pairs: Iterable[tuple[str, str]]) -> int:
+    """Recompute the series cells of the given (company key, metric key) pairs; returns cells written."""
+    written = 0
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    for entity, metric in pairs:
+        conn.execute("DELETE FROM report_metric_series WHERE entity = ? AND metric = ?", (entity, metric))
+        rows = conn.execute(
+            """
+            SELECT r.doc_id, r.period, r.value, r.unit,
+                   COALESCE(me.publish_date, d.updated_time, r.extracted_at) AS reported_at
+            FROM report_metric r
+            JOIN report_document d ON d.doc_id = r.doc_id
+            LEFT JOIN report_meta_enriched me ON me.doc_id = r.doc_id
+            WHERE r.id IN (SELECT row_id FROM report_entity WHERE kind = 'company' AND value_norm = ? AND layer = 3)
+              AND r.id IN (SELECT row_id FROM report_entity WHERE kind = 'metric' AND value_norm = ? AND layer = 3)
+              AND r.value IS NOT NULL
+            """,
+            (entity, metric),
+        ).fetchall()
+        cells: dict[tuple, dict[str, tuple[float, str]]] = defaultdict(dict)
+        for r in rows:
+            period = normalize_period(r["period"])
+            if period is None:
+                continue
+            unit, value = normalize_unit(r["unit"], r["value"])
+            key = (*period, unit)
+            # One value per report and cell: a report listing the same figure twice counts once.
+            if r["doc_id"] not in cells[key] or r["reported_at"] > cells[key][r["doc_id"]][1]:
+                cells[key][r["doc_id"]] = (value, r["reported_at"] or "")
+        for (period, kind, start, estimate, unit), by_doc in cells.items():
+            values = [v for v, _ in by_doc.values()]
+            latest_doc, (latest, latest_at) = max(by_doc.items(), key=lambda kv: (kv[1][1], kv[0]))
+            conn.execute(
+                """
+                INSERT INTO report_metric_series(
+                    entity, metric, period, period_kind, period_start, unit, is_estimate,
+                    consensus, latest, latest_doc_id, latest_at, min_value, max_value,
+                    n_reports, doc_ids, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (entity, metric, period, kind, start, unit, int(estimate), statistics.median(values), latest,
+                 latest_doc, latest_at, min(values), max(values), len(values),
+                 json.dumps(sorted(by_doc)), now),
+            )
+            written += 1
+    return written
+
+
+def rebuild_series(db: DB) -> int:
+    with db.conn() as conn:
+        conn.execute("DELETE FROM report_metric_series")
+        pairs = conn.execute(
+            """
+            SELECT DISTINCT c.value_norm AS entity, m.value_norm AS metric
+            FROM report_entity c
+            JOIN report_entity m ON m.kind = 'metric' AND m.layer = 3 AND m.doc_id = c.doc_id AND m.row_id = c.row_id
+            WHERE c.kind = 'company' AND c.layer = 3
+            """
+        ).fetchall()
+        return refresh_pairs(conn, [(p["entity"], p["metric"]) for p in pairs])
+
+
+def query_series(
+    db: DB,
+    company: str,
+    metric: str,
+    *,
+    period_kind: str | None = None,
+    unit: str | None = None,
+    estimates: bool = False,
+    pick: str = "consensus",
+    limit: int = 40,
+) -> dict[str, Any]:
+    """An aligned series for one company and metric, oldest period first.
+
+    Without period_kind / unit, the kind and unit with the most periods are used
+    (a series never mixes quarters with years, or USD with CNY).
+    """
+    with db.conn() as conn:
+        entity, metric_key = resolve(conn, "company", company), resolve(conn, "metric", metric)
+        rows = conn.execute(
+            """
+            SELECT * FROM report_metric_series
+            WHERE entity = ? AND metric = ? AND (is_estimate = 0 OR ?)
+            ORDER BY period_start, is_estimate
+            """,
+            (entity, metric_key, int(estimates)),
+        ).fetchall()
+    available = sorted({(r["period_kind"], r["unit"]) for r in rows})
+    if not period_kind or not unit:
+        counts: dict[tuple[str, str], int] = defaultdict(int)
+        for r in rows:
+            if (not period_kind or r["period_kind"] == period_kind) and (not unit or r["unit"] == unit):
+                counts[(r["period_kind"], r["unit"])] += 1
+        if counts:
+            best = max(counts, key=lambda k: (counts[k], -PERIOD_KINDS.index(k[0])))
+            period_kind, unit = period_kind or best[0], unit or best[1]
+    rows = [r for r in rows if r["period_kind"] == period_kind and r["unit"] == unit][-limit:]
+    return {
+        "company": entity,
+        "metric": metric_key,
+        "period_kind": period_kind,
+        "unit": unit,
+        "pick": pick,
+        "periods": [r["period"] + ("E" if r["is_estimate"] else "") for r in rows],
+        "values": [r[pick] for r in rows],
+        "n_reports": [r["n_reports"] for r in rows],
+        "spread": [[r["min_value"], r["max_value"]] for r in rows],
+        "latest_doc_ids": [r["latest_doc_id"] for r in rows],
+        "available": [{"period_kind": k, "unit": u} for k, u in available],
+    }
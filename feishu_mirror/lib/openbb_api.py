@@ -12,10 +12,12 @@ import threading
 import time as _time
 from datetime import datetime, timedelta
 from functools import lru_cache
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 import requests
-import yfinance as yf
+
+if TYPE_CHECKING:
+    import yfinance as yf
 
 
 # ── TTL Cache decorator ─────────────────────────────────────────────────
@@ -42,8 +44,10 @@ def _ttl_cache(seconds: int):
 
 
 @lru_cache(maxsize=64)
-def _get_ticker(symbol: str) -> yf.Ticker:
+def _get_ticker(symbol: str) -> "yf.Ticker":
     """Reuse yf.Ticker instances to avoid recreating HTTP sessions."""
+    import yfinance as yf  # deferred: ~0.7s import, only needed on first equity/forex/options call
+
     return yf.Ticker(symbol)
 
 _log = logging.getLogger(__name__)
@@ -197,24 +201,31 @@ def get_analyst_estimates(symbol: str) -> dict:
     return result
 
 
+def _insider_trading_yfinance(symbol: str, limit: int) -> list[dict]:
+    try:
+        t = _get_ticker(symbol)
+        df = t.insider_transactions
+        if df is not None and not df.empty:
+            _log.info("insider_trading: FMP key not set, using yfinance fallback for %s", symbol)
+            rows = df.head(limit).to_dict(orient="records")
+            return _sanitize_rows(rows)
+    except Exception as exc:
+        _log.warning("insider_trading yfinance fallback failed for %s: %s", symbol, exc)
+    return []
+
+
+def _fmp_insider_url(symbol: str, limit: int, key: str) -> str:
+    return f"https://financialmodelingprep.com/api/v4/insider-trading?symbol={symbol.upper()}&limit={limit}&apikey={key}"
+
+
 def get_insider_trading(symbol: str, limit: int = 20) -> list[dict]:
     """Insider trading from FMP API (needs FMP_API_KEY)."""
     key = os.getenv("FMP_API_KEY", "")
     if not key:
         # Fallback: yfinance insider transactions
-        try:
-            t = _get_ticker(symbol)
-            df = t.insider_transactions
-            if df is not None and not df.empty:
-                _log.info("insider_trading: FMP key not set, using yfinance fallback for %s", symbol)
-                rows = df.head(limit).to_dict(orient="records")
-                return _sanitize_rows(rows)
-        except Exception as exc:
-            _log.warning("insider_trading yfinance fallback failed for %s: %s", symbol, exc)
-        return []
-    url = f"https://financialmodelingprep.com/api/v4/insider-trading?symbol={symbol.upper()}&limit={limit}&apikey={key}"
+        return _insider_trading_yfinance(symbol, limit)
     try:
-        resp = requests.get(url, timeout=15)
+        resp = requests.get(_fmp_insider_url(symbol, limit, key), timeout=15)
         resp.raise_for_status()
         return resp.json()[:limit]
     except Exception as e:
@@ -222,6 +233,18 @@ def get_insider_trading(symbol: str, limit: int = 20) -> list[dict]:
         return []
 
 
+async def get_insider_trading_async(symbol: str, limit: int, upstreams) -> list[dict]:
+    """get_insider_trading over the async upstream layer: FMP via httpx, yfinance on its pool."""
+    key = os.getenv("FMP_API_KEY", "")
+    if not key:
+        return await upstreams.run_sync("yfinance", _insider_trading_yfinance, symbol, limit)
+    try:
+        return (await upstreams.get_json("fmp", _fmp_insider_url(symbol, limit, key)))[:limit]
+    except Exception as e:
+        _log.warning("FMP insider trading for %s failed: %s", symbol, e)
+        return []
+
+
 def get_institutional_holders(symbol: str) -> list[dict]:
     """Top institutional holders via yfinance."""
     t = _get_ticker(symbol)
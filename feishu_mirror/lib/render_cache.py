@@ -0,0 +1,120 @@
+"""Content-addressed on-disk cache for rendered charts and their Feishu image_key.
+
+A key is the SHA-256 of the canonical JSON of everything that determines the picture:
+chart type, title, labels and data for local charts; symbol, interval and a date bucket
+for TradingView screenshots. Each entry is `{key}.png` plus an optional `{key}.json`
+holding the image_key from the first upload, so a repeat request skips both the
+render and the upload. Entries are evicted least-recently-used (by mtime, touched on
+every hit) once the directory grows past max_bytes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+_log = logging.getLogger(__name__)
+
+
+def render_key(**parts: Any) -> str:
+    """Stable hash of the inputs that determine a chart image."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def date_bucket() -> str:
+    """UTC day: live-data screenshots of the same symbol are reused within a day."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class RenderCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size = sum(p.stat().st_size for p in self.root.glob("*/*.png"))
+        self.hits = 0
+        self.misses = 0
+
+    def _png(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def _meta(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> tuple[bytes, str | None] | None:
+        """(png, image_key or None) on a hit; touches the entry for LRU."""
+        path = self._png(key)
+        try:
+            png = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        image_key = None
+        try:
+            image_key = json.loads(self._meta(key).read_text(encoding="utf-8")).get("image_key")
+        except (FileNotFoundError, ValueError):
+            pass
+        with self._lock:
+            self.hits += 1
+        return png, image_key
+
+    def put(self, key: str, png: bytes) -> None:
+        path = self._png(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        old = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(".png.tmp")
+        tmp.write_bytes(png)
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(png) - old
+        self._evict()
+
+    def set_image_key(self, key: str, image_key: str) -> None:
+        meta = self._meta(key)
+        if not meta.parent.exists():
+            return
+        meta.write_text(json.dumps({"image_key": image_key}), encoding="utf-8")
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            entries = sorted(
+                ((p.stat().st_mtime, p) for p in self.root.glob("*/*.png")), key=lambda e: e[0],
+            )
+            for _, path in entries:
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                try:
+                    self._size -= path.stat().st_size
+                    path.unlink()
+                    path.with_suffix(".json").unlink(missing_ok=True)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"bytes": self._size, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+def open_render_cache(settings) -> RenderCache | None:
+    """Open the cache under settings.chart_cache_root; None when CHART_CACHE_MAX_MB=0."""
+    if settings.chart_cache_max_mb <= 0:
+        return None
+    try:
+        return RenderCache(settings.chart_cache_root, settings.chart_cache_max_mb * 1024 * 1024)
+    except OSError as exc:
+        _log.warning("chart render cache disabled: %s", exc)
+        return None
@@ -0,0 +1,138 @@
+"""Process pool for local matplotlib chart rendering.
+
+Agg rendering is CPU-bound and holds the GIL, so running it inside FastAPI's sync
+handlers stalls every other request on the same worker threads. Renders are shipped
+to a small process pool instead; each worker sets up the Chinese font once in its
+initializer and draws with the OO Figure API only. A render that exceeds the timeout
+gets its pool torn down and rebuilt, so one stuck figure cannot wedge later requests.
+With workers=0 everything renders in-process (tests, scripts).
+
+Workers are spawned, not forked: forking the API process would copy its threads and
+locks (and is unsafe on macOS). A spawned worker re-imports the main script, so the
+configure_* helpers are no-ops inside child processes.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+_log = logging.getLogger(__name__)
+
+# chart kind → renderer in lib.chart_render (looked up by name inside the worker)
+RENDERERS = {
+    "line": "render_line_chart",
+    "multi_line": "render_multi_line_chart",
+    "bar": "render_bar_chart",
+    "candlestick": "render_candlestick_chart",
+}
+
+
+def _init_worker() -> None:
+    from .chart_render import _setup_chinese_font
+
+    _setup_chinese_font()
+
+
+def _render(kind: str, args: tuple, kwargs: dict[str, Any]) -> bytes:
+    from . import chart_render
+
+    return getattr(chart_render, RENDERERS[kind])(*args, **kwargs)
+
+
+class RenderPool:
+    def __init__(self, workers: int = 2, *, timeout: float = 20.0) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.stats = {"renders": 0, "timeouts": 0, "restarts": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return  # another thread already replaced it
+            self._executor = None
+            self.stats["restarts"] += 1
+        # No per-task cancel for a running process: kill the workers outright.
+        for proc in list(getattr(executor, "_processes", {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self) -> None:
+        """Start the workers now so the first real render does not pay process start-up."""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_init_worker)
+
+    def render(self, kind: str, *args: Any, **kwargs: Any) -> bytes:
+        if kind not in RENDERERS:
+            raise ValueError(f"unknown chart kind: {kind}")
+        for attempt in (1, 2):
+            executor = self._get_executor()
+            try:
+                png = executor.submit(_render, kind, args, kwargs).result(timeout=self.timeout)
+                self.stats["renders"] += 1
+                return png
+            except FutureTimeout:
+                self.stats["timeouts"] += 1
+                self._restart(executor)
+                raise TimeoutError(f"{kind} chart render timed out after {self.timeout:.0f}s") from None
+            except BrokenProcessPool:
+                _log.warning("render pool broken, restarting (attempt %d)", attempt)
+                self._restart(executor)
+        raise RuntimeError("render pool unavailable")
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: RenderPool | None = None
+
+
+def configure_render_pool(workers: int, *, timeout: float = 20.0, warm: bool = True) -> None:
+    """workers=0 disables the pool (render in the calling thread)."""
+    global _pool
+    if multiprocessing.parent_process() is not None:
+        return  # a render worker re-importing the main module
+    if _pool is not None:
+        _pool.close()
+    _pool = RenderPool(workers, timeout=timeout) if workers > 0 else None
+    if _pool is not None and warm:
+        try:
+            _pool.warm()
+        except Exception as exc:
+            _log.warning("render pool warm-up failed: %s", exc)
+
+
+def render_chart(kind: str, *args: Any, **kwargs: Any) -> bytes:
+    """Render a local chart to PNG in the pool (or in-process when no pool is configured)."""
+    if _pool is None:
+        return _render(kind, args, kwargs)
+    return _pool.render(kind, *args, **kwargs)
+
+
+def render_pool_stats() -> dict[str, Any] | None:
+    if _pool is None:
+        return None
+    return {"workers": _pool.workers, "timeout": _pool.timeout, **_pool.stats}
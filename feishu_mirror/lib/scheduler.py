@@ -0,0 +1,171 @@
+"""In-process scheduler for the sync worker (replaces the crontab fan-out of sync scripts).
+
+Interval tasks enqueue sync runs on the durable queue (lib/sync_queue.py) every N
+minutes, where N may depend on the clock (market incremental polls faster while US
+equities trade). Daily tasks fire once a day at a local HH:MM. A tick whose previous
+run is still queued or running is skipped, not stacked. Last-fire times persist in a
+small JSON file so a worker restart neither re-fires the daily push nor resets the
+interval clocks.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Callable
+from zoneinfo import ZoneInfo
+
+from .db import DB
+from .sync_queue import enqueue, queue_state
+
+_log = logging.getLogger(__name__)
+
+_NEW_YORK = ZoneInfo("America/New_York")
+POLL_SECONDS = 30
+
+
+def us_market_open(now: datetime) -> bool:
+    """Regular NYSE/Nasdaq session, Mon–Fri 09:30–16:00 New York time (holidays not modelled)."""
+    t = now.astimezone(_NEW_YORK)
+    return t.weekday() < 5 and time(9, 30) <= t.time() < time(16, 0)
+
+
+@dataclass
+class Task:
+    name: str
+    run: Callable[[], str]                                   # returns a short outcome for the log / state
+    interval: Callable[[datetime], float] | None = None      # minutes until the next run; <= 0 disables
+    at: str | None = None                                     # daily at local "HH:MM"
+
+
+class Scheduler:
+    def __init__(self, tasks: list[Task], state_file: Path) -> None:
+        self.tasks = tasks
+        self.state_file = Path(state_file)
+        self.state: dict[str, dict[str, Any]] = {}
+        try:
+            self.state = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            pass
+        # A daily task seen for the first time waits for its next slot instead of firing now.
+        now = datetime.now().astimezone().isoformat(timespec="seconds")
+        for task in tasks:
+            if task.at and task.name not in self.state:
+                self.state[task.name] = {"last_run": now, "outcome": "initialized"}
+
+    def _last(self, name: str) -> datetime | None:
+        ts = self.state.get(name, {}).get("last_run")
+        return datetime.fromisoformat(ts) if ts else None
+
+    def due(self, task: Task, now: datetime) -> bool:
+        last = self._last(task.name)
+        if task.at:
+            hh, mm = (int(x) for x in task.at.split(":"))
+            slot = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+            return now >= slot and (last is None or last < slot)
+        minutes = task.interval(now) if task.interval else 0
+        if minutes <= 0:
+            return False
+        return last is None or now - last >= timedelta(minutes=minutes)
+
+    def tick(self, now: datetime | None = None) -> list[tuple[str, str]]:
+        """Fire every due task once; returns [(name, outcome)]."""
+        now = now or datetime.now().astimezone()
+        fired = []
+        for task in self.tasks:
+            if not self.due(task, now):
+                continue
+            try:
+                outcome = task.run()
+            except Exception as exc:
+                _log.warning("scheduled task %s failed: %s", task.name, exc)
+                outcome = f"error: {exc}"
+            # A skipped tick still counts as this period's tick: the next try is one interval later.
+            self.state[task.name] = {"last_run": now.isoformat(timespec="seconds"), "outcome": outcome}
+            fired.append((task.name, outcome))
+            _log.info("schedule %s: %s", task.name, outcome)
+        if fired:
+            self._save()
+        return fired
+
+    def _save(self) -> None:
+        tmp = self.state_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp.replace(self.state_file)
+
+    def run_forever(self, stop: threading.Event, poll: float = POLL_SECONDS) -> None:
+        while not stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                _log.exception("scheduler tick failed")
+            stop.wait(poll)
+
+
+def enqueue_task(db: DB, scope: str, mode: str) -> Callable[[], str]:
+    """Queue a scheduled sync unless a run of that scope is already queued or running."""
+    def run() -> str:
+        busy = [r for r in queue_state(db) if r["scope"] == scope]
+        if busy:
+            return f"skipped: {scope} run {busy[0]['run_id']} still {busy[0]['status']}"
+        run_id, _ = enqueue(db, scope, mode, "schedule")
+        return f"queued {run_id}"
+    return run
+
+
+def script_task(script: Path, *args: str, log_file: Path | None = None) -> Callable[[], str]:
+    """Run a standalone script (daily push) in a child process; skip while the last one is alive."""
+    proc: subprocess.Popen | None = None
+
+    def run() -> str:
+        nonlocal proc
+        if proc is not None and proc.poll() is None:
+            return f"skipped: pid {proc.pid} still running"
+        out = open(log_file, "a") if log_file else subprocess.DEVNULL
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, str(script), *args], cwd=script.parent, stdout=out, stderr=subprocess.STDOUT,
+            )
+        finally:
+            if log_file:
+                out.close()
+        return f"started pid {proc.pid}"
+    return run
+
+
+def default_tasks(db: DB, settings, app_dir: Path) -> list[Task]:
+    """The jobs setup_cron.sh used to install, plus market / financials incrementals."""
+    def market_minutes(now: datetime) -> float:
+        if us_market_open(now) and settings.market_open_incremental_minutes > 0:
+            return settings.market_open_incremental_minutes
+        return settings.market_incremental_minutes
+
+    logs = settings.report_index_root / "logs"
+    return [
+        Task("local_incremental", enqueue_task(db, "local", "incremental"),
+             interval=lambda _now: settings.local_incremental_minutes),
+        Task("feishu_incremental", enqueue_task(db, "feishu", "incremental"),
+             interval=lambda _now: settings.feishu_incremental_minutes),
+        Task("market_incremental", enqueue_task(db, "market", "incremental"), interval=market_minutes),
+        Task("financials_incremental", enqueue_task(db, "financials", "incremental"),
+             interval=lambda _now: settings.financials_incremental_minutes),
+        Task("full_reconcile", enqueue_task(db, "all", "full"), at=settings.full_sync_at),
+        Task("daily_push", script_task(app_dir / "daily_push.py", log_file=logs / "daily_push.log"),
+             at=settings.daily_push_at),
+    ]
+
+
+def read_schedule_state(settings) -> dict[str, Any]:
+    try:
+        return json.loads(schedule_state_file(settings).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def schedule_state_file(settings) -> Path:
+    return settings.report_index_root / "scheduler_state.json"
@@ -59,58 +59,97 @@ class SECEdgarClient:
         facts = self.get_company_facts(ticker)
         if not facts:
             return []
-
-        us_gaap = facts.get("facts", {}).get("us-gaap", {})
-        target_metrics = {
-            "Revenues": "revenue",
-            "RevenueFromContractWithCustomerExcludingAssessedTax": "revenue",
-            "NetIncomeLoss": "net_income",
-            "GrossProfit": "gross_profit",
-            "OperatingIncomeLoss": "operating_income",
-            "EarningsPerShareBasic": "eps_basic",
-            "EarningsPerShareDiluted": "eps_diluted",
-            "Assets": "total_assets",
-            "Liabilities": "total_liabilities",
-            "StockholdersEquity": "stockholders_equity",
-            "CashAndCashEquiventsAtCarryingValue": "cash",
-            "OperatingCashFlow": "operating_cash_flow",
-        }
-
-        rows: list[dict[str, Any]] = []
-        seen: set[tuple[str, str]] = set()
-
-        for gaap_key, metric_name in target_metrics.items():
-            concept = us_gaap.get(gaap_key)
-            if not concept:
+        return facts_to_rows(ticker, facts)
+
+
+def facts_to_rows(ticker: str, facts: dict[str, Any]) -> list[dict[str, Any]]:
+    """companyfacts JSON → fin_statement rows (10-K/10-Q only, first filing per metric/period)."""
+    us_gaap = facts.get("facts", {}).get("us-gaap", {})
+    target_metrics = {
+        "Revenues": "revenue",
+        "RevenueFromContractWithCustomerExcludingAssessedTax": "revenue",
+        "NetIncomeLoss": "net_income",
+        "GrossProfit": "gross_profit",
+        "OperatingIncomeLoss": "operating_income",
+        "EarningsPerShareBasic": "eps_basic",
+        "EarningsPerShareDiluted": "eps_diluted",
+        "Assets": "total_assets",
+        "Liabilities": "total_liabilities",
+        "StockholdersEquity": "stockholders_equity",
+        "CashAndCashEquiventsAtCarryingValue": "cash",
+        "OperatingCashFlow": "operating_cash_flow",
+    }
+
+    rows: list[dict[str, Any]] = []
+    seen: set[tuple[str, str]] = set()
+
+    for gaap_key, metric_name in target_metrics.items():
+        concept = us_gaap.get(gaap_key)
+        if not concept:
+            continue
+        units = concept.get("units", {})
+        unit_values = units.get("USD") or units.get("USD/shares") or []
+        for entry in unit_values:
+            form = entry.get("form", "")
+            if form not in ("10-K", "10-Q"):
+                continue
+            period = entry.get("end", "")
+            if not period:
+                continue
+            period_type = "annual" if form == "10-K" else "quarterly"
+            key = (metric_name, period)
+            if key in seen:
                 continue
-            units = concept.get("units", {})
-            unit_values = units.get("USD") or units.get("USD/shares") or []
-            for entry in unit_values:
-                form = entry.get("form", "")
-                if form not in ("10-K", "10-Q"):
-                    continue
-                period = entry.get("end", "")
-                if not period:
-                    continue
-                period_type = "annual" if form == "10-K" else "quarterly"
-                key = (metric_name, period)
-                if key in seen:
-                    continue
-                seen.add(key)
-
-                unit_label = "USD"
-                if "USD/shares" in units and gaap_key.startswith("EarningsPerShare"):
-                    unit_label = "USD/share"
-
-                rows.append({
-                    "entity_id": ticker.upper(),
-                    "entity_type": "stock",
-                    "period": period,
-                    "period_type": period_type,
-                    "metric": metric_name,
-                    "value": entry.get("val"),
-                    "unit": unit_label,
-                    "meta": {"form": form, "filed": entry.get("filed", "")},
-                })
-
-        return rows
+            seen.add(key)
+
+            unit_label = "USD"
+            if "USD/shares" in units and gaap_key.startswith("EarningsPerShare"):
+                unit_label = "USD/share"
+
+            rows.append({
+                "entity_id": ticker.upper(),
+                "entity_type": "stock",
+                "period": period,
+                "period_type": period_type,
+                "metric": metric_name,
+                "value": entry.get("val"),
+                "unit": unit_label,
+                "meta": {"form": form, "filed": entry.get("filed", "")},
+            })
+
+    return rows
+
+
+class AsyncSECEdgarClient:
+    """SEC EDGAR over the shared async upstream layer (see lib.upstream)."""
+
+    def __init__(self, upstreams, user_agent: str) -> None:
+        self.upstreams = upstreams
+        self.headers = {"User-Agent": user_agent, "Accept": "application/json"}
+        self._cik_cache: dict[str, str] = {}
+
+    async def _get(self, url: str) -> Any:
+        return await self.upstreams.get_json("sec", url, headers=self.headers)
+
+    async def ticker_to_cik(self, ticker: str) -> str | None:
+        ticker_upper = ticker.upper()
+        if ticker_upper not in self._cik_cache:
+            try:
+                data = await self._get(SECEdgarClient.COMPANY_TICKERS_URL)
+                for entry in data.values():
+                    self._cik_cache[entry.get("ticker", "").upper()] = str(entry.get("cik_str", "")).zfill(10)
+            except Exception as e:
+                logger.warning("SEC CIK lookup failed for %s: %s", ticker, e)
+        return self._cik_cache.get(ticker_upper)
+
+    async def get_financials(self, ticker: str) -> list[dict[str, Any]]:
+        cik = await self.ticker_to_cik(ticker)
+        if not cik:
+            logger.warning("CIK not found for ticker %s", ticker)
+            return []
+        try:
+            facts = await self._get(f"{SECEdgarClient.BASE_URL}/api/xbrl/companyfacts/CIK{cik}.json")
+        except Exception as e:
+            logger.warning("SEC company facts failed for %s (CIK %s): %s", ticker, cik, e)
+            return []
+        return facts_to_rows(ticker, facts) if facts else []
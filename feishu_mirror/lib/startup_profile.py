@@ -0,0 +1,52 @@
+"""Start-up profile: `python -X importtime` breakdown plus timed start-up steps.
+
+The import is measured in a fresh interpreter so modules already loaded by the
+caller do not hide their cost.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """-X importtime lines → [(module, self_us, cumulative_us, depth)] in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line.split(":", 1)[1].split("|", 2)
+            # importtime indents nested imports by two spaces after one leading space
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cum_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_import(cwd: Path, module: str) -> tuple[float, list[tuple[str, int, int, int]]]:
+    """Import `module` in a subprocess with -X importtime; (wall seconds, parsed rows)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(cwd), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(proc.stdout.strip().splitlines()[-1]), parse_importtime(proc.stderr)
+
+
+def print_startup_profile(cwd: Path, module: str, steps: dict[str, float], *, top: int = 25) -> None:
+    wall, rows = profile_import(cwd, module)
+    print(f"import {module}: {wall * 1000:.0f} ms")
+    print(f"\nTop {top} imports by cumulative time (top-level packages):")
+    print(f"  {'cumulative':>10}  {'self':>8}  module")
+    roots = [r for r in rows if r[3] <= 1]
+    for name, self_us, cum_us, _ in sorted(roots, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"  {cum_us / 1000:>8.1f}ms  {self_us / 1000:>6.1f}ms  {name}")
+    print("\nStart-up steps:")
+    for name, secs in steps.items():
+        print(f"  {secs * 1000:>8.1f}ms  {name}")
+    print(f"  {sum(steps.values()) * 1000:>8.1f}ms  total")
@@ -0,0 +1,316 @@
+"""Durable sync job queue on report_sync_run + sync_job (SQLite).
+
+A queued run is a report_sync_run row with status 'queued' plus a sync_job lease row.
+sync_worker.py claims the oldest queued run whose scope does not conflict with a
+running one, heartbeats the lease while it works and finishes the run. A run whose
+heartbeat goes stale (worker killed, machine slept) is put back in the queue until
+max_attempts, then marked failed; the sync stages resume from their checkpoints.
+A worker that was only slow finds its lease gone on the next heartbeat, and the
+sync loops stop at their next item (check_lease) instead of racing the new claimant.
+
+Queue mutations run under BEGIN IMMEDIATE, so concurrent enqueues and claims from
+the API and any number of workers serialise on SQLite's write lock.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from .db import DB, _now_iso, _uuid4
+
+_log = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+# A running job whose lease has not been refreshed for this long is considered lost.
+STALE_AFTER_SECONDS = 120
+
+# Scopes that write the same documents / checkpoints must not run at the same time.
+CONFLICTS: dict[str, set[str]] = {
+    "local": {"local", "all"},
+    "feishu": {"feishu", "all"},
+    "all": {"local", "feishu", "all"},
+    "market": {"market"},
+    "financials": {"financials"},
+}
+
+
+@dataclass
+class Job:
+    run_id: str
+    scope: str
+    mode: str
+    reason: str
+    attempts: int
+
+
+def _ago(seconds: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def enqueue(db: DB, scope: str, mode: str, reason: str) -> tuple[str, bool]:
+    """Queue a sync run; returns (run_id, deduplicated).
+
+    A run already queued for the same scope absorbs the request (a full request
+    upgrades a queued incremental one), so repeated clicks or cron ticks coalesce.
+    """
+    with db.conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """
+            SELECT run_id, mode FROM report_sync_run
+            WHERE scope = ? AND status = 'queued'
+            ORDER BY created_at LIMIT 1
+            """,
+            (scope,),
+        ).fetchone()
+        if row:
+            if mode == "full" and row["mode"] != "full":
+                conn.execute("UPDATE report_sync_run SET mode = 'full' WHERE run_id = ?", (row["run_id"],))
+            return row["run_id"], True
+        run_id = _uuid4()
+        conn.execute(
+            "INSERT INTO report_sync_run(run_id, scope, mode, reason, status) VALUES (?, ?, ?, ?, 'queued')",
+            (run_id, scope, mode, reason),
+        )
+        conn.execute("INSERT INTO sync_job(run_id, scope) VALUES (?, ?)", (run_id, scope))
+    return run_id, False
+
+
+class ScopeBusy(RuntimeError):
+    """A managed run was refused because a conflicting run is queued or running."""
+
+
+def _conflicting(conn, scope: str) -> dict[str, Any] | None:
+    """The oldest queued run, or running run with a live lease, whose scope conflicts with scope."""
+    scopes = sorted(CONFLICTS.get(scope, {scope}))
+    return conn.execute(
+        f"""
+        SELECT r.run_id, r.scope, r.status
+        FROM report_sync_run r LEFT JOIN sync_job j ON j.run_id = r.run_id
+        WHERE r.scope IN ({", ".join("?" * len(scopes))})
+          AND (r.status = 'queued' OR (r.status = 'running' AND j.heartbeat_at >= ?))
+        ORDER BY r.status = 'queued', r.created_at LIMIT 1
+        """,
+        (*scopes, _ago(STALE_AFTER_SECONDS)),
+    ).fetchone()
+
+
+def lease_run(db: DB, scope: str, mode: str, reason: str, worker_id: str, *, max_attempts: int = 1) -> str:
+    """Start and lease a run outside the queue (sync.py / cron), so it heartbeats too; returns its run_id.
+
+    The same CONFLICTS rule claim() applies holds here: if a conflicting run is queued
+    or running (with a live lease), ScopeBusy is raised and nothing is written.
+    """
+    with db.conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        busy = _conflicting(conn, scope)
+        if busy:
+            raise ScopeBusy(
+                f"{scope} sync refused: {busy['scope']} run {busy['run_id']} is {busy['status']}; "
+                "retry when it finishes"
+            )
+        run_id, now = _uuid4(), _now_iso()
+        conn.execute(
+            """
+            INSERT INTO report_sync_run(run_id, scope, mode, reason, status, started_at)
+            VALUES (?, ?, ?, ?, 'running', ?)
+            """,
+            (run_id, scope, mode, reason, now),
+        )
+        conn.execute(
+            """
+            INSERT INTO sync_job(run_id, scope, attempts, max_attempts, worker_id, heartbeat_at)
+            VALUES (?, ?, 1, ?, ?, ?)
+            """,
+            (run_id, scope, max_attempts, worker_id, now),
+        )
+    return run_id
+
+
+def release(db: DB, run_id: str) -> None:
+    with db.conn() as conn:
+        conn.execute("DELETE FROM sync_job WHERE run_id = ?", (run_id,))
+
+
+def claim(db: DB, worker_id: str) -> Job | None:
+    """Take the oldest queued run whose scope is free; None when nothing is runnable."""
+    with db.conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        running = {
+            r["scope"] for r in conn.execute("SELECT DISTINCT scope FROM report_sync_run WHERE status = 'running'")
+        }
+        rows = conn.execute(
+            """
+            SELECT r.run_id, r.scope, r.mode, r.reason, j.attempts
+            FROM report_sync_run r JOIN sync_job j ON j.run_id = r.run_id
+            WHERE r.status = 'queued'
+            ORDER BY j.enqueued_at, r.created_at
+            """
+        ).fetchall()
+        for row in rows:
+            if CONFLICTS.get(row["scope"], {row["scope"]}) & running:
+                continue
+            now = _now_iso()
+            conn.execute(
+                "UPDATE report_sync_run SET status = 'running', started_at = COALESCE(started_at, ?) WHERE run_id = ?",
+                (now, row["run_id"]),
+            )
+            conn.execute(
+                "UPDATE sync_job SET attempts = attempts + 1, worker_id = ?, heartbeat_at = ? WHERE run_id = ?",
+                (worker_id, now, row["run_id"]),
+            )
+            return Job(row["run_id"], row["scope"], row["mode"], row["reason"], row["attempts"] + 1)
+    return None
+
+
+def heartbeat(db: DB, run_id: str, worker_id: str) -> bool:
+    """Refresh the lease; False if this worker no longer holds it (reaped and re-queued)."""
+    with db.conn() as conn:
+        cur = conn.execute(
+            "UPDATE sync_job SET heartbeat_at = ? WHERE run_id = ? AND worker_id = ?",
+            (_now_iso(), run_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+
+def complete(
+    db: DB, run_id: str, worker_id: str, status: str, stats: dict[str, Any], error_text: str | None,
+) -> bool:
+    """Finish a run and drop its lease, unless the lease has passed to another worker."""
+    with db.conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        held = conn.execute(
+            "SELECT 1 FROM sync_job WHERE run_id = ? AND worker_id = ?", (run_id, worker_id),
+        ).fetchone()
+        if not held:
+            _log.warning("run %s: lease lost before completion, result dropped", run_id)
+            return False
+        conn.execute("DELETE FROM sync_job WHERE run_id = ?", (run_id,))
+    db.finish_sync_run(run_id, status, stats, error_text)
+    return True
+
+
+def reap(db: DB, stale_after: float = STALE_AFTER_SECONDS) -> dict[str, int]:
+    """Re-queue or fail running jobs whose heartbeat is stale; fail lease-less orphans."""
+    cutoff = _ago(stale_after)
+    counts = {"requeued": 0, "failed": 0, "orphaned": 0}
+    with db.conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        stale = conn.execute(
+            """
+            SELECT r.run_id, j.attempts, j.max_attempts, j.heartbeat_at
+            FROM report_sync_run r JOIN sync_job j ON j.run_id = r.run_id
+            WHERE r.status = 'running' AND (j.heartbeat_at IS NULL OR j.heartbeat_at < ?)
+            """,
+            (cutoff,),
+        ).fetchall()
+        for row in stale:
+            lost = f"worker lost (last heartbeat {row['heartbeat_at']}, attempt {row['attempts']})"
+            if row["attempts"] < row["max_attempts"]:
+                conn.execute(
+                    "UPDATE report_sync_run SET status = 'queued', error_text = ? WHERE run_id = ?",
+                    (f"{lost}; re-queued", row["run_id"]),
+                )
+                conn.execute(
+                    "UPDATE sync_job SET worker_id = NULL, heartbeat_at = NULL WHERE run_id = ?", (row["run_id"],),
+                )
+                counts["requeued"] += 1
+            else:
+                conn.execute(
+                    "UPDATE report_sync_run SET status = 'failed', ended_at = ?, error_text = ? WHERE run_id = ?",
+                    (_now_iso(), lost, row["run_id"]),
+                )
+                conn.execute("DELETE FROM sync_job WHERE run_id = ?", (row["run_id"],))
+                counts["failed"] += 1
+        # Runs left 'running' by the old in-API BackgroundTasks runner have no lease at all.
+        cur = conn.execute(
+            """
+            UPDATE report_sync_run
+               SET status = 'failed', ended_at = ?, error_text = 'orphaned: no worker lease'
+             WHERE status = 'running'
+               AND run_id NOT IN (SELECT run_id FROM sync_job)
+               AND COALESCE(started_at, created_at) < ?
+            """,
+            (_now_iso(), cutoff),
+        )
+        counts["orphaned"] = cur.rowcount
+    if any(counts.values()):
+        _log.warning("sync queue reaper: %s", counts)
+    return counts
+
+
+def queue_state(db: DB) -> list[dict[str, Any]]:
+    """Queued and running runs with their lease, oldest first."""
+    with db.conn() as conn:
+        return conn.execute(
+            """
+            SELECT r.run_id, r.scope, r.mode, r.reason, r.status, r.started_at, r.created_at,
+                   json_extract(r.stats, '$.progress.percent') AS progress_pct,
+                   j.attempts, j.worker_id, j.heartbeat_at
+            FROM report_sync_run r LEFT JOIN sync_job j ON j.run_id = r.run_id
+            WHERE r.status IN ('queued', 'running')
+            ORDER BY r.created_at
+            """
+        ).fetchall()
+
+
+class LeaseLost(RuntimeError):
+    """The run's lease was reaped while it was still running; raised by check_lease."""
+
+
+# (run_id, thread ident) of runs whose Heartbeat found the lease gone. Keyed by the
+# thread that runs the sync, so a later claim of the same run_id elsewhere is unaffected.
+_lost: set[tuple[str, int]] = set()
+_lost_lock = threading.Lock()
+
+
+def check_lease(run_id: str | None) -> None:
+    """Raise LeaseLost if this thread's run lost its lease; sync loops call it between items."""
+    if run_id is None:
+        return
+    with _lost_lock:
+        lost = (run_id, threading.get_ident()) in _lost
+    if lost:
+        raise LeaseLost(f"run {run_id}: lease lost, stopping")
+
+
+class Heartbeat:
+    """Context manager that refreshes a lease every HEARTBEAT_SECONDS on a daemon thread.
+
+    When the lease is gone, check_lease(run_id) starts raising LeaseLost in the thread
+    that entered the context.
+    """
+
+    def __init__(self, db: DB, run_id: str, worker_id: str, interval: float = HEARTBEAT_SECONDS) -> None:
+        self.db = db
+        self.run_id = run_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = threading.Event()
+        self._owner = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{run_id[:8]}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if not heartbeat(self.db, self.run_id, self.worker_id):
+                    with _lost_lock:
+                        _lost.add((self.run_id, self._owner))
+                    self.lost.set()
+                    return
+            except Exception as exc:
+                _log.warning("heartbeat for %s failed: %s", self.run_id, exc)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        with _lost_lock:
+            _lost.discard((self.run_id, self._owner))
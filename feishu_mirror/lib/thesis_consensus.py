@@ -0,0 +1,165 @@
+"""Street view per company from report_thesis (report_thesis_consensus, /v1/theses/consensus).
+
+One row per canonical company (lib/entities.py) and time bucket: 'all' plus one
+per publish month (YYYY-MM, from the report's publish_date, else its update or
+extraction time). Each row counts theses by direction and by direction x
+confidence, the reports behind them, and the catalysts and risks most often
+cited, de-duplicated across reports on their normalized text.
+
+Materialized like report_metric_series: _write_theses (and _write_metadata, whose
+publish_date moves a report between buckets) recompute the companies a report
+touched in the same transaction.
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from .db import DB
+from .entities import normalize, resolve
+
+DIRECTIONS = ("bullish", "bearish", "neutral")
+CONFIDENCES = ("high", "medium", "low")
+_CONFIDENCE_WEIGHT = {"high": 1.0, "medium": 0.6, "low": 0.3}
+TOP_ITEMS = 8
+
+_MONTH = re.compile(r"(\d{4})\s*(?:[-/.年])\s*(\d{1,2})")
+
+
+def month_bucket(*dates: Any) -> str | None:
+    """YYYY-MM of the first parseable date ("2024-05-01", "2024/5/1", "2024年5月")."""
+    for d in dates:
+        m = _MONTH.search(str(d or ""))
+        if m and 1 <= int(m.group(2)) <= 12:
+            return f"{m.group(1)}-{int(m.group(2)):02d}"
+    return None
+
+
+def _entities(conn, doc_id: str) -> set[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT value_norm FROM report_entity WHERE kind = 'company' AND layer = 2 AND doc_id = ?",
+        (doc_id,),
+    ).fetchall()
+    return {r["value_norm"] for r in rows}
+
+
+def _top(items: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+    ranked = sorted(items.values(), key=lambda i: (-len(i["docs"]), -i["mentions"], i["text"]))[:TOP_ITEMS]
+    return [{"text": i["text"], "n_reports": len(i["docs"])} for i in ranked]
+
+
+def _aggregate(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    counts = Counter(r["direction"] for r in rows)
+    matrix = {d: {c: 0 for c in CONFIDENCES} for d in DIRECTIONS}
+    items: dict[str, dict[str, dict[str, Any]]] = {"catalysts": {}, "risks": {}}
+    for r in rows:
+        matrix[r["direction"]][r["confidence"]] += 1
+        for field, column in (("catalysts", "key_catalysts"), ("risks", "key_risks")):
+            for text in json.loads(r[column] or "[]"):
+                key = normalize(text)
+                if not key:
+                    continue
+                item = items[field].setdefault(key, {"text": str(text).strip(), "docs": set(), "mentions": 0})
+                item["docs"].add(r["doc_id"])
+                item["mentions"] += 1
+    weight = sum(_CONFIDENCE_WEIGHT[r["confidence"]] for r in rows)
+    signed = sum(
+        _CONFIDENCE_WEIGHT[r["confidence"]] * {"bullish": 1, "bearish": -1}.get(r["direction"], 0) for r in rows
+    )
+    return {
+        "bullish": counts["bullish"],
+        "bearish": counts["bearish"],
+        "neutral": counts["neutral"],
+        "by_confidence": matrix,
+        "n_reports": len({r["doc_id"] for r in rows}),
+        # Confidence-weighted balance in [-1, 1]: +1 all bullish, -1 all bearish.
+        "net_score": round(signed / weight, 3) if weight else 0.0,
+        "top_catalysts": _top(items["catalysts"]),
+        "top_risks": _top(items["risks"]),
+        "latest_at": max(r["reported_at"] or "" for r in rows),
+    }
+
+
+def refresh_entities(conn, entities: Iterable[str]) -> int:
+    """Recompute every bucket of the given company keys; returns rows written."""
+    written = 0
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    for entity in entities:
+        conn.execute("DELETE FROM report_thesis_consensus WHERE entity = ?", (entity,))
+        rows = conn.execute(
+            """
+            SELECT t.doc_id, t.direction, t.confidence, t.key_catalysts, t.key_risks,
+                   me.publish_date, d.updated_time, t.extracted_at,
+                   COALESCE(me.publish_date, d.updated_time, t.extracted_at) AS reported_at
+            FROM report_thesis t
+            JOIN report_document d ON d.doc_id = t.doc_id
+            LEFT JOIN report_meta_enriched me ON me.doc_id = t.doc_id
+            WHERE t.id IN (SELECT row_id FROM report_entity WHERE kind = 'company' AND value_norm = ? AND layer = 2)
+            """,
+            (entity,),
+        ).fetchall()
+        if not rows:
+            continue
+        buckets: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for r in rows:
+            buckets["all"].append(r)
+            month = month_bucket(r["publish_date"], r["updated_time"], r["extracted_at"])
+            if month:
+                buckets[month].append(r)
+        for bucket, members in buckets.items():
+            agg = _aggregate(members)
+            conn.execute(
+                """
+                INSERT INTO report_thesis_consensus(
+                    entity, bucket, bullish, bearish, neutral, by_confidence, n_reports, net_score,
+                    top_catalysts, top_risks, latest_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    entity, bucket, agg["bullish"], agg["bearish"], agg["neutral"],
+                    json.dumps(agg["by_confidence"]), agg["n_reports"], agg["net_score"],
+                    json.dumps(agg["top_catalysts"], ensure_ascii=False),
+                    json.dumps(agg["top_risks"], ensure_ascii=False), agg["latest_at"], now,
+                ),
+            )
+            written += 1
+    return written
+
+
+def rebuild_consensus(db: DB) -> int:
+    with db.conn() as conn:
+        conn.execute("DELETE FROM report_thesis_consensus")
+        entities = conn.execute(
+            "SELECT DISTINCT value_norm FROM report_entity WHERE kind = 'company' AND layer = 2"
+        ).fetchall()
+        return refresh_entities(conn, [e["value_norm"] for e in entities])
+
+
+def _decode(row: dict[str, Any]) -> dict[str, Any]:
+    for key in ("by_confidence", "top_catalysts", "top_risks"):
+        row[key] = json.loads(row[key])
+    return row
+
+
+def query_consensus(db: DB, company: str, months: int = 12) -> dict[str, Any] | None:
+    """The overall street view of a company plus its last `months` monthly buckets, oldest first."""
+    with db.conn() as conn:
+        entity = resolve(conn, "company", company)
+        rows = conn.execute(
+            "SELECT * FROM report_thesis_consensus WHERE entity = ? ORDER BY bucket DESC",
+            (entity,),
+        ).fetchall()
+    overall = next((r for r in rows if r["bucket"] == "all"), None)
+    if overall is None:
+        return None
+    monthly = [r for r in rows if r["bucket"] != "all"][:months]
+    trend = [
+        {k: r[k] for k in ("bucket", "bullish", "bearish", "neutral", "n_reports", "net_score")}
+        for r in reversed(monthly)
+    ]
+    overall = _decode(overall)
+    del overall["entity"], overall["bucket"]
+    return {"company": entity, **overall, "trend": trend}
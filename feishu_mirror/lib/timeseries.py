@@ -0,0 +1,154 @@
+"""Vectorized OHLCV resampling, LTTB downsampling and summary stats for history responses."""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+
+INTERVALS = ("D", "W", "M", "Q")
+
+
+def _column(rows: list[dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([np.nan if r.get(key) is None else float(r[key]) for r in rows], dtype="float64")
+
+
+def _dates(rows: list[dict[str, Any]], date_key: str) -> np.ndarray:
+    return np.array([str(r[date_key])[:10] for r in rows], dtype="datetime64[D]")
+
+
+def _num(value: float) -> float | None:
+    """NaN/inf → None so the value is JSON-safe."""
+    v = float(value)
+    return None if math.isnan(v) or math.isinf(v) else v
+
+
+def _period_keys(dates: np.ndarray, interval: str) -> np.ndarray:
+    days = dates.astype("int64")
+    if interval == "W":
+        return (days + 3) // 7  # weeks starting Monday (1970-01-01 was a Thursday)
+    months = dates.astype("datetime64[M]").astype("int64")
+    if interval == "M":
+        return months
+    return months // 3
+
+
+def resample_ohlcv(rows: list[dict[str, Any]], interval: str, date_key: str = "trade_date") -> list[dict[str, Any]]:
+    """Aggregate daily bars (oldest first) into W/M/Q bars.
+
+    open=first, high=max, low=min, close=last, volume=sum. Each output bar carries the
+    date of the last daily bar in its period plus the number of daily bars it covers.
+    """
+    if interval == "D" or not rows:
+        return rows
+    keys = _period_keys(_dates(rows, date_key), interval)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    ends = np.concatenate([starts[1:], [len(rows)]]) - 1
+
+    opens, closes = _column(rows, "open"), _column(rows, "close")
+    highs, lows = _column(rows, "high"), _column(rows, "low")
+    has_volume = any(r.get("volume") is not None for r in rows)
+    volumes = np.add.reduceat(np.nan_to_num(_column(rows, "volume")), starts)
+    with np.errstate(invalid="ignore"):
+        period_high = np.fmax.reduceat(highs, starts)
+        period_low = np.fmin.reduceat(lows, starts)
+
+    out = []
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        bar = {k: v for k, v in rows[e].items() if k != "meta"}
+        bar.update({
+            "open": _num(opens[s]),
+            "high": _num(period_high[i]),
+            "low": _num(period_low[i]),
+            "close": _num(closes[e]),
+            "bars": int(e - s + 1),
+        })
+        if "volume" in bar:
+            bar["volume"] = _num(volumes[i]) if has_volume else None
+        out.append(bar)
+    return out
+
+
+def lttb_downsample(
+    rows: list[dict[str, Any]],
+    max_points: int,
+    date_key: str = "trade_date",
+    value_key: str = "close",
+) -> list[dict[str, Any]]:
+    """Largest-Triangle-Three-Buckets: keep max_points rows that preserve the visual shape.
+
+    Rows without a value are dropped; first and last rows are always kept.
+    """
+    y_all = _column(rows, value_key)
+    valid = np.flatnonzero(np.isfinite(y_all))
+    n = len(valid)
+    if max_points >= n or max_points < 3:
+        return [rows[i] for i in valid]
+
+    x = _dates([rows[i] for i in valid], date_key).astype("float64")
+    y = y_all[valid]
+
+    # Bucket edges over the interior points; bucket means for the look-ahead vertex.
+    edges = np.linspace(1, n - 1, max_points - 1).astype("int64")
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+
+    picked = np.empty(max_points, dtype="int64")
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nx, ny = (avg_x[b + 1], avg_y[b + 1]) if b + 1 < len(avg_x) else (x[-1], y[-1])
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[b + 1] = a
+    return [rows[valid[i]] for i in picked]
+
+
+def summarize(rows: list[dict[str, Any]], date_key: str = "trade_date", value_key: str = "close") -> dict[str, Any]:
+    """Server-side summary of a daily series: range, change, extremes, drawdown, volatility."""
+    y_all = _column(rows, value_key)
+    valid = np.flatnonzero(np.isfinite(y_all))
+    if not len(valid):
+        return {"count": len(rows)}
+    y = y_all[valid]
+    dates = [str(rows[i][date_key])[:10] for i in valid]
+    highs = np.where(np.isfinite(_column(rows, "high")), _column(rows, "high"), y_all)[valid]
+    lows = np.where(np.isfinite(_column(rows, "low")), _column(rows, "low"), y_all)[valid]
+    hi, lo = int(np.argmax(highs)), int(np.argmin(lows))
+
+    drawdown = y / np.maximum.accumulate(y) - 1.0
+    returns = np.diff(np.log(y)) if len(y) > 1 else np.array([])
+
+    return {
+        "count": len(rows),
+        "first_date": dates[0],
+        "last_date": dates[-1],
+        "first": _num(y[0]),
+        "last": _num(y[-1]),
+        "change_pct": _num((y[-1] / y[0] - 1.0) * 100) if y[0] else None,
+        "high": _num(highs[hi]),
+        "high_date": dates[hi],
+        "low": _num(lows[lo]),
+        "low_date": dates[lo],
+        "mean": _num(y.mean()),
+        "max_drawdown_pct": _num(drawdown.min() * 100),
+        "daily_vol_pct": _num(returns.std(ddof=1) * 100) if len(returns) > 1 else None,
+    }
+
+
+def shape_history(
+    rows: list[dict[str, Any]],
+    *,
+    interval: str = "D",
+    max_points: int | None = None,
+    date_key: str = "trade_date",
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Summary over the full daily series, then resample, then downsample."""
+    summary = summarize(rows, date_key=date_key)
+    shaped = resample_ohlcv(rows, interval, date_key=date_key)
+    if max_points and len(shaped) > max_points:
+        shaped = lttb_downsample(shaped, max_points, date_key=date_key)
+    summary["interval"] = interval
+    summary["points"] = len(shaped)
+    return shaped, summary
@@ -0,0 +1,301 @@
+"""Pool of pre-warmed TradingView chart pages for screenshots.
+
+The sync Playwright API is bound to the thread that started it, so each pool slot is a
+worker thread owning its own Playwright driver, browser, context and page. A slot loads
+the TradingView app shell once and afterwards switches symbol / interval in-page via
+the chart widget API (falling back to a full navigation if that API is unavailable).
+The number of slots is the concurrency limit; idle slots health-check their page and
+re-warm it when it has crashed or been recycled.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any
+
+_log = logging.getLogger(__name__)
+
+CHART_URL = "https://www.tradingview.com/chart/?symbol={symbol}&interval={interval}&theme=dark"
+WARM_SYMBOL = "NASDAQ:AAPL"
+
+DEFAULT_VIEWPORT = (1280, 800)
+NAV_TIMEOUT_MS = 15000
+CANVAS_TIMEOUT_MS = 10000
+SWITCH_TIMEOUT_MS = 8000
+# Short settle after the chart reports the new symbol loaded (replaces the fixed 1500ms wait).
+SETTLE_MS = 300
+# Idle slots run a health check this often.
+HEALTH_CHECK_SECONDS = 60
+# Recreate the context after this many renders to cap Chromium memory growth.
+RECYCLE_AFTER_RENDERS = 200
+
+# Third-party trackers the chart does not need; aborting them shortens page load.
+_BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net", "facebook.com")
+
+_SWITCH_JS = """
+([symbol, interval, timeoutMs]) => new Promise((resolve) => {
+  const api = window.TradingViewApi;
+  if (!api || typeof api.activeChart !== "function") return resolve(false);
+  let done = false;
+  const finish = (ok) => { if (!done) { done = true; resolve(ok); } };
+  try {
+    const chart = api.activeChart();
+    if (typeof chart.resolution === "function" && chart.resolution() !== interval) {
+      chart.setResolution(interval);
+    }
+    chart.setSymbol(symbol, () => finish(true));
+  } catch (e) {
+    finish(false);
+  }
+  setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+
+class _Slot:
+    """One worker thread with its own Playwright driver, browser, context and warm page."""
+
+    def __init__(self, pool: "TradingViewPool", index: int) -> None:
+        self.pool = pool
+        self.index = index
+        self._pw = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._current: tuple[str, str] | None = None
+        self._renders = 0
+        self.thread = threading.Thread(target=self._run, name=f"tv-pool-{index}", daemon=True)
+
+    # ── Lifecycle ──
+
+    def _warm(self) -> None:
+        if self._browser is None or not self._browser.is_connected():
+            self._stop_driver()
+            from playwright.sync_api import sync_playwright
+
+            self._pw = sync_playwright().start()
+            self._browser = self._pw.chromium.launch(headless=True)
+        w, h = DEFAULT_VIEWPORT
+        self._context = self._browser.new_context(viewport={"width": w, "height": h})
+        self._context.route("**/*", _route_blocker)
+        self._page = self._context.new_page()
+        self._navigate(WARM_SYMBOL, "D")
+        self._renders = 0
+        _log.info("tv-pool-%d warm", self.index)
+
+    def _close_context(self) -> None:
+        try:
+            if self._context is not None:
+                self._context.close()
+        except Exception:
+            pass
+        self._context = self._page = None
+        self._current = None
+
+    def _stop_driver(self) -> None:
+        self._close_context()
+        try:
+            if self._browser is not None:
+                self._browser.close()
+        except Exception as exc:
+            _log.warning("tv-pool-%d: browser close failed: %s", self.index, exc)
+        try:
+            if self._pw is not None:
+                self._pw.stop()
+        except Exception as exc:
+            _log.warning("tv-pool-%d: playwright stop failed: %s", self.index, exc)
+        self._browser = self._pw = None
+
+    def _healthy(self) -> bool:
+        try:
+            return (
+                self._page is not None
+                and not self._page.is_closed()
+                and self._browser.is_connected()
+                and bool(self._page.evaluate("() => !!document.querySelector('canvas')"))
+            )
+        except Exception:
+            return False
+
+    def _ensure_warm(self) -> None:
+        if self._renders >= RECYCLE_AFTER_RENDERS:
+            self._close_context()
+        if not self._healthy():
+            self._close_context()
+            self._warm()
+
+    # ── Rendering ──
+
+    def _navigate(self, tv_symbol: str, interval: str) -> None:
+        # "domcontentloaded" rather than "networkidle": TradingView keeps loading
+        # analytics long after the chart is usable; the canvas selector is the signal.
+        url = CHART_URL.format(symbol=tv_symbol, interval=interval)
+        self._page.goto(url, wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
+        self._page.wait_for_selector("canvas", timeout=CANVAS_TIMEOUT_MS)
+        self._wait_for_symbol(tv_symbol)
+        self._current = (tv_symbol, interval)
+
+    def _wait_for_symbol(self, tv_symbol: str) -> None:
+        ticker = tv_symbol.split(":")[-1]
+        try:
+            self._page.wait_for_function(
+                "(t) => document.title.toUpperCase().includes(t)", arg=ticker, timeout=SWITCH_TIMEOUT_MS,
+            )
+        except Exception:
+            _log.debug("tv-pool-%d: title never showed %s", self.index, ticker)
+        self._page.wait_for_timeout(SETTLE_MS)
+
+    def _switch(self, tv_symbol: str, interval: str) -> str:
+        if self._current == (tv_symbol, interval):
+            return "reuse"
+        ok = False
+        try:
+            ok = bool(self._page.evaluate(_SWITCH_JS, [tv_symbol, interval, SWITCH_TIMEOUT_MS]))
+        except Exception as exc:
+            _log.debug("tv-pool-%d: in-page switch failed: %s", self.index, exc)
+        if ok:
+            self._wait_for_symbol(tv_symbol)
+            self._current = (tv_symbol, interval)
+            return "switch"
+        self._navigate(tv_symbol, interval)
+        return "navigate"
+
+    def _render(self, tv_symbol: str, interval: str, size: tuple[int, int]) -> bytes:
+        self._ensure_warm()
+        vp = self._page.viewport_size or {}
+        if (vp.get("width"), vp.get("height")) != tuple(size):
+            self._page.set_viewport_size({"width": size[0], "height": size[1]})
+        try:
+            how = self._switch(tv_symbol, interval)
+            png = self._page.screenshot(type="png")
+        except Exception:
+            # Leave the slot clean for the next job; the error goes back to the caller.
+            self._close_context()
+            raise
+        self._renders += 1
+        self.pool._count(how)
+        return png
+
+    def _run(self) -> None:
+        if self.pool.prewarm:
+            try:
+                self._warm()
+            except Exception as exc:
+                _log.warning("tv-pool-%d: prewarm failed: %s", self.index, exc)
+        while True:
+            try:
+                job = self.pool._jobs.get(timeout=HEALTH_CHECK_SECONDS)
+            except queue.Empty:
+                if self._page is not None and not self._healthy():
+                    _log.info("tv-pool-%d: unhealthy page, re-warming", self.index)
+                    try:
+                        self._close_context()
+                        self._warm()
+                    except Exception as exc:
+                        _log.warning("tv-pool-%d: re-warm failed: %s", self.index, exc)
+                continue
+            if job is None:
+                self._stop_driver()
+                return
+            future, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._render(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+
+
+def _route_blocker(route) -> None:
+    if any(host in route.request.url for host in _BLOCKED_HOSTS):
+        route.abort()
+    else:
+        route.continue_()
+
+
+class TradingViewPool:
+    """Fixed-size pool of TradingView pages; size is the render concurrency limit."""
+
+    def __init__(self, size: int = 2, *, prewarm: bool = True, render_timeout: float = 30.0) -> None:
+        self.size = max(1, size)
+        self.prewarm = prewarm
+        self.render_timeout = render_timeout
+        self._jobs: queue.Queue = queue.Queue(maxsize=self.size * 4)
+        self._stats = {"renders": 0, "reuse": 0, "switch": 0, "navigate": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()
+        self._slots = [_Slot(self, i) for i in range(self.size)]
+        for slot in self._slots:
+            slot.thread.start()
+
+    def _count(self, how: str) -> None:
+        with self._stats_lock:
+            self._stats["renders"] += 1
+            self._stats[how] += 1
+
+    def screenshot(self, tv_symbol: str, interval: str = "D", size: tuple[int, int] = DEFAULT_VIEWPORT) -> bytes:
+        """PNG of the chart; blocks until a slot is free (bounded by render_timeout)."""
+        future: Future = Future()
+        deadline = time.monotonic() + self.render_timeout
+        try:
+            self._jobs.put((future, (tv_symbol, interval, tuple(size))), timeout=self.render_timeout)
+        except queue.Full:
+            raise RuntimeError("TradingView pool busy") from None
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0.1))
+        except FutureTimeout:
+            future.cancel()
+            with self._stats_lock:
+                self._stats["timeouts"] += 1
+            raise TimeoutError(f"TradingView render timed out after {self.render_timeout:.0f}s") from None
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {"size": self.size, "queued": self._jobs.qsize(), **self._stats}
+
+    def close(self) -> None:
+        for _ in self._slots:
+            try:
+                self._jobs.put_nowait(None)
+            except queue.Full:
+                break
+        for slot in self._slots:
+            slot.thread.join(timeout=5)
+
+
+_pool: TradingViewPool | None = None
+_pool_lock = threading.Lock()
+_pool_config: dict[str, Any] = {"size": 2, "prewarm": False}
+
+
+def configure_tradingview_pool(size: int, *, prewarm: bool = True) -> None:
+    """Set the pool size; with prewarm the slots start loading TradingView right away."""
+    global _pool
+    if multiprocessing.parent_process() is not None:
+        return  # a render-pool worker re-importing the main module: no browsers here
+    with _pool_lock:
+        _pool_config.update(size=size, prewarm=prewarm)
+        if prewarm and _pool is None:
+            _pool = TradingViewPool(size, prewarm=True)
+
+
+def get_tradingview_pool() -> TradingViewPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TradingViewPool(_pool_config["size"], prewarm=_pool_config["prewarm"])
+        return _pool
+
+
+def _shutdown_pool() -> None:
+    """Shut Chromium down on process exit to avoid zombie processes."""
+    if _pool is not None:
+        _pool.close()
+
+
+atexit.register(_shutdown_pool)
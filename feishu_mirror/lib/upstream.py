@@ -0,0 +1,184 @@
+"""Async upstream layer: pooled httpx clients with per-upstream concurrency and timeouts.
+
+Upstreams reached over plain HTTP (SEC EDGAR, FMP, Feishu) get one httpx.AsyncClient
+each, with keep-alive pooling sized to the upstream's concurrency limit. Upstreams
+only reachable through a blocking SDK (yfinance, Artemis, ddgs, fredapi, Playwright)
+run on a dedicated thread pool of the same size, so a slow SDK can exhaust its own
+workers but not the event loop or the other upstreams.
+
+Limits can be overridden with UPSTREAM_LIMITS, e.g. "yfinance=4:20,feishu=8:30"
+(name=concurrency:timeout_seconds).
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class UpstreamLimit:
+    concurrency: int
+    timeout: float
+
+
+DEFAULT_LIMITS: dict[str, UpstreamLimit] = {
+    "yfinance": UpstreamLimit(8, 30.0),
+    "artemis": UpstreamLimit(4, 30.0),
+    "sec": UpstreamLimit(4, 30.0),     # EDGAR asks for <= 10 req/s per client
+    "fmp": UpstreamLimit(4, 15.0),
+    "fred": UpstreamLimit(4, 30.0),
+    "feishu": UpstreamLimit(8, 60.0),  # image upload is multipart, allow more than JSON calls
+    "web": UpstreamLimit(4, 35.0),     # ddgs search and the Playwright page reader
+    "chart": UpstreamLimit(4, 60.0),   # waits on the TradingView page pool / render process pool
+}
+
+
+def parse_limits(spec: str) -> dict[str, UpstreamLimit]:
+    """'yfinance=4:20,feishu=8' → overrides on top of DEFAULT_LIMITS."""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, value = item.partition("=")
+        conc, _, timeout = value.partition(":")
+        base = limits.get(name.strip(), UpstreamLimit(4, 30.0))
+        try:
+            limits[name.strip()] = UpstreamLimit(
+                int(conc) if conc else base.concurrency, float(timeout) if timeout else base.timeout,
+            )
+        except ValueError:
+            _log.warning("ignoring bad UPSTREAM_LIMITS entry %r", item)
+    return limits
+
+
+class UpstreamTimeout(TimeoutError):
+    pass
+
+
+class Upstreams:
+    """Per-upstream httpx clients, semaphores and SDK thread pools.
+
+    Create inside the running event loop (the API lifespan) and aclose() on shutdown.
+    """
+
+    def __init__(self, limits: dict[str, UpstreamLimit] | None = None) -> None:
+        self.limits = limits or dict(DEFAULT_LIMITS)
+        self._clients: dict[str, Any] = {}
+        self._sems: dict[str, asyncio.Semaphore] = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def limit(self, name: str) -> UpstreamLimit:
+        return self.limits.get(name) or UpstreamLimit(4, 30.0)
+
+    def _sem(self, name: str) -> asyncio.Semaphore:
+        sem = self._sems.get(name)
+        if sem is None:
+            sem = self._sems[name] = asyncio.Semaphore(self.limit(name).concurrency)
+        return sem
+
+    def _count(self, name: str, key: str) -> None:
+        counts = self.stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0})
+        counts[key] += 1
+
+    def client(self, name: str):
+        """The pooled AsyncClient for an HTTP upstream."""
+        client = self._clients.get(name)
+        if client is None:
+            import httpx
+
+            lim = self.limit(name)
+            client = self._clients[name] = httpx.AsyncClient(
+                timeout=httpx.Timeout(lim.timeout, connect=min(lim.timeout, 10.0)),
+                limits=httpx.Limits(max_connections=lim.concurrency, max_keepalive_connections=lim.concurrency),
+                follow_redirects=True,
+            )
+        return client
+
+    async def request(self, name: str, method: str, url: str, **kwargs: Any):
+        """One HTTP call to upstream `name`; waits for a concurrency slot first."""
+        import httpx
+
+        async with self._sem(name):
+            self._count(name, "calls")
+            try:
+                return await self.client(name).request(method, url, **kwargs)
+            except httpx.TimeoutException as exc:
+                self._count(name, "timeouts")
+                raise UpstreamTimeout(f"{name}: {method} timed out after {self.limit(name).timeout:g}s") from exc
+            except Exception:
+                self._count(name, "errors")
+                raise
+
+    async def get_json(self, name: str, url: str, **kwargs: Any) -> Any:
+        resp = await self.request(name, "GET", url, **kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _executor(self, name: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(name)
+        if executor is None:
+            executor = self._executors[name] = ThreadPoolExecutor(
+                max_workers=self.limit(name).concurrency, thread_name_prefix=f"upstream-{name}",
+            )
+        return executor
+
+    async def run_sync(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking SDK call on upstream `name`'s thread pool, bounded by its timeout.
+
+        The timeout counts from when a worker thread picks the call up, not from submission:
+        waiting behind a busy pool is not the upstream being slow. On timeout the caller
+        gets UpstreamTimeout right away; the worker thread finishes the call in the
+        background and its slot frees up when it does.
+        """
+        return await self._run(name, functools.partial(fn, *args, **kwargs), self.limit(name).timeout)
+
+    async def run_sync_untimed(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """run_sync without the timeout, for non-idempotent calls (creates): a timed-out
+        create still completes in the background, and the client's retry would duplicate it."""
+        return await self._run(name, functools.partial(fn, *args, **kwargs), None)
+
+    async def _run(self, name: str, call: Callable[[], T], timeout: float | None) -> T:
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def run() -> T:
+            loop.call_soon_threadsafe(started.set)
+            return call()
+
+        self._count(name, "calls")
+        future = loop.run_in_executor(self._executor(name), run)
+        if timeout is not None:
+            waiter = asyncio.ensure_future(started.wait())
+            try:
+                await asyncio.wait({future, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._count(name, "timeouts")
+            raise UpstreamTimeout(f"{name} timed out after {timeout:g}s") from None
+        except Exception:
+            self._count(name, "errors")
+            raise
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            name: {"concurrency": lim.concurrency, "timeout": lim.timeout, **self.stats.get(name, {})}
+            for name, lim in self.limits.items()
+        }
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
@@ -4,6 +4,7 @@ Runs Playwright in a subprocess to avoid the sync-API-in-asyncio conflict with F
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import subprocess
@@ -64,3 +65,30 @@ def fetch_page(url: str, timeout_ms: int = 15000, max_chars: int = 8000) -> dict
     except Exception as e:
         logger.error("Failed to fetch %s: %s", url, e)
         return {"url": url, "title": "", "content": "", "error": str(e)}
+
+
+async def fetch_page_async(url: str, timeout_ms: int = 15000, max_chars: int = 8000) -> dict[str, Any]:
+    """fetch_page on an asyncio subprocess, so the wait does not hold a worker thread."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", _FETCH_SCRIPT, url, str(max_chars), str(timeout_ms),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+    except Exception as e:
+        logger.error("Failed to fetch %s: %s", url, e)
+        return {"url": url, "title": "", "content": "", "error": str(e)}
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {"url": url, "title": "", "content": "", "error": "timeout (30s)"}
+    if proc.returncode != 0:
+        err = stderr.decode(errors="replace").strip().split("\n")[-1] if stderr else "unknown error"
+        logger.error("web_reader subprocess failed: %s", err)
+        return {"url": url, "title": "", "content": "", "error": err}
+    try:
+        return json.loads(stdout)
+    except ValueError as e:
+        logger.error("Failed to fetch %s: %s", url, e)
+        return {"url": url, "title": "", "content": "", "error": str(e)}
@@ -4,8 +4,6 @@ from __future__ import annotations
 import logging
 from typing import Any, Optional
 
-from ddgs import DDGS
-
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +29,8 @@ class WebSearchClient:
             region = f"{country.lower()}-{search_lang or 'en'}"
 
         try:
+            from ddgs import DDGS
+
             raw = DDGS().text(
                 q,
                 max_results=min(count, 20),
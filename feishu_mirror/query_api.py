@@ -1,25 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json as _json
 import logging
-from datetime import datetime
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
+from lib.columnar_store import open_columnar_store
 from lib.config import ensure_runtime_dirs, load_settings
 from lib.db import DB
 from lib.db_market import (
+    configure_columnar_store,
     get_quote_latest,
     get_watchlist,
     query_chain_daily,
+    query_chain_range,
     query_fin_statement,
-    query_price_daily,
-    query_protocol_daily,
+    query_price_columns,
+    query_price_range,
+    query_price_watermarks,
+    query_protocol_range,
     query_token_liquidity,
     upsert_fin_statement,
     upsert_price_daily,
@@ -36,34 +46,39 @@ from lib.db_kol import (
     upsert_kol,
 )
 from lib.db_structured import (
+    ensure_entity_index,
     get_report_structured,
     query_enriched_reports,
     query_metrics,
     query_theses,
+    search_structured,
+    SEARCH_KINDS,
     structurize_stats,
 )
-from lib.jobs import (
-    ensure_schema,
-    run_all_sync,
-    run_feishu_sync,
-    run_financials_sync,
-    run_local_sync,
-    run_market_sync,
-)
+from lib.doc_outline import MAX_TEXT_RANGE, doc_overview, text_range
+from lib.jobs import ensure_schema
+from lib.metric_series import query_series
+from lib.thesis_consensus import query_consensus
 from lib.web_search import WebSearchClient
-from lib.web_reader import fetch_page
-from lib.chart_render import render_bar_chart, render_line_chart, render_multi_line_chart, render_tradingview_screenshot
-from lib.feishu_api import FeishuAuth, FeishuClient
+from lib.web_reader import fetch_page_async
+from lib.feishu_api import AsyncFeishuClient, FeishuAuth, FeishuClient
 from lib.feishu_bitable import FeishuBitableClient
 from lib.market_api import ArtemisClient, YFinanceClient
-from lib.sec_api import SECEdgarClient
+from lib.market_cache import read_through
+from lib.render_cache import RenderCache, date_bucket, open_render_cache, render_key
+from lib.render_pool import RENDERERS, configure_render_pool, render_chart, render_pool_stats
+from lib.tradingview_pool import configure_tradingview_pool, get_tradingview_pool
+from lib.sec_api import AsyncSECEdgarClient
+from lib.scheduler import read_schedule_state
+from lib.sync_queue import enqueue, queue_state
+from lib.upstream import Upstreams, UpstreamTimeout, parse_limits
 from lib.openbb_api import (
     get_macro_indicator,
     get_macro_overview,
     get_equity_profile,
     get_equity_ratios,
     get_analyst_estimates,
-    get_insider_trading,
+    get_insider_trading_async,
     get_institutional_holders,
     get_forex_quote,
     get_forex_history,
@@ -104,12 +119,15 @@ class ChartRenderRequest(BaseModel):
     title: str = Field(min_length=1)
     data: Any = None  # list[dict] for line/bar, list[{label, data}] for multi_line; optional for candlestick with symbol
     y_label: str = ""
-    symbol: Optional[str] = None           # e.g. "GOOGL", "AAVE" — used for TradingView screenshot
-    asset_class: Optional[str] = None      # "stock" | "crypto" — used for TradingView screenshot
+    symbol: Optional[str] = None           # e.g. "GOOGL", "AAVE" — chart drawn from market_price_daily
+    asset_class: Optional[str] = None      # "stock" | "crypto"
+    renderer: str = Field("local", pattern="^(local|tradingview)$")  # tradingview = headless screenshot
+    days: int = Field(120, ge=5, le=3650)  # history window for symbol charts rendered locally
     chat_id: Optional[str] = None          # group chat id (oc_xxx)
     open_id: Optional[str] = None          # user open_id for DM (ou_xxx)
     receive_id: Optional[str] = None       # generic receive_id
     receive_id_type: str = "chat_id"       # chat_id | open_id
+    cache: bool = True                     # reuse a cached PNG / image_key for identical inputs
 
 
 class BitableCreateRequest(BaseModel):
@@ -122,20 +140,70 @@ class BitableCreateRequest(BaseModel):
 settings = load_settings(str(Path(__file__).parent / ".env"))
 ensure_runtime_dirs(settings)
 db = DB(settings.database_url)
-ensure_schema(db, Path(__file__).parent / "schema.sql")
+render_cache: RenderCache | None = None
+# httpx clients / SDK thread pools per upstream; created in the lifespan (needs the event loop)
+upstreams: Upstreams | None = None
 
 _DEFAULT_OWNER = "ou_ec332c4e35a82229099b7a04b89488ee"
 
-# Auto-seed KOL watchlist from JSON if table is empty
-if not get_kol_list(db):
-    _kol_json = Path(__file__).parent / "kol_config.json"
-    if _kol_json.exists():
-        seed_kol_from_json(db, _kol_json, owner_id=_DEFAULT_OWNER)
-
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s: %(message)s")
-app = FastAPI(title="Beiduoduo Report Query API", version="1.0.0")
 _log = logging.getLogger(__name__)
 
+# Seconds spent in each start-up step, filled by _startup() (see --profile-startup).
+STARTUP_TIMINGS: dict[str, float] = {}
+
+
+def _seed_kol() -> None:
+    """Auto-seed KOL watchlist from JSON if table is empty."""
+    if not get_kol_list(db):
+        kol_json = Path(__file__).parent / "kol_config.json"
+        if kol_json.exists():
+            seed_kol_from_json(db, kol_json, owner_id=_DEFAULT_OWNER)
+
+
+def _open_render_cache() -> None:
+    global render_cache
+    render_cache = open_render_cache(settings)
+
+
+def _startup() -> None:
+    """Schema, seeds and pools: run once when the server starts, not at import time."""
+    steps = [
+        ("ensure_schema", lambda: ensure_schema(db, Path(__file__).parent / "schema.sql")),
+        ("entity_index", lambda: ensure_entity_index(db)),
+        ("columnar_store", lambda: configure_columnar_store(open_columnar_store(settings))),
+        ("kol_seed", _seed_kol),
+        ("tradingview_pool", lambda: configure_tradingview_pool(
+            settings.tradingview_pool_size, prewarm=settings.tradingview_prewarm)),
+        ("render_cache", _open_render_cache),
+        ("render_pool", lambda: configure_render_pool(
+            settings.chart_render_workers, timeout=settings.chart_render_timeout_seconds)),
+    ]
+    for name, step in steps:
+        t0 = time.perf_counter()
+        step()
+        STARTUP_TIMINGS[name] = round(time.perf_counter() - t0, 4)
+    _log.info("startup steps (s): %s", STARTUP_TIMINGS)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    global upstreams
+    _startup()
+    upstreams = Upstreams(parse_limits(settings.upstream_limits))
+    yield
+    await upstreams.aclose()
+    _get_sec_async.cache_clear()
+    _get_feishu_async.cache_clear()
+
+
+app = FastAPI(title="Beiduoduo Report Query API", version="1.0.0", lifespan=_lifespan)
+
+
+@app.exception_handler(UpstreamTimeout)
+async def _upstream_timeout(_request, exc: UpstreamTimeout) -> JSONResponse:
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 
 @lru_cache(maxsize=1)
 def _get_yf() -> YFinanceClient:
@@ -147,9 +215,15 @@ def _get_artemis() -> ArtemisClient:
     return ArtemisClient(settings.artemis_api_key)
 
 
+def _up() -> Upstreams:
+    if upstreams is None:
+        raise RuntimeError("upstream layer not started (the app lifespan did not run)")
+    return upstreams
+
+
 @lru_cache(maxsize=1)
-def _get_sec() -> SECEdgarClient:
-    return SECEdgarClient(settings.sec_edgar_user_agent)
+def _get_sec_async() -> AsyncSECEdgarClient:
+    return AsyncSECEdgarClient(_up(), settings.sec_edgar_user_agent)
 
 
 @lru_cache(maxsize=1)
@@ -157,6 +231,12 @@ def _get_feishu() -> FeishuClient:
     return FeishuClient(FeishuAuth(app_id=settings.feishu_app_id, app_secret=settings.feishu_app_secret))
 
 
+@lru_cache(maxsize=1)
+def _get_feishu_async() -> AsyncFeishuClient:
+    auth = FeishuAuth(app_id=settings.feishu_app_id, app_secret=settings.feishu_app_secret)
+    return AsyncFeishuClient(auth, _up())
+
+
 @lru_cache(maxsize=1)
 def _get_web_search() -> WebSearchClient:
     return WebSearchClient()
@@ -170,12 +250,68 @@ def _cache_write(fn) -> None:
         _log.warning("cache write failed: %s", exc)
 
 
-def _send_feishu_image(png: bytes, rid: str, rid_type: str, result: dict[str, Any]) -> None:
-    """Upload PNG to Feishu and send to rid. Mutates result dict."""
+def _window_start(days: int) -> str:
+    return (datetime.utcnow().date() - timedelta(days=days)).isoformat()
+
+
+def _render_cached(parts: dict[str, Any], render) -> tuple[bytes, Optional[str], Optional[str], bool]:
+    """(png, cached image_key, cache key, hit). On a miss, render() runs and the PNG is stored."""
+    if render_cache is None:
+        return render(), None, None, False
+    key = render_key(**parts)
+    hit = render_cache.get(key)
+    if hit is not None:
+        return hit[0], hit[1], key, True
+    png = render()
+    _cache_write(lambda: render_cache.put(key, png))
+    return png, None, key, False
+
+
+def _tradingview_chart(symbol: str, asset_class: str) -> tuple[dict[str, Any], Any]:
+    """Cache parts + render callable for a TradingView screenshot (live data, bucketed by day)."""
+    from lib.chart_render import render_tradingview_screenshot  # matplotlib: defer to first chart
+
+    parts = {"source": "tradingview", "symbol": symbol.upper(), "asset_class": asset_class,
+             "interval": "D", "bucket": date_bucket()}
+    return parts, lambda: render_tradingview_screenshot(symbol, asset_class)
+
+
+def _local_price_chart(
+    chart_type: str, symbol: str, asset_class: str, title: str, y_label: str, rows: list[dict],
+) -> tuple[dict[str, Any], Any]:
+    """Cache parts + render callable for a chart drawn locally from daily bars.
+
+    candlestick → K-line with volume and MAs; any other chart_type → line of closes.
+    """
+    bars = [
+        {k: r.get(k) for k in ("trade_date", "open", "high", "low", "close", "volume")}
+        for r in rows if r.get("close") is not None
+    ]
+    kind = "candlestick" if chart_type == "candlestick" else "line"
+    parts = {"source": "local", "chart_type": kind, "symbol": symbol.upper(), "asset_class": asset_class,
+             "title": title, "y_label": y_label, "data": bars}
+    return parts, lambda: render_chart(kind, bars, title, y_label=y_label)
+
+
+async def _send_feishu_image(
+    png: bytes,
+    rid: str,
+    rid_type: str,
+    result: dict[str, Any],
+    *,
+    cache_key: Optional[str] = None,
+    image_key: Optional[str] = None,
+) -> None:
+    """Upload PNG to Feishu (unless image_key is already known) and send to rid. Mutates result dict."""
     try:
-        client = _get_feishu()
-        image_key = client.upload_image(png)
-        resp = client.send_image_as_card(rid, image_key, receive_id_type=rid_type)
+        client = _get_feishu_async()
+        if image_key:
+            result["image_key_cached"] = True
+        else:
+            image_key = await client.upload_image(png)
+            if cache_key and render_cache is not None:
+                _cache_write(lambda: render_cache.set_image_key(cache_key, image_key))
+        resp = await client.send_image_as_card(rid, image_key, receive_id_type=rid_type)
         result["image_key"] = image_key
         result["sent_to"] = rid
         msg_id = resp.get("message_id", "") if isinstance(resp, dict) else ""
@@ -191,6 +327,21 @@ def health() -> dict:
     return {"ok": "true"}
 
 
+@app.get("/v1/chart/pool")
+def chart_pool_stats() -> dict:
+    """Chart pipeline stats: TradingView page pool, render cache, local render process pool."""
+    stats = get_tradingview_pool().stats()
+    stats["render_cache"] = render_cache.stats() if render_cache is not None else None
+    stats["render_pool"] = render_pool_stats()
+    return stats
+
+
+@app.get("/v1/upstreams")
+async def upstream_stats() -> dict:
+    """Per-upstream concurrency limit, timeout and call / error / timeout counters."""
+    return _up().snapshot()
+
+
 @app.get("/v1/search")
 def search(
     q: str = Query(..., min_length=1),
@@ -233,102 +384,76 @@ def search(
 
 
 @app.get("/v1/docs/{doc_id}")
-def get_doc(doc_id: str):
-    doc = db.get_document(doc_id)
-    if not doc:
+def get_doc(doc_id: str, view: str = Query("summary", pattern="^(summary|sections|full)$")):
+    """A document at the requested depth.
+
+    summary: meta, layer-1 summary and outline (headings, slides, sheets, pages with offsets);
+    sections: plus every chunk's offsets and a short preview; full: plus full_text.
+    Fetch spans with /v1/docs/{doc_id}/text instead of full where possible.
+    """
+    overview = doc_overview(db, doc_id, previews=view != "summary")
+    if overview is None:
         raise HTTPException(status_code=404, detail="doc not found")
+    if view == "full":
+        overview["full_text"] = text_range(db, doc_id, 0, overview["chars"])["text"]
+    return overview
 
-    chunks = doc.pop("chunks", [])
-    sections = [
-        {
-            "chunk_id": chunk["chunk_id"],
-            "chunk_index": chunk["chunk_index"],
-            "section": chunk.get("section"),
-            "start_offset": chunk["start_offset"],
-            "end_offset": chunk["end_offset"],
-        }
-        for chunk in chunks
-    ]
-    citations = [
-        {
-            "doc_id": doc["doc_id"],
-            "chunk_id": chunk["chunk_id"],
-            "quote": chunk["content"],
-            "start_offset": chunk["start_offset"],
-            "end_offset": chunk["end_offset"],
-        }
-        for chunk in chunks
-    ]
 
-    return {
-        "meta": doc,
-        "full_text": doc.get("full_text", ""),
-        "sections": sections,
-        "citations": citations,
-    }
+@app.get("/v1/docs/{doc_id}/text")
+def get_doc_text(
+    doc_id: str,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(default=None, ge=0),
+):
+    """A span of a document's text by the offsets of /v1/search hits, sections or the outline."""
+    end = start + MAX_TEXT_RANGE if end is None else end
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'end' must be after 'start'")
+    result = text_range(db, doc_id, start, min(end, start + MAX_TEXT_RANGE))
+    if result is None:
+        raise HTTPException(status_code=404, detail="doc not found")
+    return result
 
 
 @app.post("/v1/sync/run")
-def run_sync(payload: SyncRunRequest, background_tasks: BackgroundTasks):
-    run_id = db.start_sync_run(payload.scope, payload.mode, payload.reason)
-
-    def _runner() -> None:
-        try:
-            if payload.scope == "local":
-                result = run_local_sync(
-                    db, settings, mode=payload.mode, reason=payload.reason, run_id=run_id
-                )
-            elif payload.scope == "feishu":
-                result = run_feishu_sync(
-                    db, settings, mode=payload.mode, reason=payload.reason, run_id=run_id
-                )
-            elif payload.scope == "market":
-                result = run_market_sync(
-                    db, settings, mode=payload.mode, reason=payload.reason, run_id=run_id
-                )
-            elif payload.scope == "financials":
-                result = run_financials_sync(
-                    db, settings, mode=payload.mode, reason=payload.reason, run_id=run_id
-                )
-            else:
-                result = run_all_sync(
-                    db, settings, mode=payload.mode, reason=payload.reason, run_id=run_id
-                )
-            db.finish_sync_run(run_id, "success", result.get("stats", {}), None)
-        except Exception as exc:
-            db.finish_sync_run(run_id, "failed", {}, str(exc))
-
-    db.finish_sync_run(run_id, "running", {"queued": True}, None)
-    background_tasks.add_task(_runner)
-    return {"run_id": run_id, "status": "queued"}
+def run_sync(payload: SyncRunRequest):
+    """Queue a sync run for sync_worker.py; a run already queued for the scope absorbs the request."""
+    run_id, deduplicated = enqueue(db, payload.scope, payload.mode, payload.reason)
+    return {"run_id": run_id, "status": "queued", "deduplicated": deduplicated}
 
 
 @app.get("/v1/sync/status")
 def sync_status():
     status = db.sync_status()
+    status["queue"] = queue_state(db)
+    status["schedule"] = read_schedule_state(settings)
     status["recent_runs"] = db.recent_sync_runs(20)
     return status
 
 
-# ── Market & On-chain Endpoints (real-time with write-through cache) ──
+# ── Market & On-chain Endpoints (read-through DB cache, write-back of upstream rows) ──
+
+
+def _market_upstream(asset_class: str) -> str:
+    return "yfinance" if asset_class == "stock" else "artemis"
 
 
 @app.get("/v1/market/quote")
-def market_quote(
+async def market_quote(
     symbol: str = Query(..., min_length=1),
     asset_class: str = Query(..., pattern="^(stock|crypto)$"),
 ):
     """Real-time quote: calls yfinance (stock) or Artemis (crypto), caches to DB."""
-    quote = None
     if asset_class == "stock":
-        quote = _get_yf().get_quote(symbol)
+        fetch = lambda: _get_yf().get_quote(symbol)
     else:
-        quote = _get_artemis().get_crypto_quote(symbol)
+        fetch = lambda: _get_artemis().get_crypto_quote(symbol)
+    quote = await _up().run_sync(_market_upstream(asset_class), fetch)
 
     if not quote:
         raise HTTPException(status_code=404, detail=f"quote not found for {symbol}")
 
-    _cache_write(lambda: upsert_quote_latest(
+    await run_in_threadpool(_cache_write, lambda: upsert_quote_latest(
         db, quote["symbol"], asset_class,
         quote.get("price"), quote.get("change_pct"),
         quote.get("volume"), quote.get("market_cap"),
@@ -337,52 +462,211 @@ def market_quote(
     return quote
 
 
+def _price_history(symbol: str, asset_class: str, days: int, *, cache: bool = True) -> tuple[list[dict], dict]:
+    """Daily bars for the last `days` days via the read-through cache; upstream rows are written back."""
+    if asset_class == "stock":
+        fetch = lambda n: _get_yf().get_history(symbol, days=n)
+    else:
+        fetch = lambda n: _get_artemis().get_crypto_history(symbol, days=n)
+
+    if cache:
+        stored = query_price_range(db, symbol, asset_class, _window_start(days))
+        rows, fetched, source = read_through(
+            f"price:{asset_class}:{symbol.upper()}", stored, fetch, date_key="trade_date", days=days,
+        )
+    else:
+        rows = fetched = fetch(days)
+        source = {"mode": "upstream", "db_rows": 0, "upstream_rows": len(rows), "fetched_days": days}
+
+    _cache_write(lambda: upsert_price_daily(db, fetched))
+    return rows, source
+
+
+async def _price_history_async(
+    symbol: str, asset_class: str, days: int, *, cache: bool = True,
+) -> tuple[list[dict], dict]:
+    """_price_history on the upstream's thread pool (it blocks on the SDK and on SQLite)."""
+    return await _up().run_sync(_market_upstream(asset_class), _price_history, symbol, asset_class, days, cache=cache)
+
+
 @app.get("/v1/market/history")
-def market_history(
+async def market_history(
     symbol: str = Query(..., min_length=1),
     asset_class: str = Query(..., pattern="^(stock|crypto)$"),
     days: int = Query(30, ge=1, le=3650),
     chart: bool = Query(True, description="Auto-render candlestick chart"),
     chat_id: Optional[str] = Query(None, description="Feishu chat_id to auto-send chart"),
     open_id: Optional[str] = Query(None, description="Feishu open_id to auto-send chart"),
+    cache: bool = Query(True, description="Serve stored bars from DB, fetch only missing recent days"),
+    interval: str = Query("D", pattern="^(D|W|M|Q)$", description="Resample daily bars to W/M/Q OHLCV"),
+    max_points: Optional[int] = Query(None, ge=10, le=5000, description="LTTB downsample to at most N points"),
+    chart_renderer: str = Query("local", pattern="^(local|tradingview)$", description="local K-line or TradingView screenshot"),
 ):
-    """Real-time history: calls yfinance (stock) or Artemis (crypto), caches to DB."""
-    if asset_class == "stock":
-        rows = _get_yf().get_history(symbol, days=days)
-    else:
-        rows = _get_artemis().get_crypto_history(symbol, days=days)
+    """History: stored bars from DB, missing recent days from yfinance (stock) or Artemis (crypto).
 
-    _cache_write(lambda: upsert_price_daily(db, rows))
+    The summary block is computed over the full daily series before interval/max_points shaping.
+    """
+    from lib.timeseries import shape_history
 
-    result: dict[str, Any] = {"symbol": symbol.upper(), "asset_class": asset_class, "days": days, "data": rows}
+    rows, source = await _price_history_async(symbol, asset_class, days, cache=cache)
+    data, summary = await run_in_threadpool(shape_history, rows, interval=interval, max_points=max_points)
+    result: dict[str, Any] = {
+        "symbol": symbol.upper(), "asset_class": asset_class, "days": days,
+        "summary": summary, "data": data, "source": source,
+    }
 
     if chart and rows:
         try:
-            png = render_tradingview_screenshot(symbol, asset_class)
+            if chart_renderer == "tradingview":
+                parts, render = _tradingview_chart(symbol, asset_class)
+            else:
+                parts, render = _local_price_chart(
+                    "candlestick", symbol, asset_class, f"{symbol.upper()} 日K ({days}d)", "", rows,
+                )
+            png, image_key, cache_key, _ = await _up().run_sync("chart", _render_cached, parts, render)
             result["chart_base64"] = base64.b64encode(png).decode()
+            result["chart_renderer"] = chart_renderer
             rid = chat_id or open_id
             if rid:
-                _send_feishu_image(png, rid, "chat_id" if chat_id else "open_id", result)
+                await _send_feishu_image(png, rid, "chat_id" if chat_id else "open_id", result,
+                                   cache_key=cache_key, image_key=image_key)
         except Exception as exc:
-            _log.warning("TradingView screenshot failed for %s: %s", symbol, exc)
-            result["chart_error"] = f"截图失败: {exc}"
+            _log.warning("chart render failed for %s (%s): %s", symbol, chart_renderer, exc)
+            failed = "截图失败" if chart_renderer == "tradingview" else "图表渲染失败"
+            result["chart_error"] = f"{failed}: {exc}"
+
+    return result
 
+
+def _parse_symbols(symbols: str, default_asset_class: str, limit: int = 50) -> list[tuple[str, str]]:
+    """'NVDA,ETH:crypto' → [("NVDA", default), ("ETH", "crypto")]; de-duplicated, order kept."""
+    parsed: list[tuple[str, str]] = []
+    for token in symbols.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        sym, _, ac = token.partition(":")
+        ac = ac.strip().lower() or default_asset_class
+        if ac not in ("stock", "crypto"):
+            raise HTTPException(status_code=400, detail=f"invalid asset_class in {token!r}")
+        item = (sym.strip().upper(), ac)
+        if item not in parsed:
+            parsed.append(item)
+    if not parsed:
+        raise HTTPException(status_code=400, detail="symbols is empty")
+    if len(parsed) > limit:
+        raise HTTPException(status_code=400, detail=f"at most {limit} symbols per call")
+    return parsed
+
+
+async def _refresh_histories(pairs: list[tuple[str, str]], days: int, what: str) -> dict[str, str]:
+    """Top up market_price_daily for every pair concurrently; {symbol: error} for failures."""
+    results = await asyncio.gather(
+        *(_price_history_async(sym, ac, days) for sym, ac in pairs), return_exceptions=True,
+    )
+    errors = {}
+    for (sym, _), res in zip(pairs, results):
+        if isinstance(res, BaseException):
+            _log.warning("%s refresh failed for %s: %s", what, sym, res)
+            errors[sym] = str(res)
+    return errors
+
+
+@app.get("/v1/market/indicators")
+async def market_indicators(
+    symbols: str = Query(..., min_length=1, description="Comma-separated, e.g. NVDA,AAPL,ETH:crypto"),
+    asset_class: str = Query("stock", pattern="^(stock|crypto)$", description="Default for symbols without :class"),
+    refresh: bool = Query(True, description="Top up market_price_daily via the read-through cache first"),
+):
+    """SMA/EMA, RSI, MACD, Bollinger, realized vol and drawdown over market_price_daily, many symbols per call."""
+    from lib.indicators import LOOKBACK_DAYS, cached_indicators, compute_indicators
+
+    pairs = _parse_symbols(symbols, asset_class)
+    refresh_errors = await _refresh_histories(pairs, LOOKBACK_DAYS, "indicator") if refresh else {}
+
+    def compute() -> list[dict[str, Any]]:
+        start = _window_start(LOOKBACK_DAYS)
+        data = []
+        for sym, ac in pairs:
+            item: dict[str, Any] = {"symbol": sym, "asset_class": ac}
+            if sym in refresh_errors:
+                item["refresh_error"] = refresh_errors[sym]
+            cols = query_price_columns(db, sym, ac, start=start, columns=("close",))
+            if not len(cols["close"]):
+                item["error"] = "no price history"
+                data.append(item)
+                continue
+            key = (sym, ac, str(cols["date"][-1]), float(cols["close"][-1]))
+            item.update(cached_indicators(key, lambda: compute_indicators(cols["date"], cols["close"], asset_class=ac)))
+            data.append(item)
+        return data
+
+    data = await run_in_threadpool(compute)
+    return {"data": data, "count": len(data)}
+
+
+@app.get("/v1/market/correlation")
+async def market_correlation(
+    symbols: str = Query(..., min_length=1, description="Comma-separated, e.g. NVDA,AAPL,BTC:crypto"),
+    days: int = Query(365, ge=10, le=3650),
+    asset_class: str = Query("stock", pattern="^(stock|crypto)$", description="Default for symbols without :class"),
+    refresh: bool = Query(False, description="Top up every symbol via the read-through cache first"),
+    returns: bool = Query(False, description="Include the aligned daily return matrix"),
+):
+    """Correlation, beta and return stats across stocks and crypto, aligned on a shared calendar.
+
+    Reads stored history; only symbols with none in the window are fetched upstream,
+    unless refresh=true tops up all of them. The aligned result is cached per basket and
+    per-series watermark (last date, bar count, close sum), so repeat calls on an
+    unchanged watchlist skip loading the series entirely.
+    """
+    from lib.correlation import cached_report, correlation_report
+
+    pairs = _parse_symbols(symbols, asset_class)
+    if len(pairs) < 2:
+        raise HTTPException(status_code=400, detail="need at least 2 symbols")
+
+    refresh_errors = await _refresh_histories(pairs, days, "correlation") if refresh else {}
+
+    start = _window_start(days)
+    marks = await run_in_threadpool(query_price_watermarks, db, pairs, start)
+    unseen = [(sym, ac) for sym, ac in pairs if not marks.get((sym, ac), (None, 0))[1]]
+    if unseen and not refresh:
+        refresh_errors = await _refresh_histories(unseen, days, "correlation")
+        marks = await run_in_threadpool(query_price_watermarks, db, pairs, start)
+    missing = [sym for sym, ac in pairs if not marks.get((sym, ac), (None, 0))[1]]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"no price history for {', '.join(missing)}")
+
+    def compute() -> dict[str, Any]:
+        series = []
+        for sym, ac in pairs:
+            cols = query_price_columns(db, sym, ac, start=start, columns=("close",))
+            series.append((cols["date"], cols["close"]))
+        return correlation_report([sym for sym, _ in pairs], series, [ac for _, ac in pairs])
+
+    key = (start, tuple((sym, ac, *marks[(sym, ac)]) for sym, ac in pairs))
+    report = await run_in_threadpool(cached_report, key, compute)
+    result = {k: v for k, v in report.items() if returns or k not in ("returns", "return_dates")}
+    result["days"] = days
+    if refresh_errors:
+        result["refresh_errors"] = refresh_errors
     return result
 
 
 @app.get("/v1/financials")
-def financials(
+async def financials(
     entity_id: str = Query(..., min_length=1),
     entity_type: str = Query(..., pattern="^(stock|protocol)$"),
     limit: int = Query(8, ge=1, le=200),
 ):
     """Real-time financials: calls SEC EDGAR (stock) or Artemis (protocol)."""
     if entity_type == "stock":
-        rows = _get_sec().get_financials(entity_id)
+        rows = await _get_sec_async().get_financials(entity_id)
     else:
-        rows = _get_artemis().get_protocol_financials(entity_id)
+        rows = await _up().run_sync("artemis", lambda: _get_artemis().get_protocol_financials(entity_id))
 
-    _cache_write(lambda: upsert_fin_statement(db, rows))
+    await run_in_threadpool(_cache_write, lambda: upsert_fin_statement(db, rows))
 
     # Apply limit (most recent first)
     rows.sort(key=lambda r: r.get("period", ""), reverse=True)
@@ -391,40 +675,66 @@ def financials(
 
 
 @app.get("/v1/onchain/protocol")
-def onchain_protocol(
+async def onchain_protocol(
     protocol: str = Query(..., min_length=1),
     days: int = Query(30, ge=1, le=3650),
+    cache: bool = Query(True, description="Serve stored days from DB, fetch only missing recent days"),
 ):
-    """Real-time protocol metrics from Artemis (TVL, revenue, fees)."""
-    rows = _get_artemis().get_protocol_metrics(protocol, days=days)
-    _cache_write(lambda: upsert_protocol_daily(db, rows))
-    return {"protocol": protocol.lower(), "days": days, "data": rows}
+    """Protocol metrics (TVL, revenue, fees): stored days from DB, missing recent days from Artemis."""
+    return await _up().run_sync("artemis", _onchain_protocol, protocol, days, cache)
+
+
+def _onchain_protocol(protocol: str, days: int, cache: bool) -> dict:
+    fetch = lambda n: _get_artemis().get_protocol_metrics(protocol, days=n)
+    if cache:
+        stored = query_protocol_range(db, protocol, _window_start(days))
+        rows, fetched, source = read_through(
+            f"protocol:{protocol.lower()}", stored, fetch, date_key="metric_date", days=days,
+        )
+    else:
+        rows = fetched = fetch(days)
+        source = {"mode": "upstream", "db_rows": 0, "upstream_rows": len(rows), "fetched_days": days}
+    _cache_write(lambda: upsert_protocol_daily(db, fetched))
+    return {"protocol": protocol.lower(), "days": days, "data": rows, "source": source}
 
 
 @app.get("/v1/onchain/chain")
-def onchain_chain(
+async def onchain_chain(
     chain: str = Query(..., min_length=1),
     days: int = Query(30, ge=1, le=3650),
+    cache: bool = Query(True, description="Serve stored days from DB, fetch only missing recent days"),
 ):
-    """Real-time chain metrics from Artemis (txns, TVL)."""
-    rows = _get_artemis().get_chain_metrics(chain, days=days)
-    _cache_write(lambda: upsert_chain_daily(db, rows))
-    return {"chain": chain.lower(), "days": days, "data": rows}
+    """Chain metrics (txns, TVL): stored days from DB, missing recent days from Artemis."""
+    return await _up().run_sync("artemis", _onchain_chain, chain, days, cache)
+
+
+def _onchain_chain(chain: str, days: int, cache: bool) -> dict:
+    fetch = lambda n: _get_artemis().get_chain_metrics(chain, days=n)
+    if cache:
+        stored = query_chain_range(db, chain, _window_start(days))
+        rows, fetched, source = read_through(
+            f"chain:{chain.lower()}", stored, fetch, date_key="metric_date", days=days,
+        )
+    else:
+        rows = fetched = fetch(days)
+        source = {"mode": "upstream", "db_rows": 0, "upstream_rows": len(rows), "fetched_days": days}
+    _cache_write(lambda: upsert_chain_daily(db, fetched))
+    return {"chain": chain.lower(), "days": days, "data": rows, "source": source}
 
 
 @app.get("/v1/onchain/liquidity")
-def onchain_liquidity(
+async def onchain_liquidity(
     token: str = Query(..., min_length=1),
     chain: str = Query(..., min_length=1),
     days: int = Query(30, ge=1, le=3650),
 ):
     """Token liquidity — currently not available via Artemis SDK."""
-    rows = _get_artemis().get_token_liquidity(token, chain, days=days)
+    rows = await _up().run_sync("artemis", lambda: _get_artemis().get_token_liquidity(token, chain, days=days))
     return {"token": token.upper(), "chain": chain.lower(), "days": days, "data": rows}
 
 
 @app.get("/v1/web/search")
-def web_search(
+async def web_search(
     q: str = Query(..., min_length=1),
     count: int = Query(10, ge=1, le=20),
     offset: int = Query(0, ge=0, le=9),
@@ -433,19 +743,20 @@ def web_search(
     search_lang: Optional[str] = Query(default=None, min_length=2, max_length=5),
 ):
     """Web search via DuckDuckGo (free, no API key)."""
-    return _get_web_search().search(
+    return await _up().run_sync(
+        "web", _get_web_search().search,
         q=q, count=count,
         freshness=freshness, country=country, search_lang=search_lang,
     )
 
 
 @app.get("/v1/web/read")
-def web_read(
+async def web_read(
     url: str = Query(..., min_length=1),
     max_chars: int = Query(8000, ge=1000, le=30000),
 ):
     """Fetch a web page and extract text content using Playwright."""
-    return fetch_page(url, max_chars=max_chars)
+    return await fetch_page_async(url, max_chars=max_chars)
 
 
 @app.get("/v1/watchlist")
@@ -507,37 +818,54 @@ def kol_watchlist_disable(payload: KolDisableRequest):
 
 
 @app.post("/v1/chart/render")
-def chart_render(payload: ChartRenderRequest):
+async def chart_render(payload: ChartRenderRequest):
     """Render chart to PNG. Optionally upload to Feishu and send to chat."""
     data = payload.data
     if isinstance(data, str):
         data = _json.loads(data)
 
-    # Route 1: symbol provided → TradingView screenshot (唯一路径，不 fallback)
+    # Route 1: symbol provided → local chart from market_price_daily; TradingView when
+    # requested (renderer="tradingview") or when no price history is available.
     if payload.symbol:
-        png = render_tradingview_screenshot(payload.symbol, payload.asset_class or "stock")
-    else:
-        # Route 2: no symbol → local rendering for non-price charts only
-        if payload.chart_type == "candlestick":
-            raise HTTPException(
-                status_code=400,
-                detail="candlestick chart requires 'symbol' (uses TradingView screenshot)",
+        asset_class = payload.asset_class or "stock"
+        renderer = payload.renderer
+        rows: list[dict] = []
+        if renderer == "local":
+            try:
+                rows, _ = await _price_history_async(payload.symbol, asset_class, payload.days)
+            except Exception as exc:
+                _log.warning("local chart history failed for %s, falling back to TradingView: %s", payload.symbol, exc)
+            if not rows:
+                renderer = "tradingview"
+        if renderer == "local":
+            parts, render = _local_price_chart(
+                payload.chart_type, payload.symbol, asset_class, payload.title, payload.y_label, rows,
             )
+        else:
+            parts, render = _tradingview_chart(payload.symbol, asset_class)
+    else:
+        # Route 2: no symbol → local rendering of the given data
         if not data:
             raise HTTPException(
                 status_code=400,
-                detail=f"chart_type={payload.chart_type} requires 'data'",
+                detail=f"chart_type={payload.chart_type} requires 'data' or 'symbol'",
             )
-        if payload.chart_type == "line":
-            png = render_line_chart(data, payload.title, y_label=payload.y_label)
-        elif payload.chart_type == "multi_line":
-            png = render_multi_line_chart(data, payload.title, y_label=payload.y_label)
-        elif payload.chart_type == "bar":
-            png = render_bar_chart(data, payload.title, y_label=payload.y_label)
-        else:
+        if payload.chart_type not in RENDERERS:
             raise HTTPException(status_code=400, detail=f"unknown chart_type: {payload.chart_type}")
+        renderer = "local"
+        parts = {"source": "local", "chart_type": payload.chart_type, "title": payload.title,
+                 "y_label": payload.y_label, "data": data}
+        render = lambda: render_chart(payload.chart_type, data, payload.title, y_label=payload.y_label)
 
-    result: dict[str, Any] = {"image_base64": base64.b64encode(png).decode()}
+    try:
+        if payload.cache:
+            png, image_key, cache_key, hit = await _up().run_sync("chart", _render_cached, parts, render)
+        else:
+            png, image_key, cache_key, hit = await _up().run_sync("chart", render), None, None, False
+    except TimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+
+    result: dict[str, Any] = {"image_base64": base64.b64encode(png).decode(), "cached": hit, "renderer": renderer}
 
     # Resolve receive target: chat_id (group) or open_id (DM) or generic receive_id
     rid = payload.receive_id or payload.chat_id or payload.open_id
@@ -548,14 +876,19 @@ def chart_render(payload: ChartRenderRequest):
         rid_type = "open_id"
 
     if rid:
-        _send_feishu_image(png, rid, rid_type, result)
+        await _send_feishu_image(png, rid, rid_type, result, cache_key=cache_key, image_key=image_key)
 
     return result
 
 
 @app.post("/v1/bitable/create")
-def bitable_create(payload: BitableCreateRequest):
+async def bitable_create(payload: BitableCreateRequest):
     """Create a Feishu Bitable with fields and records."""
+    # No timeout: an abandoned create still finishes, so a client retry would make a duplicate.
+    return await _up().run_sync_untimed("feishu", _bitable_create, payload)
+
+
+def _bitable_create(payload: BitableCreateRequest) -> dict:
     client = _get_feishu()
     bitable = FeishuBitableClient(client)
 
@@ -617,6 +950,19 @@ def theses(
     return {"data": rows, "count": len(rows)}
 
 
+@app.get("/v1/theses/consensus")
+def theses_consensus(
+    company: str = Query(..., min_length=1),
+    months: int = Query(12, ge=0, le=60),
+):
+    """Street view of one company across reports: direction / confidence counts, net score,
+    top catalysts and risks, and the monthly trend (company may be a ticker or alias)."""
+    result = query_consensus(db, company, months=months)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"no theses for {company}")
+    return result
+
+
 @app.get("/v1/metrics")
 def metrics(
     company: Optional[str] = None,
@@ -629,6 +975,46 @@ def metrics(
     return {"data": rows, "count": len(rows)}
 
 
+@app.get("/v1/metrics/series")
+def metrics_series(
+    company: str = Query(..., min_length=1),
+    metric: str = Query(..., min_length=1),
+    period_kind: Optional[str] = Query(default=None, pattern="^(quarter|half|year)$"),
+    unit: Optional[str] = None,
+    estimates: bool = False,
+    pick: str = Query("consensus", pattern="^(consensus|latest)$"),
+    limit: int = Query(40, ge=1, le=200),
+):
+    """One metric of one company per period across reports (company may be a ticker or alias).
+
+    values[i] is the median across reports (pick=consensus) or the most recent
+    report's figure (pick=latest) for periods[i]; currency units are in millions.
+    """
+    series = query_series(
+        db, company, metric, period_kind=period_kind, unit=unit, estimates=estimates, pick=pick, limit=limit,
+    )
+    if not series["periods"] and not series["available"]:
+        raise HTTPException(status_code=404, detail=f"no {metric} series for {company}")
+    return series
+
+
+@app.get("/v1/search/structured")
+def search_structured_reports(
+    q: str = Query(..., min_length=1),
+    kinds: str = Query(",".join(SEARCH_KINDS), description="comma-separated: chunk,thesis,metric"),
+    field: Optional[str] = Query(default=None, pattern="^(thesis|catalysts|risks|metric|context)$"),
+    company: Optional[str] = None,
+    top_k: int = Query(settings.default_top_k, ge=1, le=50),
+):
+    """Full-text search over report chunks, theses (text, catalysts, risks) and metrics, ranked together."""
+    wanted = tuple(k.strip() for k in kinds.split(",") if k.strip())
+    unknown = [k for k in wanted if k not in SEARCH_KINDS]
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"kinds must be a subset of {','.join(SEARCH_KINDS)}")
+    hits = search_structured(db, q, kinds=wanted, field=field, company=company, top_k=top_k)
+    return {"query": q, "top_k": top_k, "hits": hits, "count": len(hits)}
+
+
 @app.get("/v1/reports/stats")
 def reports_stats():
     """Structurization progress stats."""
@@ -639,13 +1025,13 @@ def reports_stats():
 
 
 @app.get("/v1/macro/indicator")
-def macro_indicator(
+async def macro_indicator(
     series_id: str = Query(..., min_length=1),
     days: int = Query(365, ge=1, le=7300),
 ):
     """Single FRED macro indicator (GDP, CPI, FEDFUNDS, UNRATE, DGS10, M2SL)."""
     try:
-        rows = get_macro_indicator(series_id, days=days)
+        rows = await _up().run_sync("fred", get_macro_indicator, series_id, days=days)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     if not rows:
@@ -654,85 +1040,106 @@ def macro_indicator(
 
 
 @app.get("/v1/macro/overview")
-def macro_overview():
+async def macro_overview():
     """Key US macro indicators at a glance (GDP, CPI, Fed rate, unemployment, 10Y, M2)."""
     try:
-        data = get_macro_overview()
+        data = await _up().run_sync("fred", get_macro_overview)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return data
 
 
 @app.get("/v1/equity/profile")
-def equity_profile(symbol: str = Query(..., min_length=1)):
+async def equity_profile(symbol: str = Query(..., min_length=1)):
     """Company overview: sector, market cap, P/E, dividend yield, 52-week range."""
-    data = get_equity_profile(symbol)
+    data = await _up().run_sync("yfinance", get_equity_profile, symbol)
     if not data.get("price"):
         raise HTTPException(status_code=404, detail=f"profile not found for {symbol}")
     return data
 
 
 @app.get("/v1/equity/ratios")
-def equity_ratios(symbol: str = Query(..., min_length=1)):
+async def equity_ratios(symbol: str = Query(..., min_length=1)):
     """Valuation ratios: P/E, P/B, P/S, EV/EBITDA, ROE, ROA."""
-    return get_equity_ratios(symbol)
+    return await _up().run_sync("yfinance", get_equity_ratios, symbol)
 
 
 @app.get("/v1/equity/analysts")
-def equity_analysts(symbol: str = Query(..., min_length=1)):
+async def equity_analysts(symbol: str = Query(..., min_length=1)):
     """Analyst consensus: target price, rating, EPS estimates."""
-    return get_analyst_estimates(symbol)
+    return await _up().run_sync("yfinance", get_analyst_estimates, symbol)
 
 
 @app.get("/v1/equity/insiders")
-def equity_insiders(
+async def equity_insiders(
     symbol: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
 ):
     """Insider trading activity (FMP or yfinance fallback)."""
-    return {"symbol": symbol.upper(), "data": get_insider_trading(symbol, limit=limit)}
+    return {"symbol": symbol.upper(), "data": await get_insider_trading_async(symbol, limit, _up())}
 
 
 @app.get("/v1/equity/institutions")
-def equity_institutions(symbol: str = Query(..., min_length=1)):
+async def equity_institutions(symbol: str = Query(..., min_length=1)):
     """Top institutional holders."""
-    return {"symbol": symbol.upper(), "data": get_institutional_holders(symbol)}
+    return {"symbol": symbol.upper(), "data": await _up().run_sync("yfinance", get_institutional_holders, symbol)}
 
 
 @app.get("/v1/forex/quote")
-def forex_quote(pair: str = Query(..., min_length=3)):
+async def forex_quote(pair: str = Query(..., min_length=3)):
     """Real-time forex rate (USDCNY, EURUSD, USDJPY, etc.)."""
-    data = get_forex_quote(pair)
+    data = await _up().run_sync("yfinance", get_forex_quote, pair)
     if not data.get("price"):
         raise HTTPException(status_code=404, detail=f"forex quote not found for {pair}")
     return data
 
 
 @app.get("/v1/forex/history")
-def forex_history(
+async def forex_history(
     pair: str = Query(..., min_length=3),
     days: int = Query(365, ge=1, le=3650),
+    interval: str = Query("D", pattern="^(D|W|M|Q)$", description="Resample daily bars to W/M/Q OHLC"),
+    max_points: Optional[int] = Query(None, ge=10, le=5000, description="LTTB downsample to at most N points"),
 ):
-    """Historical forex rates."""
-    rows = get_forex_history(pair, days=days)
+    """Historical forex rates, optionally resampled/downsampled, with a summary block."""
+    from lib.timeseries import shape_history
+
+    rows = await _up().run_sync("yfinance", get_forex_history, pair, days=days)
     if not rows:
         raise HTTPException(status_code=404, detail=f"forex history not found for {pair}")
-    return {"pair": pair.upper(), "days": days, "data": rows}
+    data, summary = await run_in_threadpool(
+        shape_history, rows, interval=interval, max_points=max_points, date_key="date",
+    )
+    return {"pair": pair.upper(), "days": days, "summary": summary, "data": data}
 
 
 @app.get("/v1/options/chain")
-def options_chain(
+async def options_chain(
     symbol: str = Query(..., min_length=1),
     expiry: Optional[str] = Query(None),
 ):
     """Options chain: strikes, calls, puts, IV, Greeks, OI."""
-    data = get_options_chain(symbol, expiry=expiry)
+    data = await _up().run_sync("yfinance", get_options_chain, symbol, expiry=expiry)
     if not data.get("expirations"):
         raise HTTPException(status_code=404, detail=f"no options found for {symbol}")
     return data
 
 
 if __name__ == "__main__":
-    import uvicorn
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Beiduoduo report query API")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print an import-time breakdown and start-up step timings, then exit")
+    parser.add_argument("--top", type=int, default=25, help="rows in the --profile-startup breakdown")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from lib.startup_profile import print_startup_profile
+
+        _startup()
+        print_startup_profile(Path(__file__).parent, "query_api", STARTUP_TIMINGS, top=args.top)
+    else:
+        import uvicorn
 
-    uvicorn.run(app, host=settings.query_api_host, port=settings.query_api_port)
+        uvicorn.run(app, host=settings.query_api_host, port=settings.query_api_port)
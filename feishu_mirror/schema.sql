@@ -60,6 +60,17 @@ CREATE TABLE IF NOT EXISTS report_sync_run (
   created_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
+-- Lease for a queued/running report_sync_run row, owned by sync_worker.py.
+CREATE TABLE IF NOT EXISTS sync_job (
+  run_id TEXT PRIMARY KEY REFERENCES report_sync_run(run_id) ON DELETE CASCADE,
+  scope TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  worker_id TEXT,
+  heartbeat_at TEXT,
+  enqueued_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
 CREATE TABLE IF NOT EXISTS report_checkpoint (
   checkpoint_key TEXT PRIMARY KEY,
   cursor TEXT,
@@ -68,6 +79,31 @@ CREATE TABLE IF NOT EXISTS report_checkpoint (
   meta TEXT NOT NULL DEFAULT '{}'
 );
 
+-- Docs already handled by an unfinished paginated walk (space / folder), so a resumed
+-- walk skips them. walk_id is the run that started the walk; rows go once it completes.
+CREATE TABLE IF NOT EXISTS report_sync_item (
+  walk_id TEXT NOT NULL,
+  checkpoint_key TEXT NOT NULL,
+  item_token TEXT NOT NULL,
+  done_at TEXT NOT NULL DEFAULT (datetime('now')),
+  PRIMARY KEY (walk_id, checkpoint_key, item_token)
+);
+
+-- Mirrored Feishu Bitable records; each table is also indexed as one report_document
+-- (source_id feishu:bitable:<app_token>:<table_id>). Per-table watermarks live in
+-- report_checkpoint.
+CREATE TABLE IF NOT EXISTS feishu_bitable_record (
+  app_token TEXT NOT NULL,
+  table_id TEXT NOT NULL,
+  record_id TEXT NOT NULL,
+  fields TEXT NOT NULL DEFAULT '{}',
+  record_text TEXT NOT NULL DEFAULT '',
+  created_ms INTEGER,
+  modified_ms INTEGER,
+  synced_at TEXT NOT NULL DEFAULT (datetime('now')),
+  PRIMARY KEY (app_token, table_id, record_id)
+);
+
 CREATE TABLE IF NOT EXISTS report_whitelist (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   entry_type TEXT NOT NULL CHECK (entry_type IN ('space', 'folder', 'doc', 'drive_file')),
@@ -79,6 +115,16 @@ CREATE TABLE IF NOT EXISTS report_whitelist (
   updated_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
+-- Outline of a document (lib/doc_outline.py): headings, slides, sheets and PDF pages with
+-- their offsets into the chunked text. Built on first read; rebuilt when content_hash moves.
+CREATE TABLE IF NOT EXISTS report_doc_outline (
+  doc_id TEXT PRIMARY KEY REFERENCES report_document(doc_id) ON DELETE CASCADE,
+  content_hash TEXT NOT NULL,
+  chars INTEGER NOT NULL,
+  outline TEXT NOT NULL DEFAULT '[]',
+  updated_at TEXT NOT NULL
+);
+
 -- FTS5 virtual table for full-text search on chunks
 CREATE VIRTUAL TABLE IF NOT EXISTS report_chunk_fts USING fts5(
   chunk_id UNINDEXED,
@@ -192,6 +238,7 @@ CREATE INDEX IF NOT EXISTS idx_report_doc_source ON report_document(source_type,
 CREATE INDEX IF NOT EXISTS idx_report_doc_updated_time ON report_document(updated_time);
 CREATE INDEX IF NOT EXISTS idx_report_chunk_doc ON report_chunk(doc_id, chunk_index);
 CREATE INDEX IF NOT EXISTS idx_report_sync_run_status_time ON report_sync_run(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_sync_job_scope ON sync_job(scope);
 CREATE INDEX IF NOT EXISTS idx_report_whitelist_enabled ON report_whitelist(enabled, entry_type);
 
 CREATE TABLE IF NOT EXISTS kol_watchlist (
@@ -238,7 +285,8 @@ CREATE TABLE IF NOT EXISTS report_meta_enriched (
   summary TEXT,
   model_used TEXT NOT NULL,
   extracted_at TEXT NOT NULL DEFAULT (datetime('now')),
-  meta TEXT NOT NULL DEFAULT '{}'
+  meta TEXT NOT NULL DEFAULT '{}',
+  content_hash TEXT
 );
 
 -- Layer 2: 投资论点
@@ -256,6 +304,7 @@ CREATE TABLE IF NOT EXISTS report_thesis (
   model_used TEXT NOT NULL,
   extracted_at TEXT NOT NULL DEFAULT (datetime('now')),
   meta TEXT NOT NULL DEFAULT '{}',
+  content_hash TEXT,
   UNIQUE(doc_id, company)
 );
 
@@ -274,9 +323,104 @@ CREATE TABLE IF NOT EXISTS report_metric (
   model_used TEXT NOT NULL,
   extracted_at TEXT NOT NULL DEFAULT (datetime('now')),
   meta TEXT NOT NULL DEFAULT '{}',
+  content_hash TEXT,
   UNIQUE(doc_id, company, period, metric)
 );
 
+-- Which document version (report_document.content_hash) each layer was last built
+-- from, including layers that produced no rows or were skipped (no theses).
+CREATE TABLE IF NOT EXISTS report_layer_state (
+  doc_id TEXT NOT NULL REFERENCES report_document(doc_id) ON DELETE CASCADE,
+  layer INTEGER NOT NULL CHECK (layer IN (1, 2, 3)),
+  content_hash TEXT NOT NULL,
+  status TEXT NOT NULL CHECK (status IN ('done', 'skipped')),
+  items INTEGER NOT NULL DEFAULT 0,
+  model_used TEXT,
+  updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+  PRIMARY KEY (doc_id, layer)
+);
+
+-- Normalized companies (tickers included) / sectors / metric names of the layers above,
+-- for indexed filters instead of LIKE over JSON text. value_norm is the canonical key
+-- (lib/entities.py); row_id is the report_thesis / report_metric id for layers 2–3,
+-- 0 for layer-1 metadata.
+CREATE TABLE IF NOT EXISTS report_entity (
+  kind TEXT NOT NULL CHECK (kind IN ('company', 'sector', 'metric')),
+  value_norm TEXT NOT NULL,
+  layer INTEGER NOT NULL CHECK (layer IN (1, 2, 3)),
+  doc_id TEXT NOT NULL REFERENCES report_document(doc_id) ON DELETE CASCADE,
+  row_id INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (kind, value_norm, layer, doc_id, row_id)
+) WITHOUT ROWID;
+
+-- Alias dictionary: normalized surface form (谷歌 / google / googl) -> canonical key.
+-- 'seed' rows come from lib/entities.py; add 'manual' rows for local names.
+CREATE TABLE IF NOT EXISTS report_entity_alias (
+  kind TEXT NOT NULL CHECK (kind IN ('company', 'sector', 'metric')),
+  alias_norm TEXT NOT NULL,
+  canonical TEXT NOT NULL,
+  source TEXT NOT NULL DEFAULT 'manual',
+  PRIMARY KEY (kind, alias_norm)
+);
+
+-- FTS5 over the structured layers; rowid is the report_thesis / report_metric id,
+-- kept in sync by the lib/db_structured.py writers (catalysts / risks one per line).
+CREATE VIRTUAL TABLE IF NOT EXISTS report_thesis_fts USING fts5(
+  thesis_text,
+  key_catalysts,
+  key_risks,
+  tokenize='trigram'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS report_metric_fts USING fts5(
+  metric,
+  context,
+  tokenize='trigram'
+);
+
+-- Per-period metric series across reports (lib/metric_series.py): one row per canonical
+-- company, canonical metric, normalized period (2024Q3 / 2024H1 / 2024) and unit (currency
+-- amounts in millions). Materialized; the (company, metric) pairs a report touches are
+-- recomputed whenever its metrics are written.
+CREATE TABLE IF NOT EXISTS report_metric_series (
+  entity TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  period TEXT NOT NULL,
+  period_kind TEXT NOT NULL CHECK (period_kind IN ('quarter', 'half', 'year')),
+  period_start TEXT NOT NULL,
+  unit TEXT NOT NULL,
+  is_estimate INTEGER NOT NULL DEFAULT 0,
+  consensus REAL,
+  latest REAL,
+  latest_doc_id TEXT,
+  latest_at TEXT,
+  min_value REAL,
+  max_value REAL,
+  n_reports INTEGER NOT NULL,
+  doc_ids TEXT NOT NULL DEFAULT '[]',
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY (entity, metric, period, unit, is_estimate)
+) WITHOUT ROWID;
+
+-- Street view per canonical company (lib/thesis_consensus.py): thesis counts by direction
+-- and confidence, reports behind them and the most-cited catalysts / risks, for bucket
+-- 'all' and each publish month (YYYY-MM). Materialized; refreshed on every theses write.
+CREATE TABLE IF NOT EXISTS report_thesis_consensus (
+  entity TEXT NOT NULL,
+  bucket TEXT NOT NULL,
+  bullish INTEGER NOT NULL DEFAULT 0,
+  bearish INTEGER NOT NULL DEFAULT 0,
+  neutral INTEGER NOT NULL DEFAULT 0,
+  by_confidence TEXT NOT NULL DEFAULT '{}',
+  n_reports INTEGER NOT NULL,
+  net_score REAL NOT NULL DEFAULT 0,
+  top_catalysts TEXT NOT NULL DEFAULT '[]',
+  top_risks TEXT NOT NULL DEFAULT '[]',
+  latest_at TEXT,
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY (entity, bucket)
+) WITHOUT ROWID;
+
 CREATE INDEX IF NOT EXISTS idx_report_meta_enriched_doc ON report_meta_enriched(doc_id);
 CREATE INDEX IF NOT EXISTS idx_report_meta_enriched_type ON report_meta_enriched(report_type, extracted_at DESC);
 CREATE INDEX IF NOT EXISTS idx_report_thesis_doc ON report_thesis(doc_id);
@@ -285,3 +429,4 @@ CREATE INDEX IF NOT EXISTS idx_report_thesis_direction_time ON report_thesis(dir
 CREATE INDEX IF NOT EXISTS idx_report_metric_doc ON report_metric(doc_id);
 CREATE INDEX IF NOT EXISTS idx_report_metric_company ON report_metric(company, metric);
 CREATE INDEX IF NOT EXISTS idx_report_metric_extracted ON report_metric(extracted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_report_entity_doc ON report_entity(doc_id, layer);
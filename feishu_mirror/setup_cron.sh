@@ -11,11 +11,10 @@ crontab -l 2>/dev/null > "$TMP" || true
 grep -v "beiduoduo-feishu-mirror" "$TMP" > "$TMP.filtered" || true
 mv "$TMP.filtered" "$TMP"
 
+# The periodic syncs and the daily push now run inside sync_worker.py (lib/scheduler.py);
+# cron only keeps the worker alive.
 cat >> "$TMP" <<CRON
-*/10 * * * * cd "$ROOT" && $PY ingest_local_incremental.py >> /Users/beiduoudo/Desktop/贝多多/数据库/_index/logs/local_incremental.log 2>&1 # beiduoduo-feishu-mirror
-*/15 * * * * cd "$ROOT" && $PY sync_feishu_incremental.py >> /Users/beiduoudo/Desktop/贝多多/数据库/_index/logs/feishu_incremental.log 2>&1 # beiduoduo-feishu-mirror
-30 2 * * * cd "$ROOT" && $PY sync_all_full.py >> /Users/beiduoudo/Desktop/贝多多/数据库/_index/logs/full_reconcile.log 2>&1 # beiduoduo-feishu-mirror
-0 8 * * * cd "$ROOT" && $PY daily_push.py >> /Users/beiduoudo/Desktop/贝多多/数据库/_index/logs/daily_push.log 2>&1 # beiduoduo-feishu-mirror
+*/5 * * * * cd "$ROOT" && (pgrep -f sync_worker.py >/dev/null || nohup $PY sync_worker.py >> /Users/beiduoudo/Desktop/贝多多/数据库/_index/logs/sync_worker.log 2>&1 &) # beiduoduo-feishu-mirror
 CRON
 
 crontab "$TMP"
@@ -7,7 +7,26 @@
     python3 structurize.py --layer 1 --dry-run      # 只输出 JSON，不写库
     python3 structurize.py --layer 2 --limit 5      # 论点提取，只跑 5 篇
     python3 structurize.py --doc-id xxx --layer 3   # 单篇调试
-    python3 structurize.py --layer all --force       # 忽略进度，全部重跑
+    python3 structurize.py --layer all --force       # 忽略进度，全部重跑（默认只跑正文 hash 变化过的文档）
+    python3 structurize.py --layer all --concurrency 16   # 并发请求上限（默认 STRUCTURIZE_CONCURRENCY）
+    python3 structurize.py --layer all --fake-llm --dry-run   # 本地假模型，不调用 API
+    python3 structurize.py --layer all --combined    # 单次调用同时提取 3 层，并报告相对 3 次调用的节省
+    python3 structurize.py --layer 3 --context truncate   # 旧的首 70% + 尾 30% 截断
+    python3 structurize.py --context-eval 20          # 固定样本上对比两种上下文的指标提取效率
+    python3 structurize.py --layer all --batch       # 回填：整层走 Message Batches（半价，异步，完成后批量写库）
+
+所有 (文档, 层) 请求并发执行，同一文档的各层同时在途；并发上限遇 429/529 自动减半、
+连续成功后逐步恢复（lib/llm_engine.py）。结果由主线程统一写库。
+
+增量：每层写入时记录所依据的文档版本（report_document.content_hash，见 report_layer_state），
+只有 hash 变化（或从未处理）的文档才会重跑该层；第 1 层判定无投资论点（has_theses=false）
+的文档跳过第 2 层调用。
+
+超出字符预算的长文不再简单截头尾：按数字/表格/代码/关键词密度和 FTS 相关度给
+report_chunk 打分，挑最相关的块装满该层预算（lib/context_select.py）。
+
+每层的固定指令放在可缓存的 system 前缀（cache_control），请求里只有研报正文是新内容。
+--batch 把整层提交给 Message Batches API，轮询到结束后一次性写库；--doc-id 单篇调试始终走实时调用。
 """
 from __future__ import annotations
 
@@ -16,6 +35,9 @@ import json
 import logging
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -23,18 +45,38 @@ from typing import Any
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from lib.config import load_settings
+from lib.context_select import context_coverage, load_chunks, select_context
 from lib.db import DB
-from lib.db_structured import upsert_metadata, upsert_theses, upsert_metrics
+from lib.db_structured import (
+    backfill_layer_state,
+    ensure_entity_index,
+    skip_theses,
+    upsert_all_layers,
+    upsert_layer_batch,
+    upsert_metadata,
+    upsert_metrics,
+    upsert_theses,
+)
+from lib.llm_engine import (
+    BATCH_DISCOUNT,
+    AdaptiveLimiter,
+    LimitedClient,
+    UsageMeter,
+    cached_system,
+    token_cost,
+)
 
 logger = logging.getLogger(__name__)
 
 MIN_TEXT_LENGTH = 200
+METRICS_CONTEXT_CHARS = 12000
 
 # Claude models
 MODEL_HAIKU = "claude-haiku-4-5-20251001"
 MODEL_SONNET = "claude-sonnet-4-5-20250929"
 
 LAYER_MODELS = {1: MODEL_HAIKU, 2: MODEL_SONNET, 3: MODEL_HAIKU}
+COMBINED = 0  # task "layer" of a combined (all-layers) extraction
 
 
 # ── Text truncation ──
@@ -49,34 +91,46 @@ def truncate_for_context(full_text: str, max_chars: int) -> str:
     return full_text[:head_size] + "\n\n[...truncated...]\n\n" + full_text[-tail_size:]
 
 
+def doc_context(doc: dict[str, Any], layer: int, max_chars: int) -> str:
+    """The report text a layer's prompt sees: relevance-selected chunks, or head/tail truncation."""
+    if doc.get("context") == "truncate":
+        return truncate_for_context(doc["full_text"], max_chars)
+    return select_context(doc["full_text"], max_chars, layer, doc.get("chunks"))
+
+
 # ── Document selection ──
 
 
 def get_unprocessed_docs(
     db: DB, layer: int, limit: int | None = None, force: bool = False, doc_id: str | None = None
 ) -> list[dict[str, Any]]:
-    """Find documents that haven't been processed for a given layer."""
+    """Find documents whose current version hasn't been processed for a given layer.
+
+    A layer is current when report_layer_state holds the document's content_hash.
+    Each row carries has_theses from the current version's layer-1 metadata
+    (None when unknown), which gates the layer-2 call.
+    """
+    select = """
+        SELECT d.doc_id, d.title, d.category, d.full_text, d.content_hash,
+               json_extract(m.meta, '$.has_theses') AS has_theses
+        FROM report_document d
+        LEFT JOIN report_meta_enriched m ON m.doc_id = d.doc_id AND m.content_hash = d.content_hash
+    """
     with db.conn() as conn:
         if doc_id:
-            rows = conn.execute(
-                "SELECT doc_id, title, category, full_text FROM report_document WHERE doc_id = ?",
-                (doc_id,),
-            ).fetchall()
+            rows = conn.execute(select + " WHERE d.doc_id = ?", (doc_id,)).fetchall()
             return [r for r in rows if len(r.get("full_text", "")) >= MIN_TEXT_LENGTH]
 
         if force:
-            sql = "SELECT doc_id, title, category, full_text FROM report_document WHERE length(full_text) >= ?"
+            sql = select + " WHERE length(d.full_text) >= ?"
             params: list[Any] = [MIN_TEXT_LENGTH]
         else:
-            table_map = {1: "report_meta_enriched", 2: "report_thesis", 3: "report_metric"}
-            target_table = table_map[layer]
-            sql = f"""
-                SELECT d.doc_id, d.title, d.category, d.full_text
-                FROM report_document d
-                LEFT JOIN {target_table} e ON e.doc_id = d.doc_id
-                WHERE length(d.full_text) >= ? AND e.doc_id IS NULL
+            sql = select + """
+                LEFT JOIN report_layer_state s ON s.doc_id = d.doc_id AND s.layer = ?
+                WHERE length(d.full_text) >= ?
+                  AND (s.doc_id IS NULL OR s.content_hash != d.content_hash)
             """
-            params = [MIN_TEXT_LENGTH]
+            params = [layer, MIN_TEXT_LENGTH]
 
         if limit:
             sql += " LIMIT ?"
@@ -99,30 +153,23 @@ def _parse_json(text: str) -> Any:
     return json.loads(text)
 
 
-def _call_claude(client, model: str, prompt: str, max_tokens: int = 4096) -> str:
-    """Call Claude with exponential backoff on rate limits."""
-    for attempt in range(4):
-        try:
-            resp = client.messages.create(
-                model=model,
-                max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return resp.content[0].text
-        except Exception as e:
-            err_str = str(e)
-            if "rate" in err_str.lower() or "529" in err_str or "overloaded" in err_str.lower():
-                wait = 2 ** attempt
-                logger.warning("Rate limited, waiting %ds (attempt %d/4): %s", wait, attempt + 1, e)
-                time.sleep(wait)
-                continue
-            raise
-    raise RuntimeError("Claude API failed after 4 attempts")
+def _call_claude(client, model: str, prompt: str, max_tokens: int = 4096, system: str | None = None) -> str:
+    """One Claude call; 429/529 retries and backoff live in the client's AdaptiveLimiter.
+
+    The static instructions go in a cacheable system prefix, so only the report is new input.
+    """
+    resp = client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": prompt}],
+        **({"system": cached_system(system)} if system else {}),
+    )
+    return resp.content[0].text
 
 
-def _call_claude_json(client, model: str, prompt: str, max_tokens: int = 4096) -> Any:
+def _call_claude_json(client, model: str, prompt: str, max_tokens: int = 4096, system: str | None = None) -> Any:
     """Call Claude and parse JSON response with one retry on parse failure."""
-    text = _call_claude(client, model, prompt, max_tokens)
+    text = _call_claude(client, model, prompt, max_tokens, system)
     try:
         return _parse_json(text)
     except json.JSONDecodeError:
@@ -131,23 +178,20 @@ def _call_claude_json(client, model: str, prompt: str, max_tokens: int = 4096) -
             f"Your previous response was not valid JSON. Here it is:\n\n{text}\n\n"
             f"Please output ONLY valid JSON (no markdown, no explanation)."
         )
-        text2 = _call_claude(client, model, retry_prompt, max_tokens)
+        text2 = _call_claude(client, model, retry_prompt, max_tokens, system)
         return _parse_json(text2)
 
 
 # ── Layer extractors ──
+#
+# Each layer's instructions are a fixed system prompt (the cached prefix); the
+# user message is only the report text, so a backfill re-sends just the reports.
 
 
-def extract_metadata(doc: dict[str, Any], client, model: str) -> dict[str, Any]:
-    """Layer 1: Extract metadata with Haiku."""
-    text = truncate_for_context(doc["full_text"], 8000)
-    prompt = f"""Analyze this research report and extract metadata as JSON.
-
-REPORT:
-{text}
+METADATA_SYSTEM = """Analyze the research report in the user message (after REPORT) and extract metadata as JSON.
 
 OUTPUT exactly this JSON structure (no explanation, no markdown):
-{{
+{
   "display_title": "清晰的报告标题",
   "companies": ["公司名1", "公司名2"],
   "tickers": ["TICKER1", "TICKER2"],
@@ -158,27 +202,21 @@ OUTPUT exactly this JSON structure (no explanation, no markdown):
   "author": "作者名 or null",
   "source_org": "机构名 or null",
   "quality_score": 1-5,
-  "summary": "2-3句核心摘要"
-}}
+  "summary": "2-3句核心摘要",
+  "has_theses": true|false
+}
 
 Rules:
 - report_type must be one of: company_deep_dive, industry_overview, earnings_analysis, thematic, weekly_recap, datapack
 - quality_score: 1=raw data dump, 3=decent analysis, 5=top-tier institutional research
 - companies/tickers: only include if clearly discussed, not just mentioned in passing
+- has_theses: true only if the report argues a bullish/bearish/neutral view on at least one company
 - Output ONLY JSON, nothing else"""
-    return _call_claude_json(client, model, prompt)
-
-
-def extract_theses(doc: dict[str, Any], client, model: str) -> list[dict[str, Any]]:
-    """Layer 2: Extract investment theses with Sonnet."""
-    text = truncate_for_context(doc["full_text"], 16000)
-    prompt = f"""Analyze this research report and extract investment theses as JSON.
 
-REPORT:
-{text}
+THESES_SYSTEM = """Analyze the research report in the user message (after REPORT) and extract investment theses as JSON.
 
 OUTPUT a JSON array of investment theses. Each thesis:
-{{
+{
   "company": "公司名",
   "ticker": "TICKER or null",
   "direction": "bullish|bearish|neutral",
@@ -187,7 +225,7 @@ OUTPUT a JSON array of investment theses. Each thesis:
   "thesis_text": "一段话概括投资论点（50-150字）",
   "key_catalysts": ["催化剂1", "催化剂2"],
   "key_risks": ["风险1", "风险2"]
-}}
+}
 
 Rules:
 - Only extract theses with clear evidence/reasoning in the report
@@ -196,22 +234,11 @@ Rules:
 - If no investment thesis exists in the report, return empty array []
 - time_horizon: short=<3months, medium=3-12months, long=>1year
 - Output ONLY valid JSON array, nothing else"""
-    result = _call_claude_json(client, model, prompt)
-    if isinstance(result, dict) and "theses" in result:
-        result = result["theses"]
-    return result if isinstance(result, list) else []
 
-
-def extract_metrics(doc: dict[str, Any], client, model: str) -> list[dict[str, Any]]:
-    """Layer 3: Extract financial metrics with Haiku."""
-    text = truncate_for_context(doc["full_text"], 12000)
-    prompt = f"""Analyze this research report and extract specific financial numbers/metrics as JSON.
-
-REPORT:
-{text}
+METRICS_SYSTEM = """Analyze the research report in the user message (after REPORT) and extract specific financial numbers/metrics as JSON.
 
 OUTPUT a JSON array of financial metrics. Each metric:
-{{
+{
   "company": "公司名",
   "ticker": "TICKER or null",
   "period": "2024Q3|2024|2024H1|etc",
@@ -220,7 +247,7 @@ OUTPUT a JSON array of financial metrics. Each metric:
   "unit": "USD_M|USD_B|CNY_M|count|percent|etc",
   "yoy_change": 0.15 or null,
   "context": "简短上下文说明"
-}}
+}
 
 Rules:
 - Only extract CONCRETE numbers explicitly stated in the report
@@ -231,13 +258,269 @@ Rules:
 - Maximum 50 metrics per report
 - If no concrete metrics exist, return empty array []
 - Output ONLY valid JSON array, nothing else"""
-    result = _call_claude_json(client, model, prompt)
+
+
+def metadata_prompt(doc: dict[str, Any]) -> str:
+    return f"REPORT:\n{doc_context(doc, 1, 8000)}"
+
+
+def theses_prompt(doc: dict[str, Any]) -> str:
+    return f"REPORT:\n{doc_context(doc, 2, 16000)}"
+
+
+def metrics_prompt(doc: dict[str, Any]) -> str:
+    return f"REPORT:\n{doc_context(doc, 3, METRICS_CONTEXT_CHARS)}"
+
+
+def parse_metadata(result: Any) -> dict[str, Any]:
+    if not isinstance(result, dict):
+        raise ValueError(f"metadata: expected a JSON object, got {type(result).__name__}")
+    return result
+
+
+def parse_theses(result: Any) -> list[dict[str, Any]]:
+    if isinstance(result, dict) and "theses" in result:
+        result = result["theses"]
+    return result if isinstance(result, list) else []
+
+
+def parse_metrics(result: Any) -> list[dict[str, Any]]:
     if isinstance(result, dict) and "metrics" in result:
         result = result["metrics"]
     items = result if isinstance(result, list) else []
     return items[:50]
 
 
+def extract_metadata(doc: dict[str, Any], client, model: str) -> dict[str, Any]:
+    """Layer 1: Extract metadata with Haiku."""
+    return parse_metadata(_call_claude_json(client, model, metadata_prompt(doc), system=METADATA_SYSTEM))
+
+
+def extract_theses(doc: dict[str, Any], client, model: str) -> list[dict[str, Any]]:
+    """Layer 2: Extract investment theses with Sonnet."""
+    return parse_theses(_call_claude_json(client, model, theses_prompt(doc), system=THESES_SYSTEM))
+
+
+def extract_metrics(doc: dict[str, Any], client, model: str) -> list[dict[str, Any]]:
+    """Layer 3: Extract financial metrics with Haiku."""
+    return parse_metrics(_call_claude_json(client, model, metrics_prompt(doc), system=METRICS_SYSTEM))
+
+
+# ── Combined extraction (one call per report) ──
+
+
+REPORT_TYPES = ["company_deep_dive", "industry_overview", "earnings_analysis", "thematic", "weekly_recap", "datapack"]
+_NULLABLE_STR = {"type": ["string", "null"]}
+_STR_LIST = {"type": "array", "items": {"type": "string"}}
+
+COMBINED_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "required": ["metadata", "theses", "metrics"],
+    "properties": {
+        "metadata": {
+            "type": "object",
+            "required": ["display_title", "companies", "tickers", "sectors", "report_type", "quality_score", "summary"],
+            "properties": {
+                "display_title": {"type": "string"},
+                "companies": _STR_LIST,
+                "tickers": _STR_LIST,
+                "sectors": _STR_LIST,
+                "report_type": {"type": "string", "enum": REPORT_TYPES},
+                "language": {"type": "string", "enum": ["zh", "en", "mixed"]},
+                "publish_date": _NULLABLE_STR,
+                "author": _NULLABLE_STR,
+                "source_org": _NULLABLE_STR,
+                "quality_score": {"type": "integer", "minimum": 1, "maximum": 5},
+                "summary": {"type": "string"},
+                "has_theses": {"type": "boolean"},
+            },
+        },
+        "theses": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["company", "direction", "confidence", "thesis_text"],
+                "properties": {
+                    "company": {"type": "string"},
+                    "ticker": _NULLABLE_STR,
+                    "direction": {"type": "string", "enum": ["bullish", "bearish", "neutral"]},
+                    "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+                    "time_horizon": {"type": ["string", "null"], "enum": ["short", "medium", "long", None]},
+                    "thesis_text": {"type": "string"},
+                    "key_catalysts": _STR_LIST,
+                    "key_risks": _STR_LIST,
+                },
+            },
+        },
+        "metrics": {
+            "type": "array",
+            "maxItems": 50,
+            "items": {
+                "type": "object",
+                "required": ["company", "period", "metric", "value"],
+                "properties": {
+                    "company": {"type": "string"},
+                    "ticker": _NULLABLE_STR,
+                    "period": {"type": "string"},
+                    "metric": {"type": "string"},
+                    "value": {"type": "number"},
+                    "unit": _NULLABLE_STR,
+                    "yoy_change": {"type": ["number", "null"]},
+                    "context": _NULLABLE_STR,
+                },
+            },
+        },
+    },
+}
+
+_JSON_TYPES = {
+    "object": dict, "array": list, "string": str, "integer": int, "number": (int, float),
+    "boolean": bool, "null": type(None),
+}
+
+
+def schema_errors(schema: dict[str, Any], value: Any, path: str = "$") -> list[str]:
+    """Validate against the JSON Schema subset used by COMBINED_SCHEMA."""
+    types = schema.get("type")
+    if types:
+        allowed = tuple(t for name in ([types] if isinstance(types, str) else types) for t in
+                        (_JSON_TYPES[name] if isinstance(_JSON_TYPES[name], tuple) else (_JSON_TYPES[name],)))
+        if not isinstance(value, allowed) or (isinstance(value, bool) and bool not in allowed):
+            return [f"{path}: expected {types}"]
+    errors: list[str] = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value < schema.get("minimum", value) or value > schema.get("maximum", value):
+            errors.append(f"{path}: {value} out of range")
+    if isinstance(value, dict):
+        errors += [f"{path}.{k}: required" for k in schema.get("required", []) if k not in value]
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors += schema_errors(sub, value[key], f"{path}.{key}")
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors += schema_errors(schema["items"], item, f"{path}[{i}]")
+    return errors
+
+
+def validate_combined(data: Any) -> dict[str, Any]:
+    """Check a combined answer; bad theses/metrics are dropped, a bad shape or metadata raises."""
+    if not isinstance(data, dict):
+        raise ValueError("combined extraction: expected a JSON object")
+    props = COMBINED_SCHEMA["properties"]
+    errors = schema_errors({**COMBINED_SCHEMA, "properties": {"metadata": props["metadata"]}}, data)
+    if errors:
+        raise ValueError("combined extraction: " + "; ".join(errors[:5]))
+    out = {"metadata": data["metadata"]}
+    for key in ("theses", "metrics"):
+        items = [x for x in (data.get(key) or []) if not schema_errors(props[key]["items"], x)]
+        if len(items) < len(data.get(key) or []):
+            logger.warning("    dropped %d invalid %s", len(data[key]) - len(items), key)
+        out[key] = items[: props[key].get("maxItems", len(items))]
+    return out
+
+
+COMBINED_SYSTEM = f"""Analyze the research report in the user message (after REPORT) and record, in one answer, its metadata, its investment theses and its concrete financial metrics.
+
+metadata:
+- display_title: 清晰的报告标题; summary: 2-3句核心摘要
+- report_type: one of {", ".join(REPORT_TYPES)}
+- quality_score: 1=raw data dump, 3=decent analysis, 5=top-tier institutional research
+- companies/tickers: only include if clearly discussed, not just mentioned in passing
+- has_theses: whether the theses list below is non-empty
+
+theses (empty list if none):
+- Only theses with clear evidence/reasoning in the report; do NOT invent opinions
+- One thesis per company (pick the dominant view if multiple exist)
+- thesis_text: 一段话概括投资论点（50-150字）
+- time_horizon: short=<3months, medium=3-12months, long=>1year
+
+metrics (empty list if none, at most 50):
+- Only CONCRETE numbers explicitly stated in the report; do NOT calculate or estimate
+- period format: YYYY for annual, YYYYQ1-4 for quarterly, YYYYH1/H2 for half-year
+- value must be numeric (约10亿 → 1000 with unit=CNY_M); yoy_change as decimal (0.15 = 15% growth)"""
+
+
+def combined_prompt(doc: dict[str, Any]) -> str:
+    return f"REPORT:\n{doc_context(doc, COMBINED, 16000)}"
+
+
+COMBINED_TOOL = {
+    "name": "record_report_extraction",
+    "description": "Record the metadata, investment theses and financial metrics extracted from one report.",
+    "input_schema": COMBINED_SCHEMA,
+}
+
+
+def _prompt_tokens(usage: Any) -> int:
+    """Whole prompt size: uncached input plus prompt-cache writes and reads."""
+    return sum(getattr(usage, f, 0) or 0 for f in ("input_tokens", "cache_creation_input_tokens",
+                                                    "cache_read_input_tokens"))
+
+
+def _three_call_estimate(doc: dict[str, Any], prompt: str, result: dict[str, Any], usage: Any) -> dict[str, float]:
+    """What the 3-call mode would have used for this report, scaled from this call's usage.
+
+    Input tokens scale with the prompt characters of the three single-layer prompts
+    (system prefix included, priced uncached); output tokens are split by the size
+    of each layer's JSON in the combined answer.
+    """
+    tokens_in = _prompt_tokens(usage)
+    tokens_out = getattr(usage, "output_tokens", 0) or 0
+    in_per_char = tokens_in / max(1, len(COMBINED_SYSTEM) + len(prompt))
+    sections = {1: result["metadata"], 2: result["theses"], 3: result["metrics"]}
+    json_chars = {layer: len(json.dumps(v, ensure_ascii=False)) for layer, v in sections.items()}
+    out_per_char = tokens_out / max(1, sum(json_chars.values()))
+    est = {"requests": 3, "input_tokens": 0.0, "output_tokens": 0.0, "cost_usd": 0.0}
+    for layer in (1, 2, 3):
+        layer_in = (len(LAYER_SYSTEMS[layer]) + len(LAYER_PROMPTS[layer](doc))) * in_per_char
+        layer_out = json_chars[layer] * out_per_char
+        est["input_tokens"] += layer_in
+        est["output_tokens"] += layer_out
+        est["cost_usd"] += token_cost(LAYER_MODELS[layer], layer_in, layer_out)
+    return est
+
+
+LAYER_SYSTEMS = {1: METADATA_SYSTEM, 2: THESES_SYSTEM, 3: METRICS_SYSTEM}
+LAYER_PROMPTS = {1: metadata_prompt, 2: theses_prompt, 3: metrics_prompt}
+LAYER_PARSERS = {1: parse_metadata, 2: parse_theses, 3: parse_metrics}
+
+
+def request_params(doc: dict[str, Any], layer: int, combined_model: str = MODEL_SONNET) -> dict[str, Any]:
+    """messages.create arguments of one (report, layer) task; batch requests reuse them as params."""
+    if layer == COMBINED:
+        return {
+            "model": combined_model,
+            "max_tokens": 8192,
+            "system": cached_system(COMBINED_SYSTEM),
+            "tools": [COMBINED_TOOL],
+            "tool_choice": {"type": "tool", "name": COMBINED_TOOL["name"]},
+            "messages": [{"role": "user", "content": combined_prompt(doc)}],
+        }
+    return {
+        "model": LAYER_MODELS[layer],
+        "max_tokens": 4096,
+        "system": cached_system(LAYER_SYSTEMS[layer]),
+        "messages": [{"role": "user", "content": LAYER_PROMPTS[layer](doc)}],
+    }
+
+
+def parse_combined(doc: dict[str, Any], prompt: str, resp: Any) -> dict[str, Any]:
+    block = next((b for b in resp.content if getattr(b, "type", "") == "tool_use"), None)
+    data = block.input if block is not None else _parse_json(resp.content[0].text)
+    result = validate_combined(data)
+    result["estimate_3call"] = _three_call_estimate(doc, prompt, result, getattr(resp, "usage", None))
+    return result
+
+
+def extract_combined(doc: dict[str, Any], client, model: str) -> dict[str, Any]:
+    """Layers 1–3 in one call: a forced tool call whose input is the combined JSON."""
+    params = request_params(doc, COMBINED, model)
+    resp = client.messages.create(**params)
+    return parse_combined(doc, params["messages"][0]["content"], resp)
+
+
 # ── Main processing loop ──
 
 
@@ -248,58 +531,391 @@ EXTRACTORS = {
 }
 
 WRITERS = {
-    1: lambda db, doc_id, data, model: upsert_metadata(db, doc_id, data, model),
-    2: lambda db, doc_id, data, model: upsert_theses(db, doc_id, data, model),
-    3: lambda db, doc_id, data, model: upsert_metrics(db, doc_id, data, model),
+    1: upsert_metadata,
+    2: upsert_theses,
+    3: upsert_metrics,
 }
 
 
-def process_layer(
+def _extract(doc: dict[str, Any], layer: int, client, combined_model: str) -> Any:
+    if layer == COMBINED:
+        return extract_combined(doc, client, combined_model)
+    return EXTRACTORS[layer](doc, client, LAYER_MODELS[layer])
+
+
+def _last_run(runs_log: Path, mode: str, fake: bool, batch: bool = False) -> dict[str, Any] | None:
+    try:
+        lines = runs_log.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return None
+    for line in reversed(lines):
+        try:
+            run = json.loads(line)
+        except ValueError:
+            continue
+        if run.get("mode") == mode and run.get("fake") == fake and run.get("batch", False) == batch and run.get("docs"):
+            return run
+    return None
+
+
+def _run_report(
+    mode: str, meter: UsageMeter, limiter: AdaptiveLimiter | None, docs: int, wall: float,
+    estimate: dict[str, float] | None, runs_log: Path | None, fake: bool,
+) -> dict[str, Any]:
+    """Usage of this run; a combined run adds its savings against the 3-call mode.
+
+    Token and cost savings compare with the per-report 3-call estimate; latency compares
+    API seconds per report with the last logged 3-call run of the same kind
+    (interactive or batch), when there is one.
+    """
+    usage = meter.totals()
+    report: dict[str, Any] = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "mode": mode, "fake": fake, "batch": meter.batch,
+        "docs": docs, "wall_seconds": round(wall, 2), **usage,
+        "per_doc_seconds": round(usage["seconds"] / docs, 2) if docs else None,
+        "limiter": limiter.snapshot() if limiter else None,
+    }
+    if mode == "combined" and docs and estimate:
+        pct = lambda actual, base: round(100.0 * (1 - actual / base), 1) if base else None
+        baseline = _last_run(runs_log, "3call", fake, meter.batch) if runs_log else None
+        estimate_cost = estimate["cost_usd"] * (BATCH_DISCOUNT if meter.batch else 1.0)
+        report["vs_3call"] = {
+            "requests_saved_pct": pct(usage["requests"], estimate["requests"]),
+            "input_tokens_saved_pct": pct(usage["input_tokens"], estimate["input_tokens"]),
+            "output_tokens_saved_pct": pct(usage["output_tokens"], estimate["output_tokens"]),
+            "cost_saved_pct": pct(usage["cost_usd"], estimate_cost),
+            "estimated_3call_cost_usd": round(estimate_cost, 4),
+            "latency_saved_pct": pct(report["per_doc_seconds"], baseline["per_doc_seconds"]) if baseline else None,
+        }
+    if runs_log and docs:
+        runs_log.parent.mkdir(parents=True, exist_ok=True)
+        with runs_log.open("a", encoding="utf-8") as fp:
+            fp.write(json.dumps(report, ensure_ascii=False) + "\n")
+    return report
+
+
+def _skip_layer2(db: DB, doc: dict[str, Any], stats: dict[str, Any], dry_run: bool) -> None:
+    logger.info("  L2 %s — no thesis in this version, skipped", doc["doc_id"][:12])
+    stats["skipped"] += 1
+    if not dry_run:
+        skip_theses(db, doc["doc_id"], doc["content_hash"])
+
+
+def _collect(
+    db: DB,
+    layers: list[int],
+    all_stats: dict[int, dict[str, Any]],
+    *,
+    limit: int | None,
+    force: bool,
+    doc_id: str | None,
+    combined: bool,
+    combined_model: str,
+    context: str,
+    dry_run: bool,
+) -> dict[str, tuple[dict[str, Any], list[int]]]:
+    """Pending documents with the layers each needs; fills all_stats with the per-layer totals.
+
+    Layer 2 of a report whose current metadata says "no thesis" is recorded as
+    skipped here, without a call; the selected reports get their context chunks.
+    """
+    pending: dict[str, tuple[dict[str, Any], list[int]]] = {}
+    for layer in layers:
+        docs = get_unprocessed_docs(db, layer, limit=limit, force=force, doc_id=doc_id)
+        logger.info("Layer %d: %d documents to process (model=%s)", layer, len(docs),
+                    combined_model if combined else LAYER_MODELS[layer])
+        all_stats[layer] = {"total": len(docs), "success": 0, "failed": 0, "skipped": 0}
+        for doc in docs:
+            pending.setdefault(doc["doc_id"], (doc, []))[1].append(layer)
+
+    for did, (doc, doc_layers) in list(pending.items()):
+        if 2 in doc_layers and 1 not in doc_layers and doc.get("has_theses") == 0:
+            _skip_layer2(db, doc, all_stats[2], dry_run)
+            doc_layers.remove(2)
+            if not doc_layers:
+                del pending[did]
+
+    for doc, doc_layers in pending.values():
+        doc["context"] = context
+        if context == "select" and len(doc["full_text"]) > 8000:  # 8000 = smallest layer budget
+            doc["chunks"] = load_chunks(db, doc["doc_id"], [COMBINED] if combined else doc_layers)
+    return pending
+
+
+def process_docs(
     db: DB,
-    layer: int,
+    layers: list[int],
     client,
+    *,
+    concurrency: int = 8,
     limit: int | None = None,
     force: bool = False,
     dry_run: bool = False,
     doc_id: str | None = None,
+    combined: bool = False,
+    combined_model: str = MODEL_SONNET,
+    runs_log: Path | None = None,
+    fake: bool = False,
+    context: str = "select",
 ) -> dict[str, Any]:
-    model = LAYER_MODELS[layer]
-    docs = get_unprocessed_docs(db, layer, limit=limit, force=force, doc_id=doc_id)
-    logger.info("Layer %d: %d documents to process (model=%s)", layer, len(docs), model)
-
-    stats = {"total": len(docs), "success": 0, "failed": 0, "skipped": 0}
-    extractor = EXTRACTORS[layer]
-    writer = WRITERS[layer]
-
-    for i, doc in enumerate(docs, 1):
-        did = doc["doc_id"]
-        title = doc.get("title", "")[:50]
-        logger.info("  [%d/%d] %s — %s", i, stats["total"], did[:12], title)
-
-        try:
-            result = extractor(doc, client, model)
-        except json.JSONDecodeError as e:
-            logger.warning("    JSON parse failed, skipping: %s", e)
-            stats["failed"] += 1
-            continue
-        except Exception as e:
-            logger.error("    Extraction error, skipping: %s", e)
-            stats["failed"] += 1
+    """Run the selected layers over their pending documents concurrently.
+
+    Tasks are queued document by document, so the layers of one report are in
+    flight together; in combined mode each report is a single call for all
+    layers. A report's layer-2 call waits for its layer-1 answer when both are
+    pending, and is skipped (empty theses recorded for this version) when the
+    metadata says the report has no thesis. Workers only call the API; results
+    are written by this thread as they arrive, which keeps SQLite to a single writer.
+
+    Returns {"layers": per-layer stats, "usage": run report}.
+    """
+    all_stats: dict[int, dict[str, Any]] = {}
+    pending = _collect(db, layers, all_stats, limit=limit, force=force, doc_id=doc_id, combined=combined,
+                       combined_model=combined_model, context=context, dry_run=dry_run)
+
+    def skip_layer2(doc: dict[str, Any]) -> None:
+        _skip_layer2(db, doc, all_stats[2], dry_run)
+
+    if not isinstance(client, LimitedClient):
+        client = LimitedClient(client, AdaptiveLimiter(concurrency))
+    deferred: dict[str, dict[str, Any]] = {}  # doc_id -> doc whose L2 waits for its L1 answer
+    if combined:
+        tasks = [(doc, COMBINED) for doc, _ in pending.values()]
+    else:
+        tasks = []
+        for doc, doc_layers in pending.values():
+            for layer in doc_layers:
+                if layer == 2 and 1 in doc_layers:
+                    deferred[doc["doc_id"]] = doc
+                else:
+                    tasks.append((doc, layer))
+    estimate = {"requests": 0, "input_tokens": 0.0, "output_tokens": 0.0, "cost_usd": 0.0}
+    done = 0
+    total = len(tasks) + len(deferred)
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="structurize") as pool:
+        futures = {
+            pool.submit(_extract, doc, layer, client, combined_model): (doc, layer) for doc, layer in tasks
+        }
+
+        def release_layer2(did: str, has_theses: Any) -> None:
+            doc = deferred.pop(did, None)
+            if doc is None:
+                return
+            if has_theses is False:
+                skip_layer2(doc)
+            else:
+                futures[pool.submit(_extract, doc, 2, client, combined_model)] = (doc, 2)
+
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                doc, layer = futures.pop(fut)
+                did = doc["doc_id"]
+                task_stats = [all_stats[x] for x in pending[did][1]] if layer == COMBINED else [all_stats[layer]]
+                done += 1
+                logger.info("  [%d/%d] L%s %s — %s", done, total, layer or "1-3", did[:12],
+                            doc.get("title", "")[:50])
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    if isinstance(e, json.JSONDecodeError):
+                        logger.warning("    JSON parse failed, skipping: %s", e)
+                    else:
+                        logger.error("    Extraction error, skipping: %s", e)
+                    for stats in task_stats:
+                        stats["failed"] += 1
+                    if layer == 1:
+                        release_layer2(did, None)  # no verdict: extract the theses anyway
+                    continue
+
+                if layer == 1:
+                    release_layer2(did, result.get("has_theses"))
+                if layer == COMBINED:
+                    for key, value in result.pop("estimate_3call").items():
+                        estimate[key] += value
+                    result["metadata"].setdefault("has_theses", bool(result["theses"]))
+
+                if dry_run:
+                    print(json.dumps({"doc_id": did, "layer": layer or "all", "result": result},
+                                     ensure_ascii=False, indent=2))
+                    for stats in task_stats:
+                        stats["success"] += 1
+                    continue
+
+                try:
+                    if layer == COMBINED:
+                        upsert_all_layers(db, did, result["metadata"], result["theses"], result["metrics"],
+                                          combined_model, doc["content_hash"])
+                    else:
+                        WRITERS[layer](db, did, result, LAYER_MODELS[layer], doc["content_hash"])
+                    for stats in task_stats:
+                        stats["success"] += 1
+                except Exception as e:
+                    logger.error("    DB write error: %s", e)
+                    for stats in task_stats:
+                        stats["failed"] += 1
+
+    report = _run_report(
+        "combined" if combined else "3call", client.meter, client.limiter, len(pending), time.time() - t0,
+        estimate if combined else None, runs_log, fake,
+    )
+    return {"layers": all_stats, "usage": report}
+
+
+BATCH_MAX_REQUESTS = 10_000
+
+
+def _batch_results(client, requests: list[dict[str, Any]], poll: float):
+    """Submit requests as Message Batches, wait for all to end, yield (custom_id, message | error)."""
+    batch_ids = []
+    for i in range(0, len(requests), BATCH_MAX_REQUESTS):
+        batch = client.messages.batches.create(requests=requests[i:i + BATCH_MAX_REQUESTS])
+        logger.info("Batch %s: %d requests submitted", batch.id, len(requests[i:i + BATCH_MAX_REQUESTS]))
+        batch_ids.append(batch.id)
+    waiting = list(batch_ids)
+    while waiting:
+        time.sleep(poll)
+        for batch_id in list(waiting):
+            batch = client.messages.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            logger.info("Batch %s: %s (%d processing, %d succeeded, %d errored)", batch_id,
+                        batch.processing_status, counts.processing, counts.succeeded, counts.errored)
+            if batch.processing_status == "ended":
+                waiting.remove(batch_id)
+    for batch_id in batch_ids:
+        for entry in client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message
+            else:
+                yield entry.custom_id, getattr(entry.result, "error", None) or entry.result.type
+
+
+def process_batch(
+    db: DB,
+    layers: list[int],
+    client,
+    *,
+    limit: int | None = None,
+    force: bool = False,
+    dry_run: bool = False,
+    combined: bool = False,
+    combined_model: str = MODEL_SONNET,
+    runs_log: Path | None = None,
+    fake: bool = False,
+    context: str = "select",
+    poll: float = 30.0,
+) -> dict[str, Any]:
+    """process_docs through the Message Batches API: half price, minutes to hours of latency.
+
+    Each layer is one batch (layer 1 first, so its has_theses verdicts gate layer 2's
+    selection); its results are written in one transaction once the batch ends, each
+    document under its own savepoint.
+    There is no JSON-repair retry: a report whose answer does not parse stays pending
+    for the next run.
+    """
+    meter = UsageMeter(batch=True)
+    all_stats: dict[int, dict[str, Any]] = {}
+    estimate = {"requests": 0, "input_tokens": 0.0, "output_tokens": 0.0, "cost_usd": 0.0}
+    docs_seen: set[str] = set()
+    t0 = time.time()
+    for step in ([COMBINED] if combined else layers):
+        step_stats: dict[int, dict[str, Any]] = {}
+        pending = _collect(db, layers if combined else [step], step_stats, limit=limit, force=force, doc_id=None,
+                           combined=combined, combined_model=combined_model, context=context, dry_run=dry_run)
+        all_stats.update(step_stats)
+        if not pending:
             continue
+        docs_seen.update(pending)
+        params = {f"L{step}-{did}": request_params(doc, step, combined_model) for did, (doc, _) in pending.items()}
+        requests = [{"custom_id": custom_id, "params": p} for custom_id, p in params.items()]
+        model = combined_model if combined else LAYER_MODELS[step]
+        rows: list[tuple[str, Any, str | None]] = []
+        for custom_id, message in _batch_results(client, requests, poll):
+            did = custom_id.split("-", 1)[1]
+            doc, doc_layers = pending[did]
+            task_stats = [all_stats[x] for x in doc_layers]
+            try:
+                if not hasattr(message, "content"):
+                    raise RuntimeError(f"batch request failed: {message}")
+                meter.record(model, message.usage, 0.0)
+                if step == COMBINED:
+                    result = parse_combined(doc, params[custom_id]["messages"][0]["content"], message)
+                    for key, value in result.pop("estimate_3call").items():
+                        estimate[key] += value
+                    result["metadata"].setdefault("has_theses", bool(result["theses"]))
+                else:
+                    result = LAYER_PARSERS[step](_parse_json(message.content[0].text))
+            except Exception as e:
+                logger.warning("  L%s %s — %s", step or "1-3", did[:12], e)
+                for stats in task_stats:
+                    stats["failed"] += 1
+                continue
+            if dry_run:
+                print(json.dumps({"doc_id": did, "layer": step or "all", "result": result},
+                                 ensure_ascii=False, indent=2))
+            rows.append((did, result, doc["content_hash"]))
+        failed = upsert_layer_batch(db, step, rows, model) if rows and not dry_run else {}
+        for did, error in failed.items():
+            logger.error("  L%s %s — DB write error: %s", step or "1-3", did[:12], error)
+        for did, _, _ in rows:
+            for stats in (all_stats[x] for x in pending[did][1]):
+                stats["failed" if did in failed else "success"] += 1
+        if rows and not dry_run:
+            logger.info("Layer %s: wrote %d of %d results", step or "1-3", len(rows) - len(failed), len(rows))
+
+    report = _run_report(
+        "combined" if combined else "3call", meter, None, len(docs_seen), time.time() - t0,
+        estimate if combined else None, runs_log, fake,
+    )
+    return {"layers": all_stats, "usage": report}
 
-        if dry_run:
-            print(json.dumps({"doc_id": did, "layer": layer, "result": result}, ensure_ascii=False, indent=2))
-            stats["success"] += 1
-            continue
 
-        try:
-            writer(db, did, result, model)
-            stats["success"] += 1
-        except Exception as e:
-            logger.error("    DB write error: %s", e)
-            stats["failed"] += 1
+def compare_context(db: DB, make_client, *, sample: int, concurrency: int = 8) -> dict[str, Any]:
+    """Layer-3 extraction over a fixed sample of long reports, once per context strategy.
 
-    return stats
+    The sample is the first `sample` reports longer than the metrics budget in
+    content_hash order, so it stays the same between runs until they change.
+    Nothing is written to the database. Only a run against the real API says
+    anything about extraction yield; with --fake-llm it exercises the plumbing.
+    """
+    with db.conn() as conn:
+        docs = conn.execute(
+            "SELECT doc_id, title, category, full_text, content_hash FROM report_document "
+            "WHERE length(full_text) > ? ORDER BY content_hash LIMIT ?",
+            (METRICS_CONTEXT_CHARS, sample),
+        ).fetchall()
+    out: dict[str, Any] = {"docs": len(docs)}
+    for mode in ("truncate", "select"):
+        client = LimitedClient(make_client(), AdaptiveLimiter(concurrency))
+        runs = [
+            {**d, "context": mode, "chunks": load_chunks(db, d["doc_id"], [3]) if mode == "select" else None}
+            for d in docs
+        ]
+        coverage = {"numbers": 0, "table_lines": 0, "periods": 0}
+        for doc in runs:
+            for key, n in context_coverage(doc_context(doc, 3, METRICS_CONTEXT_CHARS)).items():
+                if key in coverage:
+                    coverage[key] += n
+        metrics = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="context-eval") as pool:
+            for fut in [pool.submit(extract_metrics, doc, client, LAYER_MODELS[3]) for doc in runs]:
+                try:
+                    metrics += len(fut.result())
+                except Exception as e:
+                    logger.warning("    %s context: extraction failed: %s", mode, e)
+                    failed += 1
+        usage = client.meter.totals()
+        out[mode] = {
+            "metrics": metrics,
+            "failed": failed,
+            "input_tokens": usage["input_tokens"],
+            "cost_usd": usage["cost_usd"],
+            "metrics_per_1k_input_tokens": round(metrics * 1000 / usage["input_tokens"], 3)
+            if usage["input_tokens"] else None,
+            "context": coverage,
+        }
+    return out
 
 
 # ── CLI ──
@@ -307,12 +923,32 @@ def process_layer(
 
 def main():
     parser = argparse.ArgumentParser(description="研报结构化提取")
-    parser.add_argument("--layer", required=True, help="1, 2, 3, or all")
+    parser.add_argument("--layer", help="1, 2, 3, or all")
     parser.add_argument("--limit", type=int, default=None, help="Max documents to process")
     parser.add_argument("--doc-id", default=None, help="Process single document")
     parser.add_argument("--dry-run", action="store_true", help="Output JSON without writing to DB")
     parser.add_argument("--force", action="store_true", help="Re-process already processed documents")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Max Claude requests in flight (default STRUCTURIZE_CONCURRENCY)")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the offline fake client (lib/fake_llm.py)")
+    parser.add_argument("--combined", action="store_true",
+                        help="One call per report for all three layers (requires --layer all)")
+    parser.add_argument("--combined-model", default=MODEL_SONNET, help="Model for --combined")
+    parser.add_argument("--context", choices=["select", "truncate"], default="select",
+                        help="How reports over a layer's budget are cut: relevant chunks or head/tail")
+    parser.add_argument("--context-eval", type=int, metavar="N", default=None,
+                        help="Compare both --context strategies on layer 3 over N long reports, then exit")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit each layer through the Message Batches API (backfills: half price, async)")
+    parser.add_argument("--batch-poll", type=float, default=None,
+                        help="Seconds between batch status polls (default 30; 0.2 with --fake-llm)")
     args = parser.parse_args()
+    if not args.layer and args.context_eval is None:
+        parser.error("--layer is required")
+    if args.batch and args.doc_id:
+        parser.error("--doc-id runs are interactive; --batch is for backfills")
+    if args.combined and args.layer != "all":
+        parser.error("--combined extracts all layers at once; use it with --layer all")
 
     logging.basicConfig(
         level=logging.INFO,
@@ -322,29 +958,71 @@ def main():
     settings = load_settings(str(Path(__file__).parent / ".env"))
     db = DB(settings.database_url)
     db.ensure_schema(Path(__file__).parent / "schema.sql")
+    ensure_entity_index(db)
+    adopted = backfill_layer_state(db)
+    if adopted:
+        logger.info("Recorded content_hash for %d layer results extracted before hash tracking", adopted)
+
+    with ExitStack() as stack:
+        if args.batch and args.fake_llm:
+            # The real SDK against the local stub, so the batch path is exercised end to end.
+            import anthropic
+            from lib.fake_llm import FakeAnthropicServer
+            server = stack.enter_context(FakeAnthropicServer())
+            make_client = partial(anthropic.Anthropic, base_url=server.url, api_key="fake", max_retries=0)
+        elif args.fake_llm:
+            from lib.fake_llm import FakeAnthropic
+            make_client = FakeAnthropic
+        else:
+            import anthropic
+            make_client = partial(anthropic.Anthropic, max_retries=0)  # retries are the limiter's job
+        _run(args, settings, db, make_client)
 
-    import anthropic
-    client = anthropic.Anthropic()
 
-    layers = [1, 2, 3] if args.layer == "all" else [int(args.layer)]
-    all_stats: dict[int, dict] = {}
+def _run(args, settings, db: DB, make_client) -> None:
+    concurrency = args.concurrency or settings.structurize_concurrency
 
-    for layer in layers:
-        logger.info("=== Layer %d ===", layer)
-        stats = process_layer(
-            db, layer, client,
-            limit=args.limit,
-            force=args.force,
-            dry_run=args.dry_run,
-            doc_id=args.doc_id,
-        )
-        all_stats[layer] = stats
+    if args.context_eval is not None:
+        result = compare_context(db, make_client, sample=args.context_eval, concurrency=concurrency)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    layers = [1, 2, 3] if args.layer == "all" else [int(args.layer)]
+    common = dict(
+        limit=args.limit,
+        force=args.force,
+        dry_run=args.dry_run,
+        combined=args.combined,
+        combined_model=args.combined_model,
+        runs_log=settings.report_index_root / "logs" / "structurize_runs.jsonl",
+        fake=args.fake_llm,
+        context=args.context,
+    )
+    if args.batch:
+        poll = args.batch_poll if args.batch_poll is not None else (0.2 if args.fake_llm else 30.0)
+        outcome = process_batch(db, layers, make_client(), poll=poll, **common)
+    else:
+        outcome = process_docs(db, layers, make_client(), concurrency=concurrency, doc_id=args.doc_id, **common)
+    all_stats, usage = outcome["layers"], outcome["usage"]
+    for layer, stats in all_stats.items():
         logger.info("Layer %d done: %s", layer, stats)
 
     # Print summary to stderr (keep stdout clean for dry-run JSON)
     print("\n" + "=" * 50, file=sys.stderr)
     for layer, stats in all_stats.items():
-        print(f"Layer {layer}: {stats['success']}/{stats['total']} success, {stats['failed']} failed", file=sys.stderr)
+        print(f"Layer {layer}: {stats['success']}/{stats['total']} success, {stats['failed']} failed, "
+              f"{stats['skipped']} skipped", file=sys.stderr)
+    if usage["requests"]:
+        print(f"{usage['mode']}{' (batch)' if usage['batch'] else ''}: {usage['requests']} requests, "
+              f"{usage['input_tokens']} in (+{usage['cache_read_tokens']} cache read, "
+              f"{usage['cache_write_tokens']} cache write) / {usage['output_tokens']} out tokens, "
+              f"${usage['cost_usd']}, {usage['per_doc_seconds']}s API time per report", file=sys.stderr)
+    if usage.get("vs_3call"):
+        saved = usage["vs_3call"]
+        latency = "n/a (no 3-call run logged)" if saved["latency_saved_pct"] is None else f"-{saved['latency_saved_pct']}%"
+        print(f"vs 3-call: requests -{saved['requests_saved_pct']}%, input tokens -{saved['input_tokens_saved_pct']}%, "
+              f"output tokens -{saved['output_tokens_saved_pct']}%, cost -{saved['cost_saved_pct']}% "
+              f"(est. ${saved['estimated_3call_cost_usd']}), latency {latency}", file=sys.stderr)
     print("=" * 50, file=sys.stderr)
 
 
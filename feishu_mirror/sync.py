@@ -10,29 +10,17 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+from lib.columnar_store import open_columnar_store
 from lib.config import ensure_runtime_dirs, load_settings
 from lib.db import DB
-from lib.jobs import (
-    ensure_schema,
-    run_all_sync,
-    run_feishu_sync,
-    run_financials_sync,
-    run_local_sync,
-    run_market_sync,
-)
-
-_RUNNERS = {
-    "local": run_local_sync,
-    "feishu": run_feishu_sync,
-    "all": run_all_sync,
-    "market": run_market_sync,
-    "financials": run_financials_sync,
-}
+from lib.db_market import configure_columnar_store
+from lib.jobs import SYNC_RUNNERS, ensure_schema
+from lib.sync_queue import ScopeBusy
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Beiduoduo unified sync")
-    parser.add_argument("--scope", required=True, choices=_RUNNERS.keys())
+    parser.add_argument("--scope", required=True, choices=SYNC_RUNNERS.keys())
     parser.add_argument("--mode", required=True, choices=["full", "incremental"])
     parser.add_argument("--reason", default="schedule", choices=["manual", "schedule", "miss"])
     args = parser.parse_args()
@@ -41,8 +29,12 @@ def main() -> None:
     ensure_runtime_dirs(settings)
     db = DB(settings.database_url)
     ensure_schema(db, Path(__file__).parent / "schema.sql")
+    configure_columnar_store(open_columnar_store(settings))
 
-    result = _RUNNERS[args.scope](db, settings, mode=args.mode, reason=args.reason)
+    try:
+        result = SYNC_RUNNERS[args.scope](db, settings, mode=args.mode, reason=args.reason)
+    except ScopeBusy as exc:
+        raise SystemExit(str(exc)) from None
     print(result)
 
 
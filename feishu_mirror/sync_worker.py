@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Sync queue worker — runs the jobs queued by POST /v1/sync/run (lib/sync_queue.py)
+and, unless --no-schedule, the periodic syncs and daily push (lib/scheduler.py).
+
+Usage:
+    python3 sync_worker.py                # serve forever: 2 worker threads + scheduler
+    python3 sync_worker.py --workers 3
+    python3 sync_worker.py --no-schedule  # queue only (e.g. a second worker)
+    python3 sync_worker.py --once         # drain the queue, then exit
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+
+from lib.columnar_store import open_columnar_store
+from lib.config import ensure_runtime_dirs, load_settings
+from lib.db import DB
+from lib.db_market import configure_columnar_store
+from lib.jobs import SYNC_RUNNERS, ensure_schema
+from lib.scheduler import Scheduler, default_tasks, schedule_state_file
+from lib.sync_queue import HEARTBEAT_SECONDS, Heartbeat, LeaseLost, claim, complete, queue_state, reap
+
+_log = logging.getLogger("sync_worker")
+
+
+def run_job(db: DB, settings, job, worker_id: str) -> None:
+    _log.info("%s: run %s scope=%s mode=%s attempt=%d", worker_id, job.run_id, job.scope, job.mode, job.attempts)
+    t0 = time.time()
+    try:
+        with Heartbeat(db, job.run_id, worker_id) as hb:
+            result = SYNC_RUNNERS[job.scope](db, settings, mode=job.mode, reason=job.reason, run_id=job.run_id)
+        if hb.lost.is_set():
+            _log.warning("%s: lease on %s was lost mid-run", worker_id, job.run_id)
+        complete(db, job.run_id, worker_id, "success", result.get("stats", {}), None)
+        _log.info("%s: run %s done in %.1fs", worker_id, job.run_id, time.time() - t0)
+    except LeaseLost:
+        # Reaped and re-queued while we were slow: the next claimant resumes from the checkpoints.
+        _log.warning("%s: run %s stopped after %.1fs, lease lost", worker_id, job.run_id, time.time() - t0)
+    except Exception as exc:
+        _log.exception("%s: run %s failed", worker_id, job.run_id)
+        complete(db, job.run_id, worker_id, "failed", {}, str(exc))
+
+
+def worker_loop(db: DB, settings, worker_id: str, stop: threading.Event, *, poll: float, once: bool) -> None:
+    while not stop.is_set():
+        job = claim(db, worker_id)
+        if job is not None:
+            run_job(db, settings, job, worker_id)
+            continue
+        if once and not any(r["status"] == "queued" for r in queue_state(db)):
+            return
+        stop.wait(poll)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Beiduoduo sync queue worker")
+    parser.add_argument("--workers", type=int, default=2, help="jobs run concurrently (different scopes only)")
+    parser.add_argument("--poll", type=float, default=2.0, help="seconds between queue polls when idle")
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    parser.add_argument("--no-schedule", action="store_true", help="do not run the periodic sync scheduler")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s:%(name)s: %(message)s")
+    settings = load_settings(str(Path(__file__).parent / ".env"))
+    ensure_runtime_dirs(settings)
+    db = DB(settings.database_url)
+    ensure_schema(db, Path(__file__).parent / "schema.sql")
+    configure_columnar_store(open_columnar_store(settings))
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    reap(db)
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(
+            target=worker_loop, args=(db, settings, f"{prefix}:{i}", stop),
+            kwargs={"poll": args.poll, "once": args.once}, name=f"sync-worker-{i}", daemon=True,
+        )
+        for i in range(max(1, args.workers))
+    ]
+    if not (args.once or args.no_schedule):
+        scheduler = Scheduler(default_tasks(db, settings, Path(__file__).parent), schedule_state_file(settings))
+        threads.append(threading.Thread(target=scheduler.run_forever, args=(stop,), name="scheduler", daemon=True))
+    for t in threads:
+        t.start()
+    # The main thread reaps stale leases (its own crashed runs included, after a restart).
+    last_reap = time.time()
+    while any(t.is_alive() for t in threads) and not stop.wait(1.0):
+        if time.time() - last_reap >= HEARTBEAT_SECONDS:
+            reap(db)
+            last_reap = time.time()
+    # SIGTERM: in-flight runs are abandoned; their leases go stale and the next worker re-queues them.
+    for t in threads:
+        t.join(timeout=1 if stop.is_set() else None)
+
+
+if __name__ == "__main__":
+    main()
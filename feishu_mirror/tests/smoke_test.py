@@ -17,11 +17,14 @@ import argparse
 import json
 import os
 import signal
+import sqlite3
 import subprocess
 import sys
+import tempfile
 import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ── Config ──────────────────────────────────────────────────────────────────
@@ -32,12 +35,15 @@ API_DIR = str(Path(__file__).resolve().parent.parent)
 LOG_FILE = str(
     Path(__file__).resolve().parent.parent.parent / "数据库" / "_index" / "logs" / "query_api.log"
 )
+# Seconds from process start to a 200 on /health (restart_api only).
+COLD_START_BUDGET_S = 3.0
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
 
 _pass = 0
 _fail = 0
 _skip = 0
+_cold_start: float | None = None
 
 
 def _req(method: str, path: str, body: dict | None = None, timeout: int = 60) -> tuple[int, dict]:
@@ -93,6 +99,15 @@ def test_health():
     check("response has ok=true", body.get("ok") == "true", f"got {body}")
 
 
+def test_cold_start():
+    print("\n── Cold Start ──")
+    if _cold_start is None:
+        skip("cold start to /health", "API was already running (use --restart)")
+        return
+    check(f"cold start to /health < {COLD_START_BUDGET_S:.0f}s ({_cold_start:.2f}s)",
+          _cold_start < COLD_START_BUDGET_S, f"took {_cold_start:.2f}s")
+
+
 def test_market_quote():
     print("\n── Market Quote ──")
     code, body = _req("GET", "/v1/market/quote?symbol=AAPL&asset_class=stock")
@@ -151,6 +166,117 @@ def test_market_history_crypto():
     check("crypto < 20s", elapsed < 20, f"took {elapsed:.1f}s")
 
 
+def test_market_history_read_through():
+    print("\n── Market History (read-through cache) ──")
+    _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=30&chart=false")
+    t0 = time.time()
+    code, body = _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=30&chart=false")
+    elapsed = time.time() - t0
+    check("second call returns 200", code == 200, f"got {code}")
+    source = body.get("source") or {}
+    check("served from DB", source.get("mode") in ("db", "merged"), f"source={source}")
+    check("has data", isinstance(body.get("data"), list) and len(body["data"]) > 0)
+    check("cached call < 2s", elapsed < 2, f"took {elapsed:.1f}s")
+
+    code, body = _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=5&chart=false&cache=false")
+    check("cache=false returns 200", code == 200, f"got {code}")
+    check("cache=false goes upstream", (body.get("source") or {}).get("mode") == "upstream",
+          f"source={body.get('source')}")
+
+
+def test_market_history_resample():
+    print("\n── Market History (resample / downsample) ──")
+    code, body = _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=3650&chart=false&interval=M")
+    check("interval=M returns 200", code == 200, f"got {code}")
+    data = body.get("data") or []
+    check("monthly bars <= 121", 0 < len(data) <= 121, f"len={len(data)}")
+    check("has summary", isinstance(body.get("summary"), dict) and "change_pct" in body["summary"],
+          f"summary={body.get('summary')}")
+
+    code, body = _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=3650&chart=false&max_points=50")
+    check("max_points returns 200", code == 200, f"got {code}")
+    check("max_points respected", 0 < len(body.get("data") or []) <= 50, f"len={len(body.get('data') or [])}")
+
+    code, body = _req("GET", "/v1/forex/history?pair=USDCNY&days=365&interval=W")
+    check("forex interval=W returns 200", code == 200, f"got {code}")
+    check("forex weekly bars <= 54", 0 < len(body.get("data") or []) <= 54, f"len={len(body.get('data') or [])}")
+
+
+def test_market_indicators():
+    print("\n── Market Indicators ──")
+    code, body = _req("GET", "/v1/market/indicators?symbols=NVDA,BTC:crypto")
+    check("indicators returns 200", code == 200, f"got {code}")
+    data = {d.get("symbol"): d for d in body.get("data") or []}
+    nvda = data.get("NVDA") or {}
+    check("NVDA has sma200", (nvda.get("sma") or {}).get("200") is not None, f"sma={nvda.get('sma')}")
+    check("NVDA rsi in [0, 100]", 0 <= (nvda.get("rsi") or -1) <= 100, f"rsi={nvda.get('rsi')}")
+    check("BTC has realized_vol", bool((data.get("BTC") or {}).get("realized_vol")), f"btc={data.get('BTC')}")
+
+    t0 = time.time()
+    code, _ = _req("GET", "/v1/market/indicators?symbols=NVDA&refresh=false")
+    elapsed = time.time() - t0
+    check("cached indicators < 1s", code == 200 and elapsed < 1, f"code={code} took {elapsed:.2f}s")
+
+
+def test_market_correlation():
+    print("\n── Market Correlation ──")
+    code, body = _req("GET", "/v1/market/correlation?symbols=NVDA,AMD,BTC:crypto&days=180&refresh=true")
+    check("correlation returns 200", code == 200, f"got {code}: {body.get('detail', '')}")
+    corr = body.get("correlation") or []
+    check("3x3 correlation matrix", len(corr) == 3 and all(len(r) == 3 for r in corr), f"corr={corr}")
+    check("diagonal is 1", all(corr[i][i] == 1.0 for i in range(len(corr))), f"corr={corr}")
+    check("aligned on stock calendar", body.get("calendar") == "stock", f"calendar={body.get('calendar')}")
+    check("has beta matrix", len(body.get("beta") or []) == 3, f"beta={body.get('beta')}")
+
+    t0 = time.time()
+    code, _ = _req("GET", "/v1/market/correlation?symbols=NVDA,AMD,BTC:crypto&days=180")
+    elapsed = time.time() - t0
+    check("cached correlation < 0.5s", code == 200 and elapsed < 0.5, f"code={code} took {elapsed:.2f}s")
+
+    code, _ = _req("GET", "/v1/market/correlation?symbols=NVDA")
+    check("single symbol → 400", code == 400, f"got {code}")
+
+
+def test_sync_queue():
+    print("\n── Sync Queue ──")
+    body = {"scope": "local", "mode": "incremental", "reason": "manual"}
+    code1, first = _req("POST", "/v1/sync/run", body)
+    code2, second = _req("POST", "/v1/sync/run", body)
+    check("POST /v1/sync/run returns 200", code1 == 200 and code2 == 200, f"got {code1}, {code2}")
+    check("sync run is queued", first.get("status") == "queued", f"got {first}")
+    # The worker may have claimed the first run in between; only a still-queued run is shared.
+    if second.get("deduplicated"):
+        check("duplicate request reuses queued run", second.get("run_id") == first.get("run_id"), f"got {second}")
+    code, status = _req("GET", "/v1/sync/status")
+    check("sync status lists queue", isinstance(status.get("queue"), list), f"got keys {list(status)[:8]}")
+    stale = [r for r in status.get("queue", []) if r["status"] == "running" and not r.get("worker_id")]
+    check("no running run without a lease", not stale, f"{len(stale)} orphaned runs")
+    check("queued/running runs carry progress", all("progress_pct" in r for r in status.get("queue", [])),
+          "progress_pct missing")
+    check("sync status exposes schedule state", isinstance(status.get("schedule"), dict), f"got {status.get('schedule')!r}")
+
+
+def test_upstream_layer():
+    print("\n── Upstream Layer (async) ──")
+    code, body = _req("GET", "/v1/upstreams")
+    check("GET /v1/upstreams returns 200", code == 200, f"got {code}")
+    check("per-upstream limits listed", all(k in body for k in ("yfinance", "artemis", "sec", "feishu")),
+          f"keys={list(body)[:8]}")
+
+    # Slow upstream calls must not starve cheap endpoints.
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        futures = [ex.submit(_req, "GET", f"/v1/market/quote?symbol={s}&asset_class=stock")
+                   for s in ("AAPL", "MSFT", "NVDA", "AMZN", "META", "GOOGL")]
+        time.sleep(0.2)
+        t0 = time.time()
+        code, _ = _req("GET", "/health", timeout=5)
+        health_s = time.time() - t0
+        codes = [f.result()[0] for f in futures]
+    check(f"/health under upstream load < 0.5s ({health_s:.2f}s)", code == 200 and health_s < 0.5,
+          f"code={code}, took {health_s:.2f}s")
+    check("6 concurrent quotes answered", all(c in (200, 404, 504) for c in codes), f"codes={codes}")
+
+
 def test_chart_render_tradingview():
     print("\n── Chart Render (TradingView) ──")
     t0 = time.time()
@@ -159,6 +285,8 @@ def test_chart_render_tradingview():
         "title": "AAPL K线图",
         "symbol": "AAPL",
         "asset_class": "stock",
+        "renderer": "tradingview",
+        "cache": False,
     })
     elapsed = time.time() - t0
     check("TradingView chart returns 200", code == 200, f"got {code}: {body.get('detail', '')}")
@@ -166,6 +294,29 @@ def test_chart_render_tradingview():
     check("TradingView < 15s", elapsed < 15, f"took {elapsed:.1f}s")
 
 
+def test_chart_render_tradingview_pool():
+    print("\n── Chart Render (TradingView pool, parallel) ──")
+
+    def render(sym: str) -> tuple[int, float]:
+        t0 = time.time()
+        code, _ = _req("POST", "/v1/chart/render", {
+            "chart_type": "candlestick", "title": f"{sym} K线图", "symbol": sym, "asset_class": "stock",
+            "renderer": "tradingview", "cache": False,
+        })
+        return code, time.time() - t0
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        results = list(ex.map(render, ["NVDA", "MSFT", "TSLA", "AMD"]))
+    elapsed = time.time() - t0
+    check("4 parallel renders all 200", all(code == 200 for code, _ in results), f"codes={[c for c, _ in results]}")
+    check("4 parallel renders < 15s", elapsed < 15, f"took {elapsed:.1f}s")
+
+    code, stats = _req("GET", "/v1/chart/pool")
+    check("pool stats returns 200", code == 200, f"got {code}")
+    check("pool switched in-page", stats.get("switch", 0) + stats.get("reuse", 0) > 0, f"stats={stats}")
+
+
 def test_chart_render_no_data():
     print("\n── Chart Render (no data — validation) ──")
     code, body = _req("POST", "/v1/chart/render", {
@@ -191,6 +342,76 @@ def test_chart_render_local():
     check("has image_base64", "image_base64" in body)
 
 
+def test_chart_render_local_candlestick():
+    print("\n── Chart Render (local candlestick fast path) ──")
+    _req("GET", "/v1/market/history?symbol=NVDA&asset_class=stock&days=120&chart=false")  # warm DB
+    t0 = time.time()
+    code, body = _req("POST", "/v1/chart/render", {
+        "chart_type": "candlestick", "title": "NVDA K线图", "symbol": "NVDA", "asset_class": "stock",
+        "days": 120, "cache": False,
+    })
+    elapsed = time.time() - t0
+    check("local candlestick returns 200", code == 200, f"got {code}: {body.get('detail', '')}")
+    check("rendered locally", body.get("renderer") == "local", f"renderer={body.get('renderer')}")
+    check("local candlestick < 1s", elapsed < 1, f"took {elapsed:.2f}s")
+
+    code, body = _req("POST", "/v1/chart/render", {
+        "chart_type": "candlestick", "title": "data K线图",
+        "data": [
+            {"date": "2025-01-02", "open": 10, "high": 11, "low": 9, "close": 10.5, "volume": 100},
+            {"date": "2025-01-03", "open": 10.5, "high": 12, "low": 10, "close": 11.5, "volume": 120},
+            {"date": "2025-01-06", "open": 11.5, "high": 11.8, "low": 10.2, "close": 10.4, "volume": 90},
+        ],
+    })
+    check("candlestick from data returns 200", code == 200, f"got {code}: {body.get('detail', '')}")
+
+
+def test_chart_render_pool_parallel():
+    print("\n── Chart Render (process pool, parallel) ──")
+
+    def render(i: int) -> int:
+        code, _ = _req("POST", "/v1/chart/render", {
+            "chart_type": "line", "title": f"Pool {i}", "cache": False,
+            "data": [{"date": f"2025-01-{d:02d}", "value": d * (i + 1)} for d in range(1, 29)],
+        })
+        return code
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        codes = list(ex.map(render, range(6)))
+    elapsed = time.time() - t0
+    check("6 parallel local renders all 200", all(c == 200 for c in codes), f"codes={codes}")
+    check("6 parallel local renders < 5s", elapsed < 5, f"took {elapsed:.1f}s")
+
+    code, body = _req("GET", "/health")
+    check("API responsive after renders", code == 200, f"got {code}")
+    code, stats = _req("GET", "/v1/chart/pool")
+    pool = stats.get("render_pool") or {}
+    check("render pool used", pool.get("renders", 0) >= 6 or pool == {}, f"render_pool={pool}")
+
+
+def test_chart_render_cache():
+    print("\n── Chart Render (content-addressed cache) ──")
+    payload = {
+        "chart_type": "bar",
+        "title": f"Cache Test {int(time.time())}",
+        "data": [{"label": "A", "value": 1}, {"label": "B", "value": 2}],
+    }
+    code, first = _req("POST", "/v1/chart/render", payload)
+    check("first render returns 200", code == 200, f"got {code}")
+    check("first render is a miss", first.get("cached") is False, f"cached={first.get('cached')}")
+
+    t0 = time.time()
+    code, second = _req("POST", "/v1/chart/render", payload)
+    elapsed = time.time() - t0
+    check("repeat render is a hit", second.get("cached") is True, f"cached={second.get('cached')}")
+    check("same PNG bytes", second.get("image_base64") == first.get("image_base64"))
+    check("cache hit < 0.2s", elapsed < 0.2, f"took {elapsed:.2f}s")
+
+    code, body = _req("POST", "/v1/chart/render", {**payload, "cache": False})
+    check("cache=false bypasses", code == 200 and body.get("cached") is False, f"cached={body.get('cached')}")
+
+
 def test_chart_render_feishu(full: bool = False):
     print("\n── Chart Render + Feishu Send ──")
     if not full:
@@ -211,11 +432,11 @@ def test_chart_render_feishu(full: bool = False):
 def test_browser_reuse():
     print("\n── Browser Reuse (consecutive calls) ──")
     # First call warms up the browser (may already be warm)
-    _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=5&chart=true")
+    _req("GET", "/v1/market/history?symbol=AAPL&asset_class=stock&days=5&chart=true&chart_renderer=tradingview")
 
     # Second call should be fast (browser reused)
     t0 = time.time()
-    code, body = _req("GET", "/v1/market/history?symbol=MSFT&asset_class=stock&days=5&chart=true")
+    code, body = _req("GET", "/v1/market/history?symbol=MSFT&asset_class=stock&days=5&chart=true&chart_renderer=tradingview")
     elapsed = time.time() - t0
     check("reuse call returns 200", code == 200, f"got {code}")
     check("has chart", "chart_base64" in body)
@@ -353,6 +574,120 @@ def test_structurize_dry_run():
         check("structurize --dry-run runs", False, str(e))
 
 
+STRUCTURIZE_SEED_DOCS = 2
+
+
+def _structurize_seed_db(tmp: str) -> tuple[dict[str, str], list[str]]:
+    """A scratch database holding STRUCTURIZE_SEED_DOCS unprocessed reports; returns (env, doc_ids)."""
+    db_path = str(Path(tmp) / "structurize.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript((Path(API_DIR) / "schema.sql").read_text(encoding="utf-8"))
+        for n in range(STRUCTURIZE_SEED_DOCS):
+            text = f"NVDA smoke report {n}\n" + "NVDA revenue 2025 grew 30% to 120 USD_M; AMD gained share.\n" * 8
+            conn.execute(
+                "INSERT INTO report_document(doc_id, source_type, source_id, title, full_text, content_hash) "
+                "VALUES (?, 'local', ?, ?, ?, ?)",
+                (f"smoke-structurize-{n}", f"smoke/{n}.md", f"smoke {n}", text, f"smoke-hash-{n}"),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    doc_ids = [f"smoke-structurize-{n}" for n in range(STRUCTURIZE_SEED_DOCS)]
+    return {**os.environ, "DATABASE_URL": db_path}, doc_ids
+
+
+def test_structurize_fake_llm():
+    print("\n── Structurize Concurrent (fake LLM) ──")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, doc_ids = _structurize_seed_db(tmp)
+            result = subprocess.run(
+                ["python3", "structurize.py", "--layer", "all", "--dry-run",
+                 "--fake-llm", "--concurrency", "4"],
+                cwd=API_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+        check("structurize --fake-llm exits 0", result.returncode == 0,
+              f"exit={result.returncode}, stderr={result.stderr[-300:]}")
+        decoder, pos, items = json.JSONDecoder(), 0, []
+        out = result.stdout.strip()
+        while pos < len(out):
+            item, pos = decoder.raw_decode(out, pos)
+            items.append(item)
+            while pos < len(out) and out[pos].isspace():
+                pos += 1
+        answered = {(i.get("doc_id"), i.get("layer")) for i in items}
+        check("all layers answered", {i.get("layer") for i in items} == {1, 2, 3}, f"{len(items)} results")
+        check("one result per seeded doc and layer",
+              len(items) == 3 * len(doc_ids) and answered == {(d, l) for d in doc_ids for l in (1, 2, 3)},
+              f"{len(items)} results for {len(doc_ids)} docs")
+    except subprocess.TimeoutExpired:
+        check("structurize --fake-llm completes within 60s", False, "timeout")
+    except Exception as e:
+        check("structurize --fake-llm runs", False, str(e))
+
+
+def test_structurize_batch_stub():
+    print("\n── Structurize Message Batches (local stub server) ──")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env, doc_ids = _structurize_seed_db(tmp)
+            result = subprocess.run(
+                ["python3", "structurize.py", "--layer", "1", "--batch", "--fake-llm"],
+                cwd=API_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            check("structurize --batch exits 0", result.returncode == 0,
+                  f"exit={result.returncode}, stderr={result.stderr[-300:]}")
+            check("batch run reported", "(batch)" in result.stderr, result.stderr[-300:])
+            conn = sqlite3.connect(env["DATABASE_URL"])
+            try:
+                written = {r[0] for r in conn.execute("SELECT doc_id FROM report_meta_enriched")}
+                done = {r[0] for r in conn.execute(
+                    "SELECT doc_id FROM report_layer_state WHERE layer = 1 AND status = 'done'")}
+            finally:
+                conn.close()
+            check("batch results written for every seeded doc", set(doc_ids) <= written,
+                  f"{len(written & set(doc_ids))}/{len(doc_ids)} written")
+            check("batch results recorded in layer state", set(doc_ids) <= done,
+                  f"{len(done & set(doc_ids))}/{len(doc_ids)} done")
+    except subprocess.TimeoutExpired:
+        check("structurize --batch completes within 60s", False, "timeout")
+    except Exception as e:
+        check("structurize --batch runs", False, str(e))
+
+
+def test_structurize_context_eval():
+    print("\n── Structurize Context Selection (fake LLM) ──")
+    try:
+        result = subprocess.run(
+            ["python3", "structurize.py", "--context-eval", "3", "--fake-llm"],
+            cwd=API_DIR,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        check("structurize --context-eval exits 0", result.returncode == 0,
+              f"exit={result.returncode}, stderr={result.stderr[-300:]}")
+        data = json.loads(result.stdout)
+        check("both context strategies compared", {"truncate", "select"} <= set(data), str(list(data)))
+        # The fake client's answers do not depend on the context, so only the report shape is checked.
+        check("each strategy reports usage and context coverage",
+              all({"metrics", "input_tokens", "context"} <= set(data.get(m, {})) for m in ("truncate", "select")),
+              str({m: list(data.get(m, {})) for m in ("truncate", "select")}))
+    except subprocess.TimeoutExpired:
+        check("structurize --context-eval completes within 60s", False, "timeout")
+    except Exception as e:
+        check("structurize --context-eval runs", False, str(e))
+
+
 def test_kol_watchlist():
     print("\n── KOL Watchlist ──")
     test_owner = "test_owner_001"
@@ -422,6 +757,36 @@ def test_structured_api():
     check("GET /v1/metrics returns 200", code == 200, f"got {code}")
     check("has data array", isinstance(body.get("data"), list))
 
+    # Aliases resolve to one entity: 谷歌 / Google / GOOGL filter the same theses.
+    counts = []
+    for name in ("%E8%B0%B7%E6%AD%8C", "Google", "GOOGL"):
+        code, body = _req("GET", f"/v1/theses?company={name}&limit=100")
+        counts.append(body.get("count") if code == 200 else None)
+    check("company aliases give the same theses", len(set(counts)) == 1 and counts[0] is not None, str(counts))
+
+    # Series: one value per normalized period, aligned arrays, oldest first.
+    code, body = _req("GET", "/v1/metrics/series?company=Coinbase&metric=revenue")
+    check("GET /v1/metrics/series returns 200/404", code in (200, 404), f"got {code}")
+    if code == 200:
+        periods = body.get("periods") or []
+        check("series periods are unique", len(periods) == len(set(periods)), str(periods))
+        check("series arrays are aligned", len(body.get("values") or []) == len(periods) == len(body.get("n_reports") or []))
+
+    code, body = _req("GET", "/v1/theses/consensus?company=ETH")
+    check("GET /v1/theses/consensus returns 200/404", code in (200, 404), f"got {code}")
+    if code == 200:
+        check("consensus has direction counts", all(isinstance(body.get(k), int) for k in ("bullish", "bearish", "neutral")))
+        check("consensus has trend", isinstance(body.get("trend"), list))
+
+    code, body = _req("GET", "/v1/search/structured?q=regulatory&top_k=5")
+    check("GET /v1/search/structured returns 200", code == 200, f"got {code}")
+    hits = body.get("hits") or []
+    check("structured hits are typed and ranked",
+          all(h.get("kind") in ("chunk", "thesis", "metric") for h in hits)
+          and [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True))
+    code, _ = _req("GET", "/v1/search/structured?q=regulatory&kinds=bogus")
+    check("unknown kinds returns 400", code == 400, f"got {code}")
+
     code, body = _req("GET", "/v1/reports/stats")
     check("GET /v1/reports/stats returns 200", code == 200, f"got {code}")
     check("has total_eligible", "total_eligible" in body, f"keys={list(body.keys())}")
@@ -487,6 +852,21 @@ def test_search_score_positive():
         skip("search score check", "no hits returned")
 
 
+def test_doc_views():
+    print("\n── Doc Views ──")
+    code, body = _req("GET", "/v1/search?q=test&top_k=1")
+    if code != 200 or not body.get("hits"):
+        skip("doc views", "no hits returned")
+        return
+    hit = body["hits"][0]
+    code, doc = _req("GET", f"/v1/docs/{hit['doc_id']}")
+    check("GET /v1/docs/{id} (summary) returns 200", code == 200, f"got {code}")
+    check("summary view has outline, no text", isinstance(doc.get("outline"), list) and "full_text" not in doc)
+    code, span = _req("GET", f"/v1/docs/{hit['doc_id']}/text?start={hit['start_offset']}&end={hit['end_offset']}")
+    check("text range returns the hit's chunk", code == 200 and span.get("text", "").strip() == hit["quote"],
+          f"got {code}")
+
+
 def test_macro_cached():
     print("\n── Macro Cached ──")
     # First call
@@ -545,13 +925,16 @@ def restart_api():
     )
     print(f"  Started PID {proc.pid}")
 
-    # Wait for health
-    for i in range(15):
-        time.sleep(1)
+    # Wait for health; poll finely so the cold start is measured, not rounded to 1s
+    t0 = time.time()
+    while time.time() - t0 < 15:
+        time.sleep(0.1)
         try:
             code, _ = _req("GET", "/health", timeout=3)
             if code == 200:
-                print(f"  API healthy after {i+1}s")
+                global _cold_start
+                _cold_start = time.time() - t0
+                print(f"  API healthy after {_cold_start:.2f}s")
                 return True
         except Exception:
             pass
@@ -595,18 +978,29 @@ def main():
 
     # Run tests
     test_health()
+    test_cold_start()
     test_search()
     test_market_quote()
     test_market_history(full=args.full)
     test_market_history_crypto()
+    test_market_history_read_through()
+    test_market_history_resample()
+    test_market_indicators()
+    test_market_correlation()
+    test_upstream_layer()
+    test_sync_queue()
 
     if not args.quick:
         test_chart_render_tradingview()
+        test_chart_render_tradingview_pool()
         test_chart_render_feishu(full=args.full)
         test_browser_reuse()
 
     test_chart_render_no_data()
     test_chart_render_local()
+    test_chart_render_local_candlestick()
+    test_chart_render_pool_parallel()
+    test_chart_render_cache()
     test_daily_push_dry_run()
     test_daily_push_send(full=args.full)
     test_kol_push_dry_run()
@@ -614,12 +1008,16 @@ def main():
     test_kol_watchlist()
     test_structured_api()
     test_structurize_dry_run()
+    test_structurize_fake_llm()
+    test_structurize_batch_stub()
+    test_structurize_context_eval()
     test_equity_profile()
     test_forex_quote()
     test_options_chain()
     test_macro_overview()
     test_search_invalid_date_range()
     test_search_score_positive()
+    test_doc_views()
     test_macro_cached()
     test_logs_clean()
 
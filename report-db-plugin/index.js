@@ -51,6 +51,9 @@ const SearchSchema = Type.Object({
 
 const DocSchema = Type.Object({
   doc_id: Type.String({ minLength: 1 }),
+  view: Type.Optional(Type.Union([Type.Literal("summary"), Type.Literal("sections"), Type.Literal("full")])),
+  start: Type.Optional(Type.Number({ minimum: 0 })),
+  end: Type.Optional(Type.Number({ minimum: 0 })),
 });
 
 const SyncNowSchema = Type.Object({
@@ -64,10 +67,29 @@ const MarketQuoteSchema = Type.Object({
   asset_class: Type.Union([Type.Literal("stock"), Type.Literal("crypto")]),
 });
 
+const IntervalSchema = Type.Union([
+  Type.Literal("D"), Type.Literal("W"), Type.Literal("M"), Type.Literal("Q"),
+]);
+
 const MarketHistorySchema = Type.Object({
   symbol: Type.String({ minLength: 1 }),
   asset_class: Type.Union([Type.Literal("stock"), Type.Literal("crypto")]),
   days: Type.Optional(Type.Number({ minimum: 1, maximum: 3650 })),
+  interval: Type.Optional(IntervalSchema),
+  max_points: Type.Optional(Type.Number({ minimum: 10, maximum: 5000 })),
+});
+
+const MarketIndicatorsSchema = Type.Object({
+  symbols: Type.String({ minLength: 1, description: "Comma-separated, e.g. 'NVDA,AAPL,ETH:crypto'" }),
+  asset_class: Type.Optional(Type.Union([Type.Literal("stock"), Type.Literal("crypto")])),
+  refresh: Type.Optional(Type.Boolean()),
+});
+
+const MarketCorrelationSchema = Type.Object({
+  symbols: Type.String({ minLength: 1, description: "Comma-separated, at least 2, e.g. 'NVDA,AMD,BTC:crypto'" }),
+  days: Type.Optional(Type.Number({ minimum: 10, maximum: 3650 })),
+  asset_class: Type.Optional(Type.Union([Type.Literal("stock"), Type.Literal("crypto")])),
+  returns: Type.Optional(Type.Boolean()),
 });
 
 const FinancialsSchema = Type.Object({
@@ -136,6 +158,8 @@ const ForexPairSchema = Type.Object({
 const ForexHistorySchema = Type.Object({
   pair: Type.String({ minLength: 3 }),
   days: Type.Optional(Type.Number({ minimum: 1, maximum: 3650 })),
+  interval: Type.Optional(IntervalSchema),
+  max_points: Type.Optional(Type.Number({ minimum: 10, maximum: 5000 })),
 });
 
 const OptionsChainSchema = Type.Object({
@@ -351,10 +375,16 @@ const plugin = {
       {
         name: "report_get_doc",
         label: "Report Get Doc",
-        description: "Fetch a normalized document payload by doc_id.",
+        description: "Fetch a document by doc_id. Default view=summary (metadata, summary, outline with offsets); view=sections adds chunk offsets and previews; view=full adds the whole text. Pass start/end (offsets from search hits, sections or the outline) to fetch just that span of text.",
         parameters: DocSchema,
         async execute(_toolCallId, params) {
-          return json(await request(api, `/v1/docs/${encodeURIComponent(params.doc_id)}`));
+          const docPath = `/v1/docs/${encodeURIComponent(params.doc_id)}`;
+          if (params.start !== undefined) {
+            const query = new URLSearchParams({ start: String(params.start) });
+            if (params.end !== undefined) query.set("end", String(params.end));
+            return json(await request(api, `${docPath}/text?${query.toString()}`));
+          }
+          return json(await request(api, `${docPath}?view=${params.view || "summary"}`));
         },
       },
       { name: "report_get_doc" },
@@ -364,7 +394,7 @@ const plugin = {
       {
         name: "report_sync_now",
         label: "Report Sync Now",
-        description: "Trigger sync job for local/feishu/all sources.",
+        description: "Queue a sync job for local/feishu/all sources (a job already queued for the scope is reused).",
         parameters: SyncNowSchema,
         async execute(_toolCallId, params) {
           return json(
@@ -450,13 +480,15 @@ const plugin = {
       {
         name: "market_get_history",
         label: "Market History",
-        description: "Get historical OHLCV data for a stock or crypto. Only use when the user explicitly asks for data analysis — for price trend viewing, send a TradingView link instead (see TOOLS.md).",
+        description: "Get historical OHLCV data for a stock or crypto. Only use when the user explicitly asks for data analysis — for price trend viewing, send a TradingView link instead (see TOOLS.md). Response includes a server-computed summary (change, high/low, drawdown, vol). For long ranges pass interval=W/M/Q or max_points to keep the payload small.",
         parameters: MarketHistorySchema,
         async execute(_toolCallId, params) {
           const query = new URLSearchParams();
           query.set("symbol", params.symbol);
           query.set("asset_class", params.asset_class);
           if (params.days) query.set("days", String(params.days));
+          if (params.interval) query.set("interval", params.interval);
+          if (params.max_points) query.set("max_points", String(params.max_points));
           query.set("chart", "false");
           return json(await request(api, `/v1/market/history?${query.toString()}`));
         },
@@ -464,6 +496,41 @@ const plugin = {
       { name: "market_get_history" },
     );
 
+    api.registerTool(
+      {
+        name: "market_indicators",
+        label: "Market Indicators",
+        description: "Latest technical indicators for one or more symbols: SMA 20/50/200 (and whether price is above each), EMA 12/26, RSI 14, MACD, Bollinger bands, realized vol 30d/90d, drawdown. Use this instead of market_get_history for questions like 'is NVDA above its 200-day MA'.",
+        parameters: MarketIndicatorsSchema,
+        async execute(_toolCallId, params) {
+          const query = new URLSearchParams();
+          query.set("symbols", params.symbols);
+          if (params.asset_class) query.set("asset_class", params.asset_class);
+          if (params.refresh === false) query.set("refresh", "false");
+          return json(await request(api, `/v1/market/indicators?${query.toString()}`));
+        },
+      },
+      { name: "market_indicators" },
+    );
+
+    api.registerTool(
+      {
+        name: "market_correlation",
+        label: "Market Correlation",
+        description: "Correlation and beta matrices plus total return / annualized vol for a basket of stocks and crypto over the last N days (default 365). Stock and crypto calendars are aligned server-side. beta[i][j] is the beta of symbols[i] against symbols[j]. Pass returns=true only if the daily return matrix itself is needed.",
+        parameters: MarketCorrelationSchema,
+        async execute(_toolCallId, params) {
+          const query = new URLSearchParams();
+          query.set("symbols", params.symbols);
+          if (params.days) query.set("days", String(params.days));
+          if (params.asset_class) query.set("asset_class", params.asset_class);
+          if (params.returns) query.set("returns", "true");
+          return json(await request(api, `/v1/market/correlation?${query.toString()}`));
+        },
+      },
+      { name: "market_correlation" },
+    );
+
     api.registerTool(
       {
         name: "financials_get",
@@ -656,12 +723,14 @@ const plugin = {
       {
         name: "forex_history",
         label: "Forex History",
-        description: "Historical forex rates (OHLC). Use for '人民币过去一年走势' or 'EURUSD trend last 90 days'.",
+        description: "Historical forex rates (OHLC) with a summary block. Use for '人民币过去一年走势' or 'EURUSD trend last 90 days'. For long ranges pass interval=W/M/Q or max_points.",
         parameters: ForexHistorySchema,
         async execute(_toolCallId, params) {
           const query = new URLSearchParams();
           query.set("pair", params.pair);
           if (params.days) query.set("days", String(params.days));
+          if (params.interval) query.set("interval", params.interval);
+          if (params.max_points) query.set("max_points", String(params.max_points));
           return json(await request(api, `/v1/forex/history?${query.toString()}`));
         },
       },
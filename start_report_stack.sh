@@ -15,6 +15,10 @@ fi
 pkill -f "python3 .*feishu_mirror/query_api.py" >/dev/null 2>&1 || true
 nohup /usr/bin/python3 "$API_DIR/query_api.py" > "$LOG_DIR/query_api.log" 2>&1 &
 
+# Start sync queue worker (runs jobs queued by POST /v1/sync/run)
+pkill -f "python3 .*feishu_mirror/sync_worker.py" >/dev/null 2>&1 || true
+nohup /usr/bin/python3 "$API_DIR/sync_worker.py" > "$LOG_DIR/sync_worker.log" 2>&1 &
+
 # Restart OpenClaw gateway to reload plugin/prompt
 pkill -f "openclaw.*gateway" >/dev/null 2>&1 || true
 nohup /Users/beiduoudo/.openclaw/bin/openclaw gateway run > /Users/beiduoudo/Desktop/贝多多/.openclaw/logs/gateway.manual.log 2>&1 &